@@ -1,9 +1,19 @@
-from flask import Flask, request, jsonify
+import os
+
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from groq_service import get_groq_feedback
+from groq_service import SSE_HEADERS, feedback_event_stream, feedback_stats, get_groq_feedback
+from movement_tracker import COUNTERS, MAX_WINDOW_FRAMES, frames_from_window, track_landmarks
+# From ImageDetection/, which movement_tracker puts on sys.path (see its deployment note)
+from landmark_wire import LANDMARK_MIMETYPE
+from routes.groq_routes import groq_bp
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+# Larger bodies get 413 before they are read
+app.config["MAX_CONTENT_LENGTH"] = int(float(os.environ.get("MAX_REQUEST_MB", 4)) * (1 << 20))
+# /get-feedback and /groq/ask, plus their /stream variants
+app.register_blueprint(groq_bp)
 
 @app.route("/get-groq-feedback", methods=["POST"])
 def groq_feedback():
@@ -20,14 +30,80 @@ def groq_feedback():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/get-groq-feedback/stream", methods=["POST"])
+def groq_feedback_stream():
+    """Like /get-groq-feedback, but relays the completion as server-sent events.
+
+    Events: token {"text"}, sentence {"text"}, then done {"response",
+    "first_feedback_ms"} or error {"error"}. Set "speak": false in the body
+    to skip server-side text-to-speech.
+    """
+    data = request.get_json(silent=True) or {}
+    prompt = data.get("prompt", "")
+
+    if not prompt:
+        return jsonify({"error": "Prompt missing"}), 400
+
+    events = feedback_event_stream(prompt, speak=data.get("speak", True) is not False)
+    return Response(stream_with_context(events), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.route("/llm-stats", methods=["GET"])
+def llm_stats():
+    """LLM client calls, retries and latency, cache and coalescing counters, time to first feedback."""
+    return jsonify(feedback_stats()), 200
+
+
 @app.route('/track-movement', methods=['POST'])
 def track_movement():
-    data = request.json  # Expecting keypoints or analysis input from frontend
-    # Placeholder logic — replace with your OpenCV or ML logic
-    result = {
-        "status": "received",
-        "analysis": "Movement tracking functionality will be implemented here."
-    }
+    """Count reps from landmarks detected on the client.
+
+    JSON body:
+      exercise    exercise id, e.g. "squat"
+      session_id  patient session (or the X-Session-ID header), required
+      landmarks   one frame: 33 x [x, y, z, visibility] (null when no pose), or
+      frames      a window of such frames, oldest first (at most MAX_WINDOW_FRAMES, else 413)
+      reset       optional, start the exercise over
+
+    Or a binary landmark window (Content-Type application/x-landmark-window,
+    see ImageDetection/landmark_wire.py) with exercise, session_id and reset
+    as query parameters.
+    """
+    binary = request.mimetype == LANDMARK_MIMETYPE
+    data = request.args if binary else request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    exercise = data.get("exercise")
+    if not isinstance(exercise, str) or exercise not in COUNTERS:
+        return jsonify({"error": f"Unknown exercise {exercise!r}", "exercises": sorted(COUNTERS)}), 400
+
+    try:
+        if binary:
+            frames = frames_from_window(request.get_data(cache=False))
+        elif "frames" in data:
+            frames = data["frames"]
+        elif "landmarks" in data:
+            frames = [data["landmarks"]]
+        else:
+            return jsonify({"error": "Landmarks missing"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not isinstance(frames, list):
+        return jsonify({"error": "frames must be a list of landmark frames"}), 400
+    if len(frames) > MAX_WINDOW_FRAMES:
+        return jsonify({"error": f"Window of {len(frames)} frames exceeds {MAX_WINDOW_FRAMES}; send shorter windows"}), 413
+
+    # No fallback to the client address: patients behind one NAT would share a counter
+    session_id = data.get("session_id") or request.headers.get("X-Session-ID")
+    if not session_id or not isinstance(session_id, str):
+        return jsonify({"error": "Session id missing: send session_id or an X-Session-ID header"}), 400
+    reset = data.get("reset") not in (None, False, "", "0", "false")
+    try:
+        result = track_landmarks(session_id, exercise, frames, reset=reset)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify(result), 200
 
 
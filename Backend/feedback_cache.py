@@ -0,0 +1,178 @@
+# feedback_cache.py
+# -----------------------------
+# Response cache in front of the LLM feedback calls (groq_service.py).
+# Patients doing the same exercise produce nearly identical prompts, and each
+# LLM round-trip costs one to three seconds plus API spend. Responses are
+# kept in a bounded in-memory LRU with a TTL and, optionally, in a SQLite
+# file that survives restarts and is shared by every worker process on the
+# host. Keys hash the normalized prompt together with the model and request
+# parameters, so a different model or temperature never returns a stale
+# answer.
+#
+# The SQLite tier also holds short in-flight leases (claim/release), which
+# single_flight.py uses so only one worker on the host calls the API for a
+# given key while the others wait for the cached result.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_prompt(prompt):
+    """Collapse runs of whitespace so formatting differences share a cache entry."""
+    return " ".join(prompt.split())
+
+
+def cache_key(prompt, model, params=None):
+    """Stable hex key for a prompt + model + request parameters."""
+    body = json.dumps({"prompt": normalize_prompt(prompt), "model": model, "params": params or {}},
+                      sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class FeedbackCache:
+    """LRU + TTL map from cache key to response text, with an optional SQLite tier.
+
+    Memory hits cost a dict lookup; disk hits are promoted back into memory.
+    `ttl` applies to both tiers. An expired row is deleted when a lookup
+    finds it, and every `prune_every` stores prune() sweeps out the rest,
+    so the SQLite file stays bounded by what was stored within one ttl.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600.0, db_path=None, prune_every=256, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prune_every = prune_every
+        self.db_path = db_path
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            # WAL lets several worker processes read while one writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS feedback "
+                             "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS inflight "
+                             "(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stores = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def shared(self):
+        """True when backed by a SQLite file other processes can see."""
+        return self._db is not None
+
+    def get(self, key, record=True):
+        """Cached response for `key`, or None. `record=False` leaves the counters alone."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += record
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires FROM feedback WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        self._remember(key, row[0], row[1])
+                        self.disk_hits += record
+                        return row[0]
+                    self._db.execute("DELETE FROM feedback WHERE key = ? AND expires <= ?", (key, now))
+                    if entry is None:
+                        self.expirations += 1
+            self.misses += record
+            return None
+
+    def put(self, key, value):
+        """Store a response in memory and, when configured, on disk."""
+        expires = self.clock() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires)
+            self.stores += 1
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO feedback (key, value, expires) VALUES (?, ?, ?)",
+                                 (key, value, expires))
+            sweep = self.prune_every and self.stores % self.prune_every == 0
+        if sweep:
+            self.prune()
+
+    def claim(self, key, owner, lease):
+        """Take the host-wide in-flight lease on `key` for `lease` seconds.
+
+        True if `owner` now holds it (always, without a SQLite tier); False
+        while another owner's unexpired lease stands.
+        """
+        if self._db is None:
+            return True
+        now = self.clock()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO inflight (key, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE inflight.expires <= ?", (key, owner, now + lease, now))
+            return cursor.rowcount == 1
+
+    def release(self, key, owner):
+        """Drop `owner`'s in-flight lease on `key`."""
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, owner))
+
+    def _remember(self, key, value, expires):
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def prune(self):
+        """Drop expired entries (and stale in-flight leases) from both tiers; returns how many were removed."""
+        now = self.clock()
+        with self._lock:
+            expired = [key for key, (_, expires) in self._entries.items() if expires <= now]
+            for key in expired:
+                del self._entries[key]
+            self.expirations += len(expired)
+            removed = len(expired)
+            if self._db is not None:
+                removed += self._db.execute("DELETE FROM feedback WHERE expires <= ?", (now,)).rowcount
+                self._db.execute("DELETE FROM inflight WHERE expires <= ?", (now,))
+        return removed
+
+    def stats(self):
+        with self._lock:
+            stats = {"entries": len(self._entries), "max_entries": self.max_entries, "ttl": self.ttl,
+                     "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                     "evictions": self.evictions, "expirations": self.expirations, "stores": self.stores}
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,31 +1,179 @@
-import requests
-import pyttsx3
+import json
+import os
+import queue
+import re
 import threading
+import time
+import pyttsx3
 from config import GROQ_API_KEY, GROQ_API_URL
+from feedback_cache import FeedbackCache, cache_key
+from llm_client import LatencyWindow, LLMClient, LLMError
+from single_flight import SingleFlight
 
-def get_groq_feedback(prompt):
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {GROQ_API_KEY}"
-    }
-    data = {
-        "model": "llama3-70b-8192",
-        "messages": [
-            {"role": "user", "content": prompt}
-        ]
-    }
+FEEDBACK_MODEL = "llama3-70b-8192"
+
+# One pooled keep-alive client for every request this process serves
+llm_client = LLMClient(
+    GROQ_API_URL,
+    GROQ_API_KEY,
+    model=FEEDBACK_MODEL,
+    connect_timeout=float(os.environ.get("LLM_CONNECT_TIMEOUT", "3.05")),
+    read_timeout=float(os.environ.get("LLM_READ_TIMEOUT", "30")),
+    deadline=float(os.environ.get("LLM_DEADLINE", "45")),
+    max_retries=int(os.environ.get("LLM_MAX_RETRIES", "3")),
+)
+
+# Repeated prompts are answered from memory (or the shared SQLite file when
+# FEEDBACK_CACHE_DB is set) instead of another LLM round-trip
+feedback_cache = FeedbackCache(
+    max_entries=int(os.environ.get("FEEDBACK_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("FEEDBACK_CACHE_TTL", "3600")),
+    db_path=os.environ.get("FEEDBACK_CACHE_DB") or None,
+)
+
+# Concurrent identical prompts share one upstream call (across workers too
+# when the cache is the shared SQLite file)
+feedback_flights = SingleFlight(
+    feedback_cache,
+    lease=float(os.environ.get("FEEDBACK_FLIGHT_LEASE", "60")),
+    # Just past the LLM client's deadline: a leader still running by then is stuck
+    wait=float(os.environ.get("FEEDBACK_FLIGHT_WAIT", "50")),
+)
 
-    response = requests.post(GROQ_API_URL, headers=headers, json=data)
-    result = response.json()
+# Time from request to the first feedback the patient can hear: the whole
+# completion for get_groq_feedback, the first sentence when streaming
+first_feedback = {"blocking": LatencyWindow(), "stream": LatencyWindow()}
 
-    # Extract response content
-    groq_response = result["choices"][0]["message"]["content"]
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def get_groq_feedback(prompt, **params):
+    start = time.perf_counter()
+    key = cache_key(prompt, FEEDBACK_MODEL, params)
+    groq_response = feedback_cache.get(key)
+    if groq_response is None:
+        groq_response = feedback_flights.do(key, lambda: _fetch_feedback(key, prompt, params))
+    first_feedback["blocking"].add((time.perf_counter() - start) * 1000)
 
     # Run text-to-speech in a separate thread to avoid blocking
     threading.Thread(target=groq_output_to_speech, args=(groq_response,)).start()
 
     return groq_response
 
+def _fetch_feedback(key, prompt, params):
+    groq_response = llm_client.chat([{"role": "user", "content": prompt}], model=FEEDBACK_MODEL, **params)
+    feedback_cache.put(key, groq_response)
+    return groq_response
+
+def stream_groq_feedback(prompt, on_sentence=None, **params):
+    """Yield the feedback text as it streams in; on_sentence(text) fires per complete sentence.
+
+    A cached response is yielded in one piece. The full response is cached
+    once the stream completes.
+    """
+    start = time.perf_counter()
+    key = cache_key(prompt, FEEDBACK_MODEL, params)
+    cached = feedback_cache.get(key)
+    chunks = [cached] if cached is not None else llm_client.stream_chat(
+        [{"role": "user", "content": prompt}], model=FEEDBACK_MODEL, **params)
+    pending = ""
+    parts = []
+    first = True
+
+    def sentence(text):
+        nonlocal first
+        if first:
+            first_feedback["stream"].add((time.perf_counter() - start) * 1000)
+            first = False
+        if on_sentence is not None:
+            on_sentence(text)
+
+    for chunk in chunks:
+        parts.append(chunk)
+        *complete, pending = SENTENCE_END.split(pending + chunk)
+        for text in complete:
+            sentence(text)
+        yield chunk
+    if pending.strip():
+        sentence(pending.strip())
+    if cached is None:
+        feedback_cache.put(key, "".join(parts))
+
+# Keep proxies from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def feedback_event_stream(prompt, speak=True, **params):
+    """Server-sent events for a streamed feedback request.
+
+    Emits `token` events ({"text"}) as the completion arrives, a `sentence`
+    event per complete sentence (spoken right away when `speak`), then
+    `done` ({"response", "first_feedback_ms"}) or `error` ({"error"}).
+    """
+    start = time.perf_counter()
+    sentences = []
+
+    def on_sentence(text):
+        sentences.append(text)
+        if speak:
+            speak_sentence(text)
+
+    first_ms = None
+    parts = []
+    try:
+        for text in stream_groq_feedback(prompt, on_sentence=on_sentence, **params):
+            parts.append(text)
+            yield _sse("token", {"text": text})
+            while sentences:
+                if first_ms is None:
+                    first_ms = round((time.perf_counter() - start) * 1000, 1)
+                yield _sse("sentence", {"text": sentences.pop(0)})
+    except LLMError as e:
+        yield _sse("error", {"error": str(e)})
+        return
+    except Exception as e:
+        # Anything else (speech queue, parsing, cache) must still end the stream for the client
+        print(f"Error streaming feedback: {e}")
+        yield _sse("error", {"error": f"{type(e).__name__}: {e}"})
+        return
+    for text in sentences:
+        yield _sse("sentence", {"text": text})
+    if first_ms is None and sentences:
+        first_ms = round((time.perf_counter() - start) * 1000, 1)
+    yield _sse("done", {"response": "".join(parts), "first_feedback_ms": first_ms})
+
+def feedback_stats():
+    """LLM client, feedback cache and coalescing counters, and time to first feedback."""
+    return {
+        "client": llm_client.stats(),
+        "cache": feedback_cache.stats(),
+        "coalescing": feedback_flights.stats(),
+        "first_feedback_ms": {mode: window.summary() for mode, window in first_feedback.items()},
+    }
+
+# Streamed sentences are spoken one after another by a single speaker thread
+_speech_queue = queue.Queue()
+_speaker = None
+_speaker_lock = threading.Lock()
+
+def _speech_worker():
+    while True:
+        text = _speech_queue.get()
+        try:
+            groq_output_to_speech(text)
+        except Exception as e:
+            print(f"Error speaking feedback: {e}")
+
+def speak_sentence(text):
+    """Queue one sentence for text-to-speech, in order with earlier ones."""
+    global _speaker
+    with _speaker_lock:
+        if _speaker is None:
+            _speaker = threading.Thread(target=_speech_worker, daemon=True)
+            _speaker.start()
+    _speech_queue.put(text)
+
 def groq_output_to_speech(groq_response):
     # Converts the Groq API response text to speech using pyttsx3.
 
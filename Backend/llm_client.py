@@ -0,0 +1,237 @@
+# llm_client.py
+# -----------------------------
+# Shared HTTP client for the LLM (Groq) chat-completions API.
+# One pooled keep-alive requests.Session per client, so feedback calls reuse
+# TCP/TLS connections instead of handshaking every time; separate connect and
+# read timeouts plus a total deadline across attempts, so a hung upstream
+# cannot block a worker forever; and retries with jittered exponential
+# backoff on 429 and 5xx (honouring Retry-After) and on connection failures
+# that happened before the request was sent. A read timeout or a connection
+# dropped mid-request is not retried: the API may already be generating (and
+# billing) that completion. Per-call latency, retries and errors are kept for
+# stats().
+#
+# stream_chat() requests a streamed completion (OpenAI-style server-sent
+# events) and yields the text as it arrives; its time to first token is
+# recorded separately from the full completion time. Only establishing the
+# stream is retried: once text has been handed out, a broken stream fails.
+
+import email.utils
+import json
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class LLMError(RuntimeError):
+    """The LLM API failed after all retries (or with a non-retryable status)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def _retry_after(response):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _unsent(error):
+    """True if a requests error means the request never reached the API (safe to send again)."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # Refused / unreachable / DNS failure: urllib3 could not open a connection
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class LatencyWindow:
+    """Thread-safe window of the last `history` latencies, summarized as percentiles."""
+
+    def __init__(self, history=500):
+        self._values = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def add(self, ms):
+        with self._lock:
+            self._values.append(ms)
+
+    def summary(self):
+        """{"p50", "p95", "max"} in milliseconds, or None before the first sample."""
+        with self._lock:
+            values = sorted(self._values)
+        if not values:
+            return None
+        return {
+            "p50": round(values[len(values) // 2], 1),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+            "max": round(values[-1], 1),
+        }
+
+
+class LLMClient:
+    """Chat-completions client with a pooled session, timeouts, retries and latency metrics."""
+
+    def __init__(self, api_url, api_key, model="llama3-70b-8192", connect_timeout=3.05, read_timeout=30.0,
+                 deadline=45.0, max_retries=3, backoff=0.5, max_backoff=8.0, max_retry_after=30.0, pool_size=10,
+                 history=500):
+        self.api_url = api_url
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        # Bound on one call across all its attempts and backoff sleeps (until the response starts)
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.session = requests.Session()
+        # Retries are handled here (with Retry-After), not by urllib3
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+        self._lock = threading.Lock()
+        self.latency = LatencyWindow(history)
+        self.first_token = LatencyWindow(history)
+        self.calls = 0
+        self.streams = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled = 0
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        # Full jitter keeps many workers from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _send(self, payload, stream=False):
+        """POST with retries; returns the successful (status 200) response."""
+        give_up = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            retry_after = None
+            remaining = max(0.001, give_up - time.monotonic())
+            timeout = tuple(min(t, remaining) for t in self.timeout)
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, status = f"{type(e).__name__}: {e}", None
+                if not _unsent(e):
+                    raise LLMError(f"{error} (not retried: the request may have reached the API)") from e
+            else:
+                if response.status_code == 200:
+                    return response
+                error, status = f"HTTP {response.status_code}: {response.text[:200]}", response.status_code
+                response.close()
+                if status not in RETRY_STATUS:
+                    raise LLMError(error, status)
+                if status == 429:
+                    with self._lock:
+                        self.throttled += 1
+                retry_after = _retry_after(response)
+            if attempt >= self.max_retries:
+                raise LLMError(f"Giving up after {attempt + 1} attempts: {error}", status)
+            delay = self._delay(attempt, retry_after)
+            if time.monotonic() + delay >= give_up:
+                raise LLMError(f"Giving up after {attempt + 1} attempts ({self.deadline:.0f} s deadline): {error}",
+                               status)
+            time.sleep(delay)
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+
+    def post(self, payload):
+        """POST a request body and return the decoded JSON response, retrying transient failures."""
+        start = time.perf_counter()
+        try:
+            return self._send(payload).json()
+        except LLMError:
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            with self._lock:
+                self.calls += 1
+            self.latency.add((time.perf_counter() - start) * 1000)
+
+    def stream(self, payload):
+        """POST a request with "stream": true and yield the text deltas as they arrive."""
+        start = time.perf_counter()
+        first = True
+        try:
+            response = self._send(dict(payload, stream=True), stream=True)
+            with response:
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        break
+                    try:
+                        choices = json.loads(data).get("choices") or [{}]
+                        text = (choices[0].get("delta") or {}).get("content")
+                    except (ValueError, AttributeError, IndexError) as e:
+                        raise LLMError(f"Malformed stream chunk: {data[:200]!r}") from e
+                    if text:
+                        if first:
+                            self.first_token.add((time.perf_counter() - start) * 1000)
+                            first = False
+                        yield text
+        except requests.RequestException as e:
+            with self._lock:
+                self.failures += 1
+            raise LLMError(f"Stream broken: {type(e).__name__}: {e}") from e
+        except LLMError:
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.streams += 1
+            self.latency.add((time.perf_counter() - start) * 1000)
+
+    def chat(self, messages, model=None, **params):
+        """Run a chat completion and return the first choice's message content."""
+        payload = {"model": model or self.model, "messages": messages}
+        payload.update(params)
+        result = self.post(payload)
+        return result["choices"][0]["message"]["content"]
+
+    def stream_chat(self, messages, model=None, **params):
+        """Run a streamed chat completion, yielding the content as it arrives."""
+        payload = {"model": model or self.model, "messages": messages}
+        payload.update(params)
+        return self.stream(payload)
+
+    def stats(self):
+        with self._lock:
+            stats = {"calls": self.calls, "streams": self.streams, "retries": self.retries,
+                     "failures": self.failures, "throttled": self.throttled}
+        latency, first_token = self.latency.summary(), self.first_token.summary()
+        if latency:
+            stats["latency_ms"] = latency
+        if first_token:
+            stats["first_token_ms"] = first_token
+        return stats
+
+    def close(self):
+        self.session.close()
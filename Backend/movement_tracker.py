@@ -0,0 +1,95 @@
+# movement_tracker.py
+# -----------------------------
+# Landmark ingest for /track-movement.
+# Clients that run pose detection on-device send their landmarks instead of
+# video frames; they go straight into the per-exercise counting and feedback
+# state machines from ImageDetection/exercises.py. There is no image decode,
+# inference or encode on the server, only a few microseconds of arithmetic
+# per frame, so one core can follow thousands of patients.
+#
+# Each patient session keeps its own counter in an LRU/idle-TTL registry
+# (ImageDetection/sessions.py), bounded by session count and by measured
+# session memory (TRACKING_MAX_MEMORY_MB). A request carries at most
+# MAX_WINDOW_FRAMES frames (TRACKING_MAX_WINDOW_FRAMES).
+#
+# Deployment: the counters, wire format and registry are the ImageDetection
+# modules themselves, imported as top-level modules, so the Backend must be
+# deployed next to ImageDetection/ (the repository layout) or be given its
+# location in IMAGE_DETECTION_DIR. Importing this module puts that directory
+# on sys.path for the rest of the Backend (pose_analyzer.py, app.py).
+
+import os
+import sys
+
+import numpy as np
+
+IMAGE_DETECTION_DIR = os.environ.get("IMAGE_DETECTION_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ImageDetection")
+if not os.path.isfile(os.path.join(IMAGE_DETECTION_DIR, "exercises.py")):
+    raise ImportError(f"ImageDetection modules not found in {IMAGE_DETECTION_DIR}: deploy the Backend next to "
+                      "ImageDetection/ or set IMAGE_DETECTION_DIR")
+if IMAGE_DETECTION_DIR not in sys.path:
+    sys.path.append(IMAGE_DETECTION_DIR)
+
+from exercises import COUNTERS, create_counter  # noqa: E402
+from landmark_wire import decode_window  # noqa: E402
+from landmarks import NUM_LANDMARKS  # noqa: E402
+from sessions import SessionRegistry  # noqa: E402
+
+sessions = SessionRegistry(
+    create_counter,
+    max_sessions=int(os.environ.get("MAX_TRACKING_SESSIONS", 10000)),
+    idle_ttl=float(os.environ.get("TRACKING_SESSION_TTL", 600)),
+    max_memory=int(float(os.environ.get("TRACKING_MAX_MEMORY_MB", 64)) * (1 << 20)),
+)
+
+# Largest landmark window one request may carry (10 s at 30 fps)
+MAX_WINDOW_FRAMES = int(os.environ.get("TRACKING_MAX_WINDOW_FRAMES", 300))
+
+
+def parse_landmarks(frame):
+    """Turn one frame of client landmarks into a (33, 4) float32 array, or None for no pose.
+
+    Accepts 33 rows of [x, y, z, visibility] or [x, y, z] (visibility 1),
+    as nested lists or flat; coordinates are normalized to the image as in
+    MediaPipe.
+    """
+    if frame is None:
+        return None
+    lm = np.asarray(frame, dtype=np.float32)
+    if lm.ndim == 1 and lm.size in (NUM_LANDMARKS * 3, NUM_LANDMARKS * 4):
+        lm = lm.reshape(NUM_LANDMARKS, -1)
+    if lm.ndim != 2 or lm.shape[0] != NUM_LANDMARKS or lm.shape[1] not in (3, 4):
+        raise ValueError(f"Expected {NUM_LANDMARKS} landmarks of [x, y, z(, visibility)], got shape {lm.shape}")
+    if lm.shape[1] == 3:
+        lm = np.hstack([lm, np.ones((NUM_LANDMARKS, 1), dtype=np.float32)])
+    return lm
+
+
+def frames_from_window(data):
+    """Decode a binary landmark window (landmark_wire.py) into frames for track_landmarks."""
+    landmarks, _, detected = decode_window(data)
+    return [lm if ok else None for lm, ok in zip(landmarks, detected)]
+
+
+def track_landmarks(session_id, exercise, frames, reset=False):
+    """Feed a window of landmark frames (oldest first) to the session's counter.
+
+    Returns the result after the last frame, with `frames` (how many were
+    applied) and `new_reps` (reps completed within this window).
+    """
+    if exercise not in COUNTERS:
+        raise KeyError(exercise)
+    # Parse the whole window before touching the session, so bad input changes nothing
+    arrays = [parse_landmarks(frame) for frame in frames]
+    with sessions.checkout(session_id, exercise) as counter:
+        if reset:
+            counter.reset()
+        start_count = counter.counter
+        result = counter.result()
+        for lm in arrays:
+            result = counter.update(lm)
+    del result["metrics"]
+    result["frames"] = len(arrays)
+    result["new_reps"] = result["counter"] - start_count
+    return result
@@ -1,33 +1,149 @@
 # pose_analyzer.py
 # -----------------------------
-# This file contains logic for analyzing human pose and movement,
-# likely using OpenCV or a pose estimation model (like Mediapipe).
-# It is responsible for extracting keypoints from video frames
-# and providing physiotherapy-related feedback based on posture or motion accuracy.
+# Turns pose data from the client into the prompt sent to the Groq API for
+# physiotherapy feedback.
+# Instead of dumping the raw pose dict (every landmark at full float
+# precision), the pose is reduced to a compact feature summary: exercise,
+# rep phase, rep count, key joint angles rounded to ANGLE_STEP-degree
+# buckets and the detected faults. Prompts are several times shorter, fit a
+# token budget, and near-identical poses produce identical prompts, which
+# the feedback cache (feedback_cache.py) can then serve.
 
+import math
 
-def generate_prompt_from_pose(pose_data):
+import numpy as np
+
+# Importing movement_tracker puts ImageDetection/ on sys.path
+from movement_tracker import COUNTERS, parse_landmarks
+from kinematics import joint_angles  # noqa: E402
+from landmarks import ANGLE_TRIPLETS  # noqa: E402
+
+ANGLE_STEP = 10
+PROMPT_TOKEN_BUDGET = 80
+MAX_FAULT_CHARS = 60
+# Exercise, phase and angle names come from the client too
+MAX_FIELD_CHARS = 24
+
+
+def estimate_tokens(text):
+    """Rough token count for English text (about four characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def _clip(text, limit):
+    """Collapse whitespace and cut to `limit` characters."""
+    return " ".join(str(text).split())[:limit].rstrip()
+
+
+def quantize_angle(angle, step=ANGLE_STEP):
+    """Round an angle in degrees to the nearest `step` bucket."""
+    return int(round(float(angle) / step) * step)
+
+
+def _landmark_angles(exercise, landmarks):
+    """Joint angles computed from raw landmarks, named like the exercise's metrics."""
+    triplets = ANGLE_TRIPLETS.get(exercise)
+    lm = parse_landmarks(landmarks)
+    if triplets is None or lm is None:
+        return {}
+    angles = joint_angles(lm[triplets, :2])
+    return dict(zip(COUNTERS[exercise].METRICS, angles.tolist()))
+
+
+def summarize_pose(pose_data, angle_step=ANGLE_STEP):
+    """Reduce pose data to the features the prompt needs.
+
+    Understands the trackers' result records (exercise, counter, stage,
+    metrics, feedback, landmarks) as well as explicit `angles`, `phase` and
+    `faults`. Angles come from `angles`, else the `*angle*` entries of
+    `metrics`, else are computed from `landmarks` when the exercise has
+    joint-angle triplets. Returns a dict with stable, sorted contents.
     """
-    This function takes pose data (e.g., detected keypoints from OpenCV or any other pose detection model)
-    and generates a prompt that can be passed to the Groq API for feedback.
+    if not isinstance(pose_data, dict):
+        pose_data = {"landmarks": pose_data}
+    exercise = pose_data.get("exercise") or pose_data.get("exercise_id")
+
+    angles = pose_data.get("angles")
+    if not angles:
+        metrics = pose_data.get("metrics") or {}
+        angles = {name: value for name, value in metrics.items() if "angle" in name}
+    if not angles and exercise in COUNTERS and pose_data.get("landmarks") is not None:
+        angles = _landmark_angles(exercise, pose_data["landmarks"])
+
+    faults = pose_data.get("faults") or pose_data.get("errors") or []
+    if isinstance(faults, str):
+        faults = [faults]
+    phase = pose_data.get("phase") or pose_data.get("stage")
+    reps = pose_data.get("counter", pose_data.get("reps"))
+    if isinstance(reps, str) and reps.strip().isdigit():
+        reps = int(reps)
+
+    return {
+        "exercise": _clip(str(exercise or "unknown").replace("_", " "), MAX_FIELD_CHARS),
+        "phase": _clip(phase, MAX_FIELD_CHARS) if phase else None,
+        "reps": int(reps) if isinstance(reps, (int, float)) and np.isfinite(reps) else None,
+        "angles": {_clip(str(name).replace("_angle", "").replace("_", " "), MAX_FIELD_CHARS):
+                   quantize_angle(value, angle_step)
+                   for name, value in sorted(angles.items(), key=lambda item: str(item[0]))
+                   if isinstance(value, (int, float)) and np.isfinite(value)},
+        # Order-preserving de-duplication
+        "faults": list(dict.fromkeys(" ".join(str(f).split())[:MAX_FAULT_CHARS] for f in faults if f)),
+    }
+
+
+def build_prompt(features, max_tokens=PROMPT_TOKEN_BUDGET, angle_step=ANGLE_STEP):
+    """Render a feature summary as a prompt of at most `max_tokens` (estimated) tokens.
+
+    When over budget, angles are dropped first (last to first), then faults;
+    the instruction is always kept, and exercise, phase and reps are cut short
+    if they alone still exceed the budget, so it is a hard limit.
+    """
+    head = f"Physiotherapy exercise: {features['exercise']}."
+    if features.get("phase"):
+        head += f" Phase: {features['phase']}."
+    if features.get("reps") is not None:
+        head += f" Reps: {features['reps']}."
+    instruction = "Give one short corrective cue (1-2 sentences)."
+    angles = list(features.get("angles", {}).items())
+    faults = list(features.get("faults", []))
+
+    while True:
+        parts = [head]
+        if angles:
+            parts.append(f"Joint angles (deg, ±{angle_step // 2}): "
+                         + ", ".join(f"{name} {value}" for name, value in angles) + ".")
+        if faults:
+            parts.append("Faults: " + "; ".join(faults) + ".")
+        parts.append(instruction)
+        prompt = " ".join(parts)
+        if estimate_tokens(prompt) <= max_tokens:
+            return prompt
+        if not (angles or faults):
+            # About four characters per token, see estimate_tokens()
+            room = max_tokens * 4 - len(instruction) - 1
+            return f"{head[:room].rstrip()} {instruction}" if room > 0 else instruction[:max_tokens * 4]
+        if angles:
+            angles.pop()
+        else:
+            faults.pop()
+
+
+def generate_prompt_from_pose(pose_data, max_tokens=PROMPT_TOKEN_BUDGET, angle_step=ANGLE_STEP):
+    """
+    This function takes pose data (a tracker result record, or angles, phase
+    and faults sent by the client) and generates a compact prompt that can be
+    passed to the Groq API for feedback.
 
     Args:
-    - pose_data (dict): Pose information with keypoints or any other representation.
+    - pose_data (dict): Pose information, see summarize_pose().
+    - max_tokens (int): Token budget of the prompt.
+    - angle_step (int): Bucket size, in degrees, joint angles are rounded to.
 
     Returns:
     - str: The generated prompt to send to Groq API.
     """
     try:
-        # Example of transforming pose_data into a meaningful prompt
-        # We need to implement the actual logic based on your pose data format
-
-        # For example:
-        prompt = f"Provide feedback based on the following pose data: {pose_data}"
-        
-        # We can use additional information to create a more elaborate prompt
-        # If pose_data includes keypoints, we could create specific instructions for Groq API.
-
-        return prompt
+        return build_prompt(summarize_pose(pose_data, angle_step), max_tokens, angle_step)
     except Exception as e:
         print(f"Error in generate_prompt_from_pose: {e}")
-        return "Error generating prompt."
\ No newline at end of file
+        return "Error generating prompt."
@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from pose_analyzer import generate_prompt_from_pose
-from groq_service import get_groq_feedback
+from groq_service import SSE_HEADERS, feedback_event_stream, get_groq_feedback
 
 groq_bp = Blueprint('groq', __name__)
 
@@ -13,6 +13,14 @@ def get_feedback():
         return jsonify({"feedback": feedback})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@groq_bp.route('/get-feedback/stream', methods=['POST'])
+def get_feedback_stream():
+    """Streamed /get-feedback: the feedback arrives as server-sent events (token, sentence, done)."""
+    pose_data = request.get_json(silent=True) or {}
+    prompt = generate_prompt_from_pose(pose_data)
+    events = feedback_event_stream(prompt)
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers=SSE_HEADERS)
     
 @groq_bp.route('/groq/ask', methods=['POST'])
 def ask_groq():
@@ -22,4 +30,15 @@ def ask_groq():
         return jsonify({'error': 'Prompt is required'}), 400
     
     response = get_groq_feedback(prompt)
-    return jsonify({'response': response})
\ No newline at end of file
+    return jsonify({'response': response})
+
+@groq_bp.route('/groq/ask/stream', methods=['POST'])
+def ask_groq_stream():
+    """Streamed /groq/ask: the answer arrives as server-sent events (token, sentence, done)."""
+    data = request.get_json(silent=True) or {}
+    prompt = data.get('prompt')
+    if not prompt:
+        return jsonify({'error': 'Prompt is required'}), 400
+
+    events = feedback_event_stream(prompt)
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers=SSE_HEADERS)
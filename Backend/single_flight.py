@@ -0,0 +1,136 @@
+# single_flight.py
+# -----------------------------
+# Request coalescing for the LLM feedback calls (groq_service.py).
+# When many patients hit the same exercise cue at once, identical prompts
+# arrive together and each would start its own upstream call. SingleFlight
+# lets the first caller for a key (the leader) make the call while later
+# callers in the same process wait for its result (or its error). A
+# follower waits at most `wait` seconds, then makes its own call, so a stuck
+# leader cannot hang everyone behind it.
+#
+# With a shared feedback cache (SQLite file, feedback_cache.py) the leader
+# also takes a host-wide lease on the key first; leaders in other worker
+# processes that find the lease taken poll the cache for the result instead
+# of calling too, and take over if the lease expires or is released without
+# a result (the owning worker failed or died).
+
+import threading
+import time
+import uuid
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one `fetch()` per key at a time; concurrent callers share its outcome.
+
+    `fetch()` must store its result in `cache` for other processes to see it
+    (groq_service does); `lease` bounds how long another worker waits on a
+    call it cannot observe, and should exceed the slowest upstream call.
+    `wait` (default: `lease`) bounds how long an in-process follower waits
+    for its leader before calling fetch() itself.
+    """
+
+    def __init__(self, cache=None, lease=60.0, poll_interval=0.05, wait=None):
+        self.cache = cache
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.wait = lease if wait is None else wait
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.upstream = 0
+        self.coalesced = 0
+        self.coalesced_remote = 0
+        self.failed = 0
+        self.takeovers = 0
+        self.late_hits = 0
+        self.wait_timeouts = 0
+
+    def do(self, key, fetch):
+        """Return fetch()'s result for `key`, sharing an in-flight call when there is one."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            if not call.done.wait(self.wait):
+                # The leader is stuck: stop waiting and make our own call
+                with self._lock:
+                    self.wait_timeouts += 1
+                return self._fetch(fetch)
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = self._lead(key, fetch)
+            return call.value
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _lead(self, key, fetch):
+        if self.cache is None:
+            return self._fetch(fetch)
+        if not self.cache.shared:
+            # A flight for this key may have finished between the caller's cache miss and now
+            value = self.cache.get(key, record=False)
+            if value is not None:
+                with self._lock:
+                    self.late_hits += 1
+                return value
+            return self._fetch(fetch)
+        owner = uuid.uuid4().hex
+        waited = False
+        while not self.cache.claim(key, owner, self.lease):
+            # Another worker holds the lease: its result lands in the shared cache
+            waited = True
+            time.sleep(self.poll_interval)
+            value = self.cache.get(key, record=False)
+            if value is not None:
+                with self._lock:
+                    self.coalesced_remote += 1
+                return value
+        try:
+            # Another worker may have stored the result since the caller's cache miss
+            value = self.cache.get(key, record=False)
+            if value is not None:
+                with self._lock:
+                    self.coalesced_remote += 1
+                return value
+            if waited:
+                # The lease lapsed or was released without a result
+                with self._lock:
+                    self.takeovers += 1
+            return self._fetch(fetch)
+        finally:
+            self.cache.release(key, owner)
+
+    def _fetch(self, fetch):
+        with self._lock:
+            self.upstream += 1
+        return fetch()
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "upstream": self.upstream, "coalesced": self.coalesced,
+                    "coalesced_remote": self.coalesced_remote, "failed": self.failed,
+                    "takeovers": self.takeovers, "late_hits": self.late_hits,
+                    "wait_timeouts": self.wait_timeouts,
+                    "shared": bool(self.cache is not None and self.cache.shared)}
@@ -0,0 +1,129 @@
+# test_feedback_cache.py
+# -----------------------------
+# FeedbackCache: keys, LRU + TTL in memory, the shared SQLite tier and its leases.
+
+import pytest
+
+from feedback_cache import FeedbackCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache" / "feedback.sqlite")
+
+
+def test_key_ignores_whitespace_but_not_model_or_params():
+    key = cache_key("Knees  out,\n keep going", "llama3", {"temperature": 0.7})
+    assert key == cache_key("Knees out, keep going", "llama3", {"temperature": 0.7})
+    assert key != cache_key("Knees out, keep going", "mixtral", {"temperature": 0.7})
+    assert key != cache_key("Knees out, keep going", "llama3", {"temperature": 0.2})
+
+
+def test_hit_miss_and_ttl(clock):
+    cache = FeedbackCache(ttl=10.0, clock=clock)
+    assert cache.get("k") is None
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    clock.now += 10.0
+    assert cache.get("k") is None and len(cache) == 0
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+
+def test_record_false_leaves_counters(clock):
+    cache = FeedbackCache(clock=clock)
+    cache.put("k", "v")
+    cache.get("k", record=False)
+    cache.get("other", record=False)
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_lru_eviction(clock):
+    cache = FeedbackCache(max_entries=2, clock=clock)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert cache.get("b") is None and cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_restart_and_is_promoted(clock, db_path):
+    cache = FeedbackCache(max_entries=1, db_path=db_path, clock=clock)
+    assert cache.shared
+    cache.put("a", "1")
+    cache.put("b", "2")  # evicts a from memory only
+    assert cache.get("a") == "1" and cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    reopened = FeedbackCache(db_path=db_path, clock=clock)
+    assert reopened.get("b") == "2" and len(reopened) == 1
+    reopened.close()
+
+
+def test_expired_disk_rows_are_deleted_on_read(clock, db_path):
+    cache = FeedbackCache(max_entries=1, ttl=10.0, db_path=db_path, clock=clock)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    clock.now += 11.0
+    assert cache.get("a") is None
+    assert cache.stats()["disk_entries"] == 1 and cache.stats()["expirations"] == 1
+    # Expired in both tiers: counted once
+    assert cache.get("b") is None
+    assert cache.stats()["disk_entries"] == 0 and cache.stats()["expirations"] == 2
+
+
+def test_prune_runs_every_n_stores(clock, db_path):
+    cache = FeedbackCache(ttl=10.0, db_path=db_path, prune_every=3, clock=clock)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.claim("lease", "owner", 5.0)
+    clock.now += 11.0
+    assert cache.stats()["disk_entries"] == 2
+    cache.put("c", "3")  # third store sweeps a, b and the lapsed lease
+    assert cache.stats()["disk_entries"] == 1 and len(cache) == 1
+    assert cache._db.execute("SELECT COUNT(*) FROM inflight").fetchone()[0] == 0
+    assert cache.prune() == 0
+
+
+def test_claim_and_release(clock, db_path):
+    cache = FeedbackCache(db_path=db_path, clock=clock)
+    other = FeedbackCache(db_path=db_path, clock=clock)
+    assert cache.claim("k", "one", 5.0)
+    assert not other.claim("k", "two", 5.0)
+    # Only the owner's release counts
+    other.release("k", "two")
+    assert not other.claim("k", "two", 5.0)
+    cache.release("k", "one")
+    assert other.claim("k", "two", 5.0)
+    cache.close()
+    other.close()
+
+
+def test_lapsed_lease_can_be_taken_over(clock, db_path):
+    cache = FeedbackCache(db_path=db_path, clock=clock)
+    assert cache.claim("k", "one", 5.0)
+    clock.now += 5.0
+    assert cache.claim("k", "two", 5.0)
+    # The old owner's late release does not drop the new lease
+    cache.release("k", "one")
+    assert not cache.claim("k", "three", 5.0)
+
+
+def test_memory_only_claims_always_succeed(clock):
+    cache = FeedbackCache(clock=clock)
+    assert not cache.shared
+    assert cache.claim("k", "one", 5.0) and cache.claim("k", "two", 5.0)
@@ -0,0 +1,107 @@
+# test_llm_client.py
+# -----------------------------
+# LLMClient retry rules and deadline against a local HTTP server.
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_client import LLMClient, LLMError
+
+COMPLETION = {"choices": [{"message": {"content": "Keep your back straight"}}]}
+
+
+@pytest.fixture
+def server():
+    """Local API whose responses come from `server.replies` (status, headers, delay s); counts requests."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            httpd.requests += 1
+            status, headers, delay = httpd.replies.pop(0) if httpd.replies else (200, {}, 0)
+            time.sleep(delay)
+            body = json.dumps(COMPLETION if status == 200 else {"error": "nope"}).encode()
+            try:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    httpd.requests = 0
+    httpd.replies = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/v1/chat/completions"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def client(url, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return LLMClient(url, "key", **kwargs)
+
+
+def test_retries_throttling_then_succeeds(server):
+    server.replies = [(429, {"Retry-After": "0"}, 0), (503, {}, 0)]
+    llm = client(server.url)
+    assert llm.chat([{"role": "user", "content": "hi"}]) == "Keep your back straight"
+    assert server.requests == 3
+    assert llm.stats()["retries"] == 2 and llm.stats()["throttled"] == 1
+
+
+def test_client_errors_are_not_retried(server):
+    server.replies = [(400, {}, 0)]
+    with pytest.raises(LLMError) as e:
+        client(server.url).chat([])
+    assert e.value.status == 400 and server.requests == 1
+
+
+def test_read_timeout_is_not_retried(server):
+    # The request reached the API; sending it again could bill a second completion
+    server.replies = [(200, {}, 1.0)]
+    llm = client(server.url, read_timeout=0.2)
+    with pytest.raises(LLMError, match="not retried"):
+        llm.chat([])
+    assert server.requests == 1 and llm.stats()["retries"] == 0 and llm.stats()["failures"] == 1
+
+
+def test_refused_connections_are_retried():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    llm = client(f"http://127.0.0.1:{port}/v1", max_retries=2)
+    with pytest.raises(LLMError, match="Giving up after 3 attempts"):
+        llm.chat([])
+    assert llm.stats()["retries"] == 2
+
+
+def test_deadline_caps_retries(server):
+    server.replies = [(503, {"Retry-After": "5"}, 0)] * 4
+    llm = client(server.url, deadline=1.0)
+    start = time.monotonic()
+    with pytest.raises(LLMError, match="deadline"):
+        llm.chat([])
+    assert time.monotonic() - start < 1.0 and server.requests == 1
+
+
+def test_deadline_shortens_the_read_timeout(server):
+    server.replies = [(200, {}, 2.0)]
+    llm = client(server.url, read_timeout=30.0, deadline=0.3)
+    start = time.monotonic()
+    with pytest.raises(LLMError):
+        llm.chat([])
+    assert time.monotonic() - start < 1.5
@@ -0,0 +1,45 @@
+# test_pose_analyzer.py
+# -----------------------------
+# Feature summaries and the token-budgeted feedback prompt.
+
+import pytest
+
+from pose_analyzer import (MAX_FIELD_CHARS, PROMPT_TOKEN_BUDGET, build_prompt, estimate_tokens,
+                           generate_prompt_from_pose, summarize_pose)
+
+
+def test_near_identical_poses_share_a_prompt():
+    a = {"exercise": "squat", "stage": "down", "counter": 3, "metrics": {"knee_angle": 92.4, "hip_angle": 101.0}}
+    b = dict(a, metrics={"knee_angle": 88.1, "hip_angle": 98.7})
+    assert generate_prompt_from_pose(a) == generate_prompt_from_pose(b)
+    assert "knee 90" in generate_prompt_from_pose(a) and "Reps: 3" in generate_prompt_from_pose(a)
+
+
+def test_angles_then_faults_are_dropped_to_fit():
+    pose = {"exercise": "squat", "angles": {f"joint_{i}_angle": 90 for i in range(30)},
+            "faults": ["knees cave in", "heels lift"]}
+    prompt = generate_prompt_from_pose(pose)
+    assert estimate_tokens(prompt) <= PROMPT_TOKEN_BUDGET
+    assert prompt.endswith("Give one short corrective cue (1-2 sentences).")
+
+
+@pytest.mark.parametrize("field", ["exercise", "phase"])
+def test_over_long_head_fields_stay_within_budget(field):
+    pose = {"exercise": "squat", field: "very long " * 2000, "counter": 1}
+    summary = summarize_pose(pose)
+    assert len(summary[field]) <= MAX_FIELD_CHARS
+    prompt = generate_prompt_from_pose(pose)
+    assert estimate_tokens(prompt) <= PROMPT_TOKEN_BUDGET
+    assert prompt.endswith("Give one short corrective cue (1-2 sentences).")
+
+
+@pytest.mark.parametrize("max_tokens", [5, 12, 20, 40])
+def test_budget_is_a_hard_limit(max_tokens):
+    features = {"exercise": "x" * 500, "phase": "y" * 500, "reps": 10 ** 30, "angles": {}, "faults": []}
+    assert estimate_tokens(build_prompt(features, max_tokens)) <= max_tokens
+
+
+def test_reps_must_be_numeric():
+    assert summarize_pose({"reps": "12"})["reps"] == 12
+    assert summarize_pose({"reps": "a lot " * 100})["reps"] is None
+    assert summarize_pose({"counter": float("nan")})["reps"] is None
@@ -0,0 +1,199 @@
+# test_single_flight.py
+# -----------------------------
+# SingleFlight: in-process leader/follower coalescing and, through a shared
+# SQLite cache, host-wide leases (two caches on one file stand in for two
+# worker processes).
+
+import threading
+import time
+
+import pytest
+
+from feedback_cache import FeedbackCache
+from single_flight import SingleFlight
+
+
+def run(target):
+    outcome = {}
+
+    def wrapper():
+        try:
+            outcome["value"] = target()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=wrapper)
+    thread.start()
+    return thread, outcome
+
+
+def wait_for(condition, timeout=5.0):
+    done = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        done.wait(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_followers_share_the_leader_result():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "cue"
+
+    leader, leader_outcome = run(lambda: flights.do("k", fetch))
+    wait_for(lambda: flights.stats()["in_flight"] == 1)
+    followers = [run(lambda: flights.do("k", fetch)) for _ in range(4)]
+    wait_for(lambda: flights.stats()["coalesced"] == 4)
+    release.set()
+    for thread, _ in [(leader, leader_outcome)] + followers:
+        thread.join()
+
+    assert len(calls) == 1
+    assert leader_outcome["value"] == "cue" and all(o["value"] == "cue" for _, o in followers)
+    assert flights.stats()["in_flight"] == 0 and flights.stats()["upstream"] == 1
+
+
+def test_leader_error_reaches_followers_and_is_not_kept():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    leader, leader_outcome = run(lambda: flights.do("k", fetch))
+    wait_for(lambda: flights.stats()["in_flight"] == 1)
+    follower, follower_outcome = run(lambda: flights.do("k", fetch))
+    wait_for(lambda: flights.stats()["coalesced"] == 1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert str(leader_outcome["error"]) == str(follower_outcome["error"]) == "upstream down"
+    assert flights.stats()["failed"] == 1
+    # The failure is not cached: the next call goes upstream again
+    assert flights.do("k", lambda: "recovered") == "recovered"
+
+
+def test_different_keys_do_not_coalesce():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: 1) == 1 and flights.do("b", lambda: 2) == 2
+    assert flights.stats()["upstream"] == 2 and flights.stats()["coalesced"] == 0
+
+
+def refusals(cache):
+    """Count the claims `cache` loses to another owner's lease."""
+    refused = []
+    claim = cache.claim
+
+    def counting_claim(*args):
+        won = claim(*args)
+        if not won:
+            refused.append(args[0])
+        return won
+
+    cache.claim = counting_claim
+    return refused
+
+
+@pytest.fixture
+def caches(tmp_path):
+    path = str(tmp_path / "feedback.sqlite")
+    first, second = FeedbackCache(db_path=path), FeedbackCache(db_path=path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_other_worker_waits_for_the_shared_result(caches):
+    cache_a, cache_b = caches
+    worker_a = SingleFlight(cache_a, lease=5.0, poll_interval=0.01)
+    worker_b = SingleFlight(cache_b, lease=5.0, poll_interval=0.01)
+    release = threading.Event()
+
+    def fetch_a():
+        release.wait(5)
+        cache_a.put("k", "cue")
+        return "cue"
+
+    refused = refusals(cache_b)
+    leader, leader_outcome = run(lambda: worker_a.do("k", fetch_a))
+    wait_for(lambda: worker_a.stats()["upstream"] == 1)
+    waiter, waiter_outcome = run(lambda: worker_b.do("k", lambda: pytest.fail("second upstream call")))
+    wait_for(lambda: refused)
+    release.set()
+    leader.join()
+    waiter.join()
+
+    assert leader_outcome["value"] == waiter_outcome["value"] == "cue"
+    assert worker_b.stats()["coalesced_remote"] == 1 and worker_b.stats()["upstream"] == 0
+
+
+def test_lapsed_lease_is_taken_over(caches):
+    cache_a, cache_b = caches
+    # A worker that died holding the lease
+    assert cache_a.claim("k", "dead-worker", 0.2)
+    worker_b = SingleFlight(cache_b, lease=5.0, poll_interval=0.02)
+    assert worker_b.do("k", lambda: "fresh") == "fresh"
+    assert worker_b.stats()["takeovers"] == 1 and worker_b.stats()["upstream"] == 1
+    # The new owner released its lease when done
+    assert cache_a.claim("k", "next", 5.0)
+
+
+def test_failed_leader_releases_the_lease_to_other_workers(caches):
+    cache_a, cache_b = caches
+    worker_a = SingleFlight(cache_a, lease=5.0, poll_interval=0.01)
+    worker_b = SingleFlight(cache_b, lease=5.0, poll_interval=0.01)
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    refused = refusals(cache_b)
+    leader, leader_outcome = run(lambda: worker_a.do("k", failing))
+    wait_for(lambda: worker_a.stats()["upstream"] == 1)
+    waiter, waiter_outcome = run(lambda: worker_b.do("k", lambda: "second try"))
+    wait_for(lambda: refused)
+    release.set()
+    leader.join()
+    waiter.join()
+
+    # The other worker cannot see the exception; it retries once the lease is free
+    assert isinstance(leader_outcome["error"], RuntimeError)
+    assert waiter_outcome["value"] == "second try"
+    assert worker_b.stats()["takeovers"] == 1
+
+
+def test_leader_rechecks_the_cache():
+    # The previous flight stored its result after this caller's cache miss
+    cache = FeedbackCache()
+    flights = SingleFlight(cache)
+    cache.put("k", "cue")
+    assert flights.do("k", lambda: pytest.fail("second upstream call")) == "cue"
+    assert flights.stats()["late_hits"] == 1 and flights.stats()["upstream"] == 0
+
+
+def test_follower_stops_waiting_for_a_stuck_leader():
+    flights = SingleFlight(wait=0.1)
+    release = threading.Event()
+
+    def stuck():
+        release.wait(5)
+        return "late"
+
+    leader, leader_outcome = run(lambda: flights.do("k", stuck))
+    wait_for(lambda: flights.stats()["in_flight"] == 1)
+    start = time.monotonic()
+    assert flights.do("k", lambda: "own call") == "own call"
+    assert time.monotonic() - start < 2
+    release.set()
+    leader.join()
+    assert leader_outcome["value"] == "late"
+    assert flights.stats()["wait_timeouts"] == 1 and flights.stats()["upstream"] == 2
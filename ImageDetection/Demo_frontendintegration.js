@@ -2,25 +2,124 @@
 import React, { useRef, useState, useEffect } from 'react';
 import './MobileApp.css';
 
-function MobileApp() {
+// One id per browser tab, so the server keeps this patient's rep counter separate
+const getSessionId = () => {
+  let id = sessionStorage.getItem('exerciseSessionId');
+  if (!id) {
+    id = crypto.randomUUID();
+    sessionStorage.setItem('exerciseSessionId', id);
+  }
+  return id;
+};
+
+// How often the capture profile is refetched while the camera runs
+const PROFILE_REFRESH_MS = 5000;
+
+function MobileApp({ exercise = 'squat' }) {
   const videoRef = useRef(null);
   const canvasRef = useRef(null);
+  const captureCanvasRef = useRef(null);
+  const captureProfileRef = useRef(null);
+  const sendTimerRef = useRef(null);
+  const profileTimerRef = useRef(null);
+  const pausedUntilRef = useRef(0);
+  const sendingRef = useRef(false);
   const [cameraActive, setCameraActive] = useState(false);
   const [hasPermission, setHasPermission] = useState(null);
   const [feedbackText, setFeedbackText] = useState('');
 
+  // Ask the server what to capture at (resolution, JPEG quality, fps) for its current load
+  const fetchCaptureProfile = async () => {
+    try {
+      const response = await fetch('/api/capture_profile');
+      return response.ok ? await response.json() : null;
+    } catch (err) {
+      return null;
+    }
+  };
+
+  // Switch to a capture profile: JPEG quality, send rate and camera constraints
+  const applyCaptureProfile = async (profile) => {
+    // Also ignores a refresh that lands after stopCamera()
+    if (!profile || !videoRef.current?.srcObject) return;
+    const previous = captureProfileRef.current;
+    captureProfileRef.current = profile;
+    if (previous && previous.fps === profile.fps && previous.width === profile.width
+        && previous.height === profile.height) return;
+    clearInterval(sendTimerRef.current);
+    sendTimerRef.current = setInterval(sendFrame, 1000 / profile.fps);
+    const track = videoRef.current?.srcObject?.getVideoTracks()[0];
+    if (track) {
+      try {
+        await track.applyConstraints({
+          width: { ideal: profile.width },
+          height: { ideal: profile.height },
+          frameRate: { ideal: profile.fps, max: profile.fps },
+        });
+      } catch (err) {
+        console.error("Error applying capture profile: ", err);
+      }
+    }
+  };
+
+  const refreshCaptureProfile = async () => applyCaptureProfile(await fetchCaptureProfile());
+
+  // Grab the current video frame as a JPEG (at the profile's quality) and send it; skipped while one is in flight
+  const sendFrame = async () => {
+    const video = videoRef.current;
+    if (!video || !video.videoWidth || sendingRef.current || Date.now() < pausedUntilRef.current) return;
+    sendingRef.current = true;
+    try {
+      const canvas = captureCanvasRef.current || (captureCanvasRef.current = document.createElement('canvas'));
+      canvas.width = video.videoWidth;
+      canvas.height = video.videoHeight;
+      canvas.getContext('2d').drawImage(video, 0, 0);
+      const quality = captureProfileRef.current?.jpeg_quality ?? 0.8;
+      const frame = await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', quality));
+      const response = await fetch(`/api/frames/${exercise}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'image/jpeg', 'X-Session-ID': getSessionId() },
+        body: frame,
+      });
+      if (response.status === 503) {
+        // Server busy: back off for Retry-After, then continue at its current (lighter) profile
+        const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+        pausedUntilRef.current = Date.now() + retryAfter * 1000;
+        refreshCaptureProfile();
+      }
+      const result = await response.json();
+      setFeedbackText(response.ok ? `Reps: ${result.counter}  ${result.feedback}` : result.error);
+    } catch (err) {
+      console.error("Error sending frame: ", err);
+    } finally {
+      sendingRef.current = false;
+    }
+  };
+
   // Request camera permission and start stream
   const startCamera = async () => {
     try {
-      const stream = await navigator.mediaDevices.getUserMedia({
-        video: { facingMode: 'user' }
-      });
-      
+      const profile = await fetchCaptureProfile();
+      const video = { facingMode: 'user' };
+      if (profile) {
+        video.width = { ideal: profile.width };
+        video.height = { ideal: profile.height };
+        video.frameRate = { ideal: profile.fps, max: profile.fps };
+      }
+      const stream = await navigator.mediaDevices.getUserMedia({ video });
+
       if (videoRef.current) {
         videoRef.current.srcObject = stream;
         setCameraActive(true);
         setHasPermission(true);
         setFeedbackText('Camera started! Exercise tracking active.');
+        if (profile) {
+          applyCaptureProfile(profile);
+        } else {
+          sendTimerRef.current = setInterval(sendFrame, 100);
+        }
+        // Server load changes while the camera runs; follow its recommendation
+        profileTimerRef.current = setInterval(refreshCaptureProfile, PROFILE_REFRESH_MS);
       }
     } catch (err) {
       console.error("Error accessing camera: ", err);
@@ -31,6 +130,9 @@ function MobileApp() {
 
   // Stop the camera stream
   const stopCamera = () => {
+    clearInterval(sendTimerRef.current);
+    clearInterval(profileTimerRef.current);
+    captureProfileRef.current = null;
     if (videoRef.current && videoRef.current.srcObject) {
       const tracks = videoRef.current.srcObject.getTracks();
       tracks.forEach(track => track.stop());
@@ -43,6 +145,8 @@ function MobileApp() {
   // Clean up on component unmount
   useEffect(() => {
     return () => {
+      clearInterval(sendTimerRef.current);
+      clearInterval(profileTimerRef.current);
       if (videoRef.current && videoRef.current.srcObject) {
         const tracks = videoRef.current.srcObject.getTracks();
         tracks.forEach(track => track.stop());
@@ -53,7 +157,7 @@ function MobileApp() {
   return (
     <div className="mobile-app">
       <h1>Exercise Tracker</h1>
-      
+
       <div className="video-container">
         <video
           ref={videoRef}
@@ -87,4 +191,4 @@ function MobileApp() {
   );
 }
 
-export default MobileApp;
\ No newline at end of file
+export default MobileApp;
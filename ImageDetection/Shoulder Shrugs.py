@@ -6,9 +6,14 @@
 
 import cv2
 import mediapipe as mp
-import numpy as np
 from IPython.display import display
 import ipywidgets as widgets
+from exercises import ShoulderShrugCounter
+from landmarks import LandmarkBuffer
+from pipeline import PipelineRunner
+from roi import RoiInference
+from pose_backends import create_backend
+from overlay import StaticLayer
 
 # Initialize UI
 camera_active = True
@@ -53,55 +58,16 @@ def draw_rounded_rectangle(img, top_left, bottom_right, radius, color, thickness
 # Shoulder Shrug Tracker Class
 class ShoulderShrugTracker:
     def __init__(self):
-        self.counter = 0
-        self.stage = None
-        self.feedback = "Initializing..."
-        self.baseline_left_y = 0
-        self.baseline_right_y = 0
-        self.baseline_set = False
-        self.calibration_frames = 0
-        self.calibration_sum_left = 0
-        self.calibration_sum_right = 0
-        self.shrug_threshold = 0.015
+        self.shrugs = ShoulderShrugCounter()
         self.cap = cv2.VideoCapture(0)
+        self.landmarks = LandmarkBuffer()
+        self.instruction_layer = StaticLayer(self.draw_instruction_panel)
+        self.counter_layer = StaticLayer(self.draw_counter_panel)
 
-    def calibrate(self, l_shoulder_y, r_shoulder_y):
-        self.calibration_sum_left += l_shoulder_y
-        self.calibration_sum_right += r_shoulder_y
-        self.calibration_frames += 1
-        self.feedback = f"Calibrating... {self.calibration_frames}/30"
-        if self.calibration_frames >= 30:
-            self.baseline_left_y = self.calibration_sum_left / self.calibration_frames
-            self.baseline_right_y = self.calibration_sum_right / self.calibration_frames
-            self.baseline_set = True
-            self.feedback = "Ready. Shrug your shoulders!"
-
-    def update_shrug_state(self, l_y, r_y):
-        avg_delta = (l_y - self.baseline_left_y + r_y - self.baseline_right_y) / 2
-        if UI_CONFIG["debug"]:
-            print(f"L: {l_y:.4f}, R: {r_y:.4f}, Avg delta: {avg_delta:.4f}")
-
-        if avg_delta < -self.shrug_threshold and (self.stage == 'down' or self.stage is None):
-            self.stage = 'up'
-            self.feedback = "Shoulders up - good!"
-        elif avg_delta > -0.005 and self.stage == 'up':
-            self.stage = 'down'
-            self.counter += 1
-            self.feedback = "Rep counted!"
-        elif self.stage is None:
-            self.stage = 'down'
-            self.feedback = "Ready to start"
-
-        if self.stage == 'up':
-            shoulder_gauge = max(0, min(100, -avg_delta / (self.shrug_threshold * 3) * 100))
-            self.feedback = f"Hold shrug: {int(shoulder_gauge)}%"
-        elif self.stage == 'down' and self.counter > 0:
-            self.feedback = "Return to rest position"
-
-    def render_ui(self, image, h, w):
+    def draw_instruction_panel(self, image):
+        h, w, _ = image.shape
         top_x = (w - UI_CONFIG["panel_width"]) // 2
         top_y = 20
-        bot_y = h - UI_CONFIG["panel_height"] - 20
 
         overlay = image.copy()
         draw_rounded_rectangle(
@@ -125,7 +91,11 @@ class ShoulderShrugTracker:
             cv2.putText(image, text, (top_x + 20, top_y + 60 + 22 * i),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.45, UI_CONFIG["text_color"], 1)
 
-        # Bottom counter panel
+    def draw_counter_panel(self, image):
+        h, w, _ = image.shape
+        top_x = (w - UI_CONFIG["panel_width"]) // 2
+        bot_y = h - UI_CONFIG["panel_height"] - 20
+
         bot_overlay = image.copy()
         draw_rounded_rectangle(
             bot_overlay,
@@ -134,49 +104,52 @@ class ShoulderShrugTracker:
             UI_CONFIG["corner_radius"],
             UI_CONFIG["bg_color"]
         )
+        alpha = 0.8
         cv2.addWeighted(bot_overlay, alpha, image, 1 - alpha, 0, image)
         cv2.putText(image, "SHOULDER SHRUGS", (top_x + 90, bot_y + 25),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, UI_CONFIG["text_color"], 1)
-        cv2.putText(image, str(self.counter), (top_x + 160, bot_y + 60),
+
+    def render_ui(self, image, h, w):
+        top_x = (w - UI_CONFIG["panel_width"]) // 2
+        bot_y = h - UI_CONFIG["panel_height"] - 20
+
+        # Static panels come from the layer cache; only counter and feedback change
+        self.instruction_layer.blend(image)
+        self.counter_layer.blend(image)
+        cv2.putText(image, str(self.shrugs.counter), (top_x + 160, bot_y + 60),
                     cv2.FONT_HERSHEY_SIMPLEX, 1.2, UI_CONFIG["text_color"], 2)
-        cv2.putText(image, self.feedback, (top_x + 20, bot_y + 85),
+        cv2.putText(image, self.shrugs.feedback, (top_x + 20, bot_y + 85),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, UI_CONFIG["accent_color"], 1)
 
+    def render_frame(self, image, results):
+        try:
+            if not self.landmarks.update(results):
+                raise ValueError("No pose detected")
+            result = self.shrugs.update(self.landmarks.data)
+            metrics = result["metrics"]
+            if UI_CONFIG["debug"] and metrics["avg_delta"] is not None:
+                print(f"L: {metrics['left_shoulder_y']:.4f}, R: {metrics['right_shoulder_y']:.4f}, "
+                      f"Avg delta: {metrics['avg_delta']:.4f}")
+
+            h, w, _ = image.shape
+            self.render_ui(image, h, w)
+
+        except Exception as e:
+            if UI_CONFIG["debug"]:
+                print(f"Exception: {e}")
+
+        cv2.imshow("Shoulder Shrug Tracker", image)
+        return camera_active and (cv2.waitKey(1) & 0xFF) != ord('q')
+
     def run(self):
-        with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
-            while self.cap.isOpened() and camera_active:
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("Failed to grab frame")
-                    break
-
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False
-                results = pose.process(image)
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-                try:
-                    landmarks = results.pose_landmarks.landmark
-                    l_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-                    r_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-                    l_y, r_y = l_shoulder.y, r_shoulder.y
-
-                    if not self.baseline_set:
-                        self.calibrate(l_y, r_y)
-                    else:
-                        self.update_shrug_state(l_y, r_y)
-
-                    h, w, _ = image.shape
-                    self.render_ui(image, h, w)
-
-                except Exception as e:
-                    if UI_CONFIG["debug"]:
-                        print(f"Exception: {e}")
-
-                cv2.imshow("Shoulder Shrug Tracker", image)
-                if cv2.waitKey(10) & 0xFF == ord('q'):
-                    break
+        with create_backend(exercise="shoulder_shrugs") as pose:
+            if self.cap.isOpened():
+                # Fixed-size crop around the body instead of the whole frame
+                roi_inference = RoiInference(pose)
+                runner = PipelineRunner(self.cap, roi_inference, self.render_frame)
+                runner.run()
+                runner.report()
+                roi_inference.report()
 
             self.cap.release()
             cv2.destroyAllWindows()
@@ -1,9 +1,9 @@
 # continuous_posture_analysis.py
 import cv2
 import base64
-import requests
 import time
 import os
+import sys
 import threading
 import numpy as np
 from io import BytesIO
@@ -17,6 +17,13 @@ tts_engine = pyttsx3.init()
 # Your Groq API key (store in environment variable for security)
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY', 'your_groq_api_key_here')
 
+# Shared LLM client (pooled keep-alive session, timeouts, retries) from the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Backend'))
+from llm_client import LLMClient, LLMError  # noqa: E402
+
+llm_client = LLMClient("https://api.groq.com/openai/v1/chat/completions", GROQ_API_KEY,
+                       model="llama3-70b-8192", read_timeout=20.0)
+
 class PostureAnalyzer:
     def __init__(self, exercise_id='default', analysis_interval=5):
         self.exercise_id = exercise_id
@@ -52,6 +59,7 @@ class PostureAnalyzer:
         if self.feedback_thread:
             self.feedback_thread.join(timeout=2)
             
+        print(f"Groq API calls: {llm_client.stats()}")
         print("Posture analysis stopped")
         
     def _analyze_frame(self, frame):
@@ -64,11 +72,6 @@ class PostureAnalyzer:
             # Convert to base64
             img_base64 = base64.b64encode(img_bytes).decode('utf-8')
             
-            headers = {
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            
             # Create prompt for posture analysis
             prompt = f"""
             You are a professional fitness trainer analyzing the posture for {self.exercise_id} exercise.
@@ -76,32 +79,18 @@ class PostureAnalyzer:
             Focus on the most important issue you can see.
             """
             
-            data = {
-                "model": "llama3-70b-8192",  # Or whatever Groq model you're using
-                "messages": [
-                    {"role": "system", "content": "You are a helpful fitness posture analyst."},
-                    {"role": "user", "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_base64}"}}
-                    ]}
-                ],
-                "temperature": 0.2,
-                "max_tokens": 100
-            }
+            messages = [
+                {"role": "system", "content": "You are a helpful fitness posture analyst."},
+                {"role": "user", "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_base64}"}}
+                ]}
+            ]
             
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=data
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                analysis = result['choices'][0]['message']['content']
-                return analysis
-            else:
-                print(f"Error from Groq API: {response.status_code} - {response.text}")
-                return None
+            return llm_client.chat(messages, temperature=0.2, max_tokens=100)
+        except LLMError as e:
+            print(f"Error from Groq API: {e}")
+            return None
         except Exception as e:
             print(f"Error analyzing frame: {str(e)}")
             return None
@@ -0,0 +1,204 @@
+# batch_analysis.py
+# -----------------------------
+# Headless batch analysis of recorded exercise videos.
+# Video files are spread over a process pool with one MediaPipe Pose per
+# worker; every frame goes through the exercise's counter from exercises.py
+# and each video gets a per-frame table (angles, stage, reps) and an event
+# table (stage transitions, rep completions) written as CSV or Parquet.
+#
+# Usage:
+#   python batch_analysis.py squat uploads/*.mp4 --out results --workers 8
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from exercises import COUNTERS, create_counter
+from frame_buffers import RGBBuffer
+from landmarks import LandmarkBuffer
+from pose_backends import MediaPipeBackend
+
+FRAME_COLUMNS = ("frame", "time_s", "detected", "counter", "stage", "gauge", "feedback")
+EVENT_COLUMNS = ("frame", "time_s", "event", "stage", "counter")
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Headless batch analysis of exercise videos')
+    parser.add_argument('exercise', choices=sorted(COUNTERS), help='Exercise to analyze')
+    parser.add_argument('videos', nargs='+', help='Video files to process')
+    parser.add_argument('--out', default='analysis', help='Output directory')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='Output table format')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: all cores)')
+    parser.add_argument('--model-complexity', type=int, default=1, choices=[0, 1, 2], help='MediaPipe Pose model complexity')
+    return parser.parse_args()
+
+
+def _init_worker(model_complexity):
+    """Create the worker's single Pose instance."""
+    # One process per core; keep OpenCV from spawning its own thread pool on top
+    cv2.setNumThreads(1)
+    _worker["pose"] = MediaPipeBackend(model_complexity=model_complexity)
+
+
+def analyze_video(path, exercise, pose):
+    """Run one video through `pose` and the exercise counter.
+
+    Returns (frame_rows, event_rows, fps) where rows are dicts keyed by
+    FRAME_COLUMNS plus the counter's METRICS, and by EVENT_COLUMNS.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    counter = create_counter(exercise)
+    landmarks = LandmarkBuffer()
+    rgb = RGBBuffer()
+    frame_rows, event_rows = [], []
+    frame = None
+    index = 0
+    last_stage, last_count = None, 0
+    try:
+        while True:
+            ret, frame = cap.read(frame) if frame is not None else cap.read()
+            if not ret:
+                break
+            detected = landmarks.update(pose.process(rgb.convert(frame)))
+            result = counter.update(landmarks.data if detected else None)
+            time_s = index / fps
+
+            row = {
+                "frame": index,
+                "time_s": time_s,
+                "detected": detected,
+                "counter": result["counter"],
+                "stage": result["stage"],
+                "gauge": result["gauge"],
+                "feedback": result["feedback"],
+            }
+            row.update(result["metrics"])
+            frame_rows.append(row)
+
+            if result["stage"] != last_stage:
+                event_rows.append({"frame": index, "time_s": time_s, "event": "stage",
+                                   "stage": result["stage"], "counter": result["counter"]})
+                last_stage = result["stage"]
+            if result["counter"] != last_count:
+                event_rows.append({"frame": index, "time_s": time_s, "event": "rep",
+                                   "stage": result["stage"], "counter": result["counter"]})
+                last_count = result["counter"]
+            index += 1
+    finally:
+        cap.release()
+    return frame_rows, event_rows, fps
+
+
+def write_table(rows, columns, path, fmt):
+    """Write dict rows to `path` as CSV or Parquet."""
+    if fmt == "parquet":
+        try:
+            import pandas as pd
+        except ImportError:
+            raise RuntimeError("Parquet output needs pandas and pyarrow: pip install pandas pyarrow") from None
+        pd.DataFrame(rows, columns=columns).to_parquet(path, index=False)
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def output_stems(paths):
+    """Output file stem per video: its basename, suffixed -2, -3, ... where that name is taken.
+
+    Videos with the same name in different directories (or listed twice)
+    would otherwise overwrite each other's tables.
+    """
+    stems, taken = [], set()
+    for path in paths:
+        base = os.path.splitext(os.path.basename(path))[0]
+        stem, n = base, 1
+        while stem.lower() in taken:
+            n += 1
+            stem = f"{base}-{n}"
+        taken.add(stem.lower())
+        stems.append(stem)
+    return stems
+
+
+def _process_file(path, stem, exercise, out_dir, fmt):
+    """Worker task: analyze one video and write its tables as `stem`.frames/.events."""
+    pose = _worker["pose"]
+    # New video, so drop the tracking state left over from the previous one
+    pose.reset()
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    frame_rows, event_rows, fps = analyze_video(path, exercise, pose)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    metrics = COUNTERS[exercise].METRICS
+    write_table(frame_rows, FRAME_COLUMNS + metrics, os.path.join(out_dir, f"{stem}.frames.{fmt}"), fmt)
+    write_table(event_rows, EVENT_COLUMNS, os.path.join(out_dir, f"{stem}.events.{fmt}"), fmt)
+
+    return {
+        "path": path,
+        "output": stem,
+        "frames": len(frame_rows),
+        "reps": frame_rows[-1]["counter"] if frame_rows else 0,
+        "video_fps": fps,
+        "wall_s": wall,
+        "cpu_s": cpu,
+    }
+
+
+def run_batch(exercise, videos, out_dir, fmt="csv", workers=None, model_complexity=1):
+    """Analyze `videos` on a pool of `workers` processes and return per-file summaries."""
+    workers = max(1, min(workers or os.cpu_count(), len(videos)))
+    os.makedirs(out_dir, exist_ok=True)
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_complexity,)) as pool:
+        futures = {pool.submit(_process_file, path, stem, exercise, out_dir, fmt): path
+                   for path, stem in zip(videos, output_stems(videos))}
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"Error processing {futures[future]}: {e}")
+                continue
+            summaries.append(summary)
+            print(f"{summary['path']}: {summary['frames']} frames, {summary['reps']} reps, "
+                  f"{summary['frames'] / max(summary['wall_s'], 1e-9):.1f} fps")
+    return summaries
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    summaries = run_batch(args.exercise, args.videos, args.out, args.format,
+                          args.workers, args.model_complexity)
+    elapsed = time.perf_counter() - start
+
+    workers = max(1, min(args.workers or os.cpu_count(), len(args.videos)))
+    frames = sum(s["frames"] for s in summaries)
+    cpu = sum(s["cpu_s"] for s in summaries)
+    print("\nBatch summary:")
+    print(f"  {len(summaries)}/{len(args.videos)} videos, {frames} frames in {elapsed:.1f} s on {workers} workers")
+    print(f"  Throughput: {frames / max(elapsed, 1e-9):.1f} fps total, "
+          f"{frames / max(elapsed * workers, 1e-9):.1f} fps per core")
+    if cpu:
+        print(f"  CPU cost: {frames / cpu:.1f} frames per CPU-second")
+
+
+if __name__ == "__main__":
+    main()
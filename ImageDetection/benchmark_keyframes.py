@@ -0,0 +1,95 @@
+# benchmark_keyframes.py
+# -----------------------------
+# Benchmark of keyframe inference against full per-frame inference.
+# Each recorded clip is run twice through MediaPipe Pose and the exercise's
+# counter: once with inference on every frame and once through the
+# KeyframeScheduler. Reports CPU time per frame, the CPU saved, the rep
+# counts of both runs and the largest frame lag between matching reps.
+#
+# Usage:
+#   python benchmark_keyframes.py chin_tucks=tucks.mp4 pelvic_tilts=tilts.mp4 neck_rotations=neck.mp4
+
+import argparse
+import time
+
+import cv2
+
+from exercises import create_counter
+from keyframes import KeyframeScheduler
+from landmarks import LandmarkBuffer
+from pipeline import pose_inference
+from pose_backends import MediaPipeBackend
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Keyframe inference benchmark')
+    parser.add_argument('clips', nargs='+', metavar='EXERCISE=VIDEO', help='Exercise id and recorded clip')
+    parser.add_argument('--max-interval', type=int, default=4, help='Longest keyframe interval in frames')
+    return parser.parse_args()
+
+
+def read_frames(path):
+    """Load a clip into memory so decoding is not part of the measurement."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise IOError(f"Could not read any frames from {path}")
+    return frames
+
+
+def run(frames, exercise, scheduled, max_interval):
+    """Count reps over `frames`; returns (cpu seconds, rep frame indices, scheduler)."""
+    counter = create_counter(exercise)
+    landmarks = LandmarkBuffer()
+    with MediaPipeBackend() as pose:
+        infer = pose_inference(pose)
+        scheduler = KeyframeScheduler(infer, max_interval=max_interval) if scheduled else None
+        step = scheduler or infer
+        rep_frames = []
+        cpu_start = time.process_time()
+        for index, frame in enumerate(frames):
+            detected = landmarks.update(step(frame))
+            before = counter.counter
+            counter.update(landmarks.data if detected else None)
+            if counter.counter != before:
+                rep_frames.append(index)
+        cpu = time.process_time() - cpu_start
+    return cpu, rep_frames, scheduler
+
+
+def rep_lag(full_reps, key_reps):
+    """Largest shift in frames between matching reps, or '-' if the counts differ."""
+    if len(full_reps) != len(key_reps):
+        return "-"
+    return max((abs(a - b) for a, b in zip(full_reps, key_reps)), default=0)
+
+
+def main():
+    args = parse_args()
+    print(f"{'exercise':<16}{'frames':>8}{'full ms':>10}{'key ms':>10}{'saved':>8}"
+          f"{'keyframes':>11}{'reps':>10}{'lag':>6}")
+    for clip in args.clips:
+        exercise, _, path = clip.partition('=')
+        frames = read_frames(path)
+        full_cpu, full_reps, _ = run(frames, exercise, False, args.max_interval)
+        key_cpu, key_reps, scheduler = run(frames, exercise, True, args.max_interval)
+
+        n = len(frames)
+        saved = 1 - key_cpu / full_cpu if full_cpu else 0.0
+        print(f"{exercise:<16}{n:>8}{full_cpu * 1000 / n:>10.2f}{key_cpu * 1000 / n:>10.2f}"
+              f"{saved:>8.0%}{scheduler.keyframe_ratio:>11.0%}"
+              f"{f'{len(full_reps)}/{len(key_reps)}':>10}{rep_lag(full_reps, key_reps):>6}")
+        if len(full_reps) != len(key_reps):
+            print(f"  rep frames full: {full_reps}")
+            print(f"  rep frames key:  {key_reps}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmark_landmark_wire.py
+# -----------------------------
+# Round trip of a client-side landmark stream through the formats
+# /track-movement accepts: one JSON request per frame, JSON windows, and
+# binary landmark_wire windows (float16 and int16). For one patient streaming
+# at --fps it reports requests and bytes per second, client encode and
+# server decode + counter CPU per second of stream, and the largest
+# quantization error. HTTP overhead per request comes on top of the server
+# numbers, which is what the request rate column is for.
+#
+# Usage:
+#   python benchmark_landmark_wire.py --seconds 60 --window 0.5
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from exercises import create_counter
+from landmark_wire import decode_window, encode_window
+from pose_backends import SyntheticBackend
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Landmark upload formats: JSON vs binary windows')
+    parser.add_argument('--exercise', default='squat', help='Exercise trajectory to stream')
+    parser.add_argument('--seconds', type=float, default=60, help='Length of the stream')
+    parser.add_argument('--fps', type=float, default=30, help='Client frame rate')
+    parser.add_argument('--window', type=float, default=0.5, help='Window length in seconds for batched formats')
+    return parser.parse_args()
+
+
+def json_frames(frames, timestamps, args):
+    messages = [json.dumps({"exercise": args.exercise, "session_id": "p1", "t": float(t),
+                            "landmarks": lm.tolist()}) for lm, t in zip(frames, timestamps)]
+    decode = lambda m: [np.asarray(json.loads(m)["landmarks"], dtype=np.float32)]
+    return messages, decode
+
+
+def json_windows(frames, timestamps, args, size):
+    messages = [json.dumps({"exercise": args.exercise, "session_id": "p1",
+                            "t": timestamps[i:i + size].tolist(), "frames": frames[i:i + size].tolist()})
+                for i in range(0, len(frames), size)]
+    decode = lambda m: list(np.asarray(json.loads(m)["frames"], dtype=np.float32))
+    return messages, decode
+
+
+def binary_windows(frames, timestamps, size, encoding):
+    messages = [encode_window(frames[i:i + size], timestamps[i:i + size], encoding=encoding)
+                for i in range(0, len(frames), size)]
+    decode = lambda m: list(decode_window(m)[0])
+    return messages, decode
+
+
+def main():
+    args = parse_args()
+    count = int(args.seconds * args.fps)
+    backend = SyntheticBackend(args.exercise, fps=args.fps, noise=0.002)
+    frames = np.stack([backend.process().landmark_array for _ in range(count)])
+    timestamps = np.arange(count) / args.fps + time.time()
+    size = max(1, int(round(args.window * args.fps)))
+
+    formats = [
+        ("json per frame", lambda: json_frames(frames, timestamps, args)),
+        (f"json {size}-frame window", lambda: json_windows(frames, timestamps, args, size)),
+        (f"float16 {size}-frame window", lambda: binary_windows(frames, timestamps, size, "float16")),
+        (f"int16 {size}-frame window", lambda: binary_windows(frames, timestamps, size, "int16")),
+    ]
+
+    print(f"{args.seconds:.0f} s of {args.exercise} at {args.fps:.0f} fps, per patient:\n")
+    print(f"{'format':<26}{'req/s':>7}{'bytes/s':>10}{'encode us/s':>13}{'server us/s':>13}{'max err':>10}{'reps':>6}")
+    for name, build in formats:
+        start = time.perf_counter()
+        messages, decode = build()
+        encode_s = time.perf_counter() - start
+
+        counter = create_counter(args.exercise)
+        decoded = []
+        start = time.perf_counter()
+        for message in messages:
+            for lm in decode(message):
+                result = counter.update(lm)
+                decoded.append(lm)
+        server_s = time.perf_counter() - start
+
+        error = float(np.abs(np.stack(decoded) - frames).max())
+        size_total = sum(len(m) for m in messages)
+        print(f"{name:<26}{len(messages) / args.seconds:>7.1f}{size_total / args.seconds:>10.0f}"
+              f"{encode_s * 1e6 / args.seconds:>13.0f}{server_s * 1e6 / args.seconds:>13.0f}"
+              f"{error:>10.1e}{result['counter']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmark_overhead.py
+# -----------------------------
+# Per-frame pipeline overhead without the pose model.
+# Runs every exercise on the synthetic pose backend, so the numbers are the
+# cost of everything around inference: the counter state machine alone, and
+# ExerciseTracker.process_frame (RGB conversion, landmark copy, counter and
+# drawing) on blank frames. No camera or MediaPipe needed.
+#
+# Usage:
+#   python benchmark_overhead.py --frames 2000 --width 1280 --height 720
+
+import argparse
+import time
+
+import numpy as np
+
+from exercise_tracker import ExerciseTracker
+from pose_backends import SyntheticBackend
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Pipeline overhead benchmark (synthetic poses)')
+    parser.add_argument('--frames', type=int, default=2000, help='Frames per exercise')
+    parser.add_argument('--width', type=int, default=640, help='Frame width')
+    parser.add_argument('--height', type=int, default=480, help='Frame height')
+    parser.add_argument('--noise', type=float, default=0.002, help='Landmark jitter (normalized units)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    frame = np.zeros((args.height, args.width, 3), dtype=np.uint8)
+    print(f"{'exercise':<16}{'counter us':>12}{'frame us':>10}{'frame fps':>11}{'reps':>6}")
+    for exercise in SyntheticBackend.EXERCISES:
+        # Landmarks generated up front, so only the counter is timed
+        backend = SyntheticBackend(exercise, noise=args.noise)
+        poses = [backend.process().landmark_array for _ in range(args.frames)]
+        tracker = ExerciseTracker(exercise, pose=backend)
+        start = time.perf_counter()
+        for lm in poses:
+            tracker.update(lm)
+        counter_s = time.perf_counter() - start
+
+        backend.reset()
+        tracker = ExerciseTracker(exercise, pose=backend)
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            result = tracker.process_frame(frame)
+        frame_s = time.perf_counter() - start
+
+        print(f"{exercise:<16}{counter_s * 1e6 / args.frames:>12.1f}{frame_s * 1e6 / args.frames:>10.1f}"
+              f"{args.frames / frame_s:>11.0f}{result['counter']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmark_transport.py
+# -----------------------------
+# Side-by-side cost of the base64 JSON route (/api/process_frame) and the raw
+# binary route (/api/frames/<exercise>) of web-exercise-tracker.py, with the
+# annotated image in full, as a preview, every 5th frame or not at all.
+# Requests go through Flask's in-process test client, so the timings are
+# server work per frame (decode, tracker, encode, serialization) without
+# network noise; bytes up/down are the request and response bodies.
+# Uses the synthetic pose backend by default so model cost stays out of it.
+#
+# Usage:
+#   python benchmark_transport.py --frames 300
+#   python benchmark_transport.py --video demo.mp4 --backend mediapipe
+
+import argparse
+import base64
+import importlib.util
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from frame_transport import encode_image, unpack_envelope
+
+# Every request plays the same client session
+SESSION = {'X-Session-ID': 'benchmark'}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Frame transport benchmark: base64 JSON vs raw binary')
+    parser.add_argument('--exercise', default='squat', help='Exercise module to drive')
+    parser.add_argument('--frames', type=int, default=300, help='Requests per path')
+    parser.add_argument('--video', help='Take frames from this video instead of a generated one')
+    parser.add_argument('--width', type=int, default=640, help='Generated frame width')
+    parser.add_argument('--height', type=int, default=480, help='Generated frame height')
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality of uploaded frames')
+    parser.add_argument('--backend', default='synthetic', help='Pose backend ($POSE_BACKEND)')
+    return parser.parse_args()
+
+
+def load_app():
+    """Import web-exercise-tracker.py (not importable by name because of the hyphens)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web-exercise-tracker.py')
+    spec = importlib.util.spec_from_file_location('web_exercise_tracker', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def load_frames(args):
+    """Return a list of JPEG-encoded frames to upload."""
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        frames = []
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(encode_image(frame, 'jpeg', args.quality))
+        cap.release()
+        if not frames:
+            raise IOError(f"Could not read frames from {args.video}")
+        return frames
+    # Smooth gradients plus sensor-like noise compress roughly like a webcam frame
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:args.height, 0:args.width]
+    base = np.dstack([x * 255 // args.width, y * 255 // args.height, (x + y) * 127 // (args.width + args.height)])
+    frame = np.clip(base + rng.normal(0, 6, base.shape), 0, 255).astype(np.uint8)
+    return [encode_image(frame, 'jpeg', args.quality)]
+
+
+def run_path(client, name, frames, count, request):
+    """Send `count` frames through `request(client, jpeg)` and return a summary row."""
+    up = down = 0
+    start = time.perf_counter()
+    for i in range(count):
+        sent, response = request(client, frames[i % len(frames)])
+        if response.status_code != 200:
+            raise RuntimeError(f"{name}: HTTP {response.status_code} {response.get_data(as_text=True)}")
+        up += sent
+        down += len(response.get_data())
+    elapsed = time.perf_counter() - start
+    return name, elapsed * 1000 / count, up / count, down / count
+
+
+def main():
+    args = parse_args()
+    os.environ['POSE_BACKEND'] = args.backend
+    client = load_app().test_client()
+    frames = load_frames(args)
+    exercise = args.exercise
+
+    def json_base64(return_image='full'):
+        def request(client, jpeg):
+            body = json.dumps({'exercise': exercise, 'return_image': return_image,
+                               'image': 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')})
+            response = client.post('/api/process_frame', data=body, content_type='application/json',
+                                   headers=SESSION)
+            # A real client decodes the returned image too
+            image = response.get_json().get('image')
+            if image:
+                base64.b64decode(image.split(',', 1)[1])
+            return len(body), response
+        return request
+
+    def binary(query):
+        def request(client, jpeg):
+            response = client.post(f'/api/frames/{exercise}?{query}', data=jpeg, content_type='image/jpeg',
+                                   headers=SESSION)
+            if response.mimetype != 'application/json':
+                unpack_envelope(response.get_data())
+            return len(jpeg), response
+        return request
+
+    # Warm up: module import, counter calibration, encoder tables
+    for request in (json_base64(), binary('image=none')):
+        run_path(client, 'warmup', frames, 10, request)
+
+    rows = [run_path(client, 'json + base64 image', frames, args.frames, json_base64()),
+            run_path(client, 'json + base64 preview', frames, args.frames, json_base64('preview')),
+            run_path(client, 'json, no image', frames, args.frames, json_base64('none')),
+            run_path(client, 'binary, no image', frames, args.frames, binary('image=none')),
+            run_path(client, 'binary + jpeg image', frames, args.frames, binary('image=jpeg')),
+            run_path(client, 'binary + jpeg preview', frames, args.frames, binary('image=jpeg&preview=1')),
+            run_path(client, 'binary + jpeg every 5th', frames, args.frames, binary('image=jpeg&every=5')),
+            run_path(client, 'binary + webp image', frames, args.frames, binary('image=webp'))]
+
+    print(f"Uploaded frame: {len(frames[0]) / 1024:.1f} KiB JPEG, backend {args.backend}\n")
+    print(f"{'path':<25}{'ms/frame':>10}{'up KiB':>9}{'down KiB':>10}")
+    for name, ms, up, down in rows:
+        print(f"{name:<25}{ms:>10.2f}{up / 1024:>9.1f}{down / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmark_workers.py
+# -----------------------------
+# Throughput of the web app's two inference paths on one host:
+#   threads    in-process pose estimators (pose_pool.PosePool), one per thread
+#   processes  shm_workers.InferenceWorkerPool, frames through shared memory
+# Each client thread plays one session: decode a JPEG, pose estimation, the
+# exercise counter and drawing, like /api/frames. Run it with --clients and
+# --workers set to the core count to see how each path scales.
+#
+# Usage:
+#   python benchmark_workers.py --clients 8 --workers 8 --video demo.mp4
+#   python benchmark_workers.py --backend synthetic --frames 500
+
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from exercise_tracker import ExerciseTracker
+from frame_transport import decode_frame, encode_image
+from pose_backends import create_backend
+from pose_pool import PosePool
+from shm_workers import InferenceWorkerPool
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Threaded vs multi-process inference throughput')
+    parser.add_argument('--exercise', default='squat', help='Exercise to track')
+    parser.add_argument('--clients', type=int, default=os.cpu_count(), help='Concurrent sessions (threads)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Inference worker processes')
+    parser.add_argument('--frames', type=int, default=200, help='Frames per client')
+    parser.add_argument('--video', help='Take frames from this video instead of a blank one')
+    parser.add_argument('--backend', default='mediapipe', help='Pose backend (mediapipe or synthetic)')
+    return parser.parse_args()
+
+
+def load_frames(path, count):
+    """JPEG-encoded frames from a video, or one blank 640x480 frame."""
+    if not path:
+        return [encode_image(np.zeros((480, 640, 3), dtype=np.uint8))]
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(encode_image(frame))
+    cap.release()
+    if not frames:
+        raise IOError(f"Could not read frames from {path}")
+    return frames
+
+
+def run_clients(clients, frames, count, process):
+    """Run `clients` threads, each sending `count` frames through process(client, img); returns fps."""
+    def client(index):
+        for i in range(count):
+            process(index, decode_frame(frames[i % len(frames)]))
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return clients * count / (time.perf_counter() - start)
+
+
+def main():
+    args = parse_args()
+    frames = load_frames(args.video, args.frames)
+    kwargs = {'exercise': args.exercise} if args.backend == 'synthetic' else {}
+
+    # Threads: the current single-process path
+    pool = PosePool(lambda: create_backend(args.backend, **kwargs), size=args.clients)
+    pool.start()
+    trackers = [ExerciseTracker(args.exercise) for _ in range(args.clients)]
+
+    def threaded(index, img):
+        with pool.checkout(index) as pose:
+            trackers[index].process_frame(img, pose)
+
+    threaded_fps = run_clients(args.clients, frames, args.frames, threaded)
+    pool.close()
+
+    # Processes: shared-memory slots, landmarks back
+    trackers = [ExerciseTracker(args.exercise) for _ in range(args.clients)]
+    with InferenceWorkerPool(workers=args.workers, backend=args.backend, **kwargs) as workers:
+        # Worker start-up (imports, graph build) is not part of steady state
+        for index in range(args.clients):
+            workers.infer(decode_frame(frames[0]), owner=index)
+
+        def multiprocess(index, img):
+            trackers[index].process_result(img, workers.infer(img, owner=index))
+
+        process_fps = run_clients(args.clients, frames, args.frames, multiprocess)
+
+    print(f"{args.clients} clients x {args.frames} frames, backend {args.backend}, {os.cpu_count()} cores")
+    print(f"  threads ({args.clients} estimators):    {threaded_fps:8.1f} fps")
+    print(f"  processes ({args.workers} workers, shm): {process_fps:8.1f} fps  ({process_fps / threaded_fps:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# capture_profile.py
+# -----------------------------
+# Load-adaptive capture profile for clients uploading frames.
+# The server publishes the resolution, JPEG quality and frame rate clients
+# should capture at. LoadMonitor tracks how busy frame processing has been
+# over the last few seconds (busy time / (window x capacity)); as that
+# utilization rises, the recommended profile steps down so clients send
+# fewer, smaller frames before requests start queueing or failing. A frame
+# turned away for lack of a processor counts as every processor busy until
+# the client may retry; overlapping rejects extend that time instead of
+# stacking, so a burst of 503s does not read as minutes of saturation.
+
+import threading
+import time
+from collections import deque
+
+# From light to heavy load; each applies up to its utilization limit
+PROFILES = (
+    {"max_load": 0.5, "width": 640, "height": 480, "jpeg_quality": 0.8, "fps": 15},
+    {"max_load": 0.75, "width": 480, "height": 360, "jpeg_quality": 0.7, "fps": 12},
+    {"max_load": 0.9, "width": 480, "height": 360, "jpeg_quality": 0.6, "fps": 8},
+    {"max_load": None, "width": 320, "height": 240, "jpeg_quality": 0.6, "fps": 5},
+)
+
+
+class LoadMonitor:
+    """Busy-time utilization of `capacity` parallel frame processors over `window` seconds."""
+
+    def __init__(self, capacity, window=5.0, clock=time.monotonic):
+        self.capacity = capacity
+        self.window = window
+        self.clock = clock
+        self._spans = deque()
+        self._saturated_until = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def record(self, busy_s):
+        """Account one processed frame that kept a processor busy for `busy_s` seconds."""
+        now = self.clock()
+        with self._lock:
+            self._spans.append((now, busy_s))
+            self._prune(now)
+
+    def reject(self, retry_after=1.0):
+        """Account a frame turned away (pool exhausted): full load until the client retries.
+
+        Only the part of [now, now + retry_after] not already covered by an
+        earlier reject is added, weighted by `capacity`.
+        """
+        now = self.clock()
+        with self._lock:
+            self.rejected += 1
+            start = now if self._saturated_until is None else max(now, self._saturated_until)
+            self._saturated_until = max(start, now + retry_after)
+            self._spans.append((now, (self._saturated_until - start) * self.capacity))
+            self._prune(now)
+
+    def _prune(self, now):
+        # Spans older than the window; keeps the deque bounded without utilization() calls
+        while self._spans and now - self._spans[0][0] > self.window:
+            self._spans.popleft()
+
+    def utilization(self):
+        now = self.clock()
+        with self._lock:
+            self._prune(now)
+            busy = sum(span for _, span in self._spans)
+        return min(1.0, busy / (self.window * self.capacity))
+
+    def measure(self):
+        """Context manager timing one frame's processing (enter it once a processor is held)."""
+        return _Measure(self)
+
+
+class _Measure:
+    __slots__ = ("monitor", "start")
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.monitor.record(time.perf_counter() - self.start)
+
+
+def recommend(load):
+    """Capture profile for the current load (0..1), as a JSON-ready dict."""
+    for profile in PROFILES:
+        if profile["max_load"] is None or load <= profile["max_load"]:
+            break
+    result = {key: value for key, value in profile.items() if key != "max_load"}
+    result["load"] = round(load, 2)
+    return result
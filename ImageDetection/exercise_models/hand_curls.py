@@ -0,0 +1,9 @@
+# hand_curls.py
+# -----------------------------
+# Bicep (hand) curls tracker for web-exercise-tracker.py (logic in exercises.py).
+
+from exercise_tracker import ExerciseTracker as _ExerciseTracker
+
+
+class ExerciseTracker(_ExerciseTracker):
+    exercise = "hand_curls"
@@ -0,0 +1,9 @@
+# neck_rotations.py
+# -----------------------------
+# Neck rotations tracker for web-exercise-tracker.py (logic in exercises.py).
+
+from exercise_tracker import ExerciseTracker as _ExerciseTracker
+
+
+class ExerciseTracker(_ExerciseTracker):
+    exercise = "neck_rotations"
@@ -0,0 +1,9 @@
+# pelvic_tilts.py
+# -----------------------------
+# Pelvic tilts tracker for web-exercise-tracker.py (logic in exercises.py).
+
+from exercise_tracker import ExerciseTracker as _ExerciseTracker
+
+
+class ExerciseTracker(_ExerciseTracker):
+    exercise = "pelvic_tilts"
@@ -0,0 +1,9 @@
+# shoulder_shrugs.py
+# -----------------------------
+# Shoulder shrugs tracker for web-exercise-tracker.py (logic in exercises.py).
+
+from exercise_tracker import ExerciseTracker as _ExerciseTracker
+
+
+class ExerciseTracker(_ExerciseTracker):
+    exercise = "shoulder_shrugs"
@@ -0,0 +1,152 @@
+# exercise_registry.py
+# -----------------------------
+# Registry of the exercise modules in exercise_models/ for
+# web-exercise-tracker.py. The directory is scanned once and the listing is
+# served from memory; modules are imported once (at boot, in a background
+# thread, or on first use) and re-imported only when their file's mtime
+# changes. Each exercise has its own lock, so concurrent first requests for
+# the same exercise run a single import while other exercises stay
+# available.
+
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("name", "path", "lock", "mtime", "module", "tracker_class", "checked")
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.module = None
+        self.tracker_class = None
+        self.checked = 0.0
+
+
+class ExerciseRegistry:
+    """Exercise id -> ExerciseTracker class, loaded from `models_dir`/<id>.py.
+
+    File and directory mtimes are looked at most every `check_interval`
+    seconds, so a steady stream of frames costs no filesystem calls.
+    """
+
+    def __init__(self, models_dir, check_interval=2.0, clock=time.monotonic):
+        self.models_dir = models_dir
+        self.check_interval = check_interval
+        self.clock = clock
+        self._entries = {}
+        self._listing = []
+        self._dir_mtime = None
+        self._dir_checked = None
+        self._lock = threading.Lock()
+        self.imports = 0
+        self.reloads = 0
+        self.failures = 0
+
+    def _scan(self):
+        """Re-read the directory if it changed. Call with the registry lock held."""
+        now = self.clock()
+        if self._dir_checked is not None and now - self._dir_checked < self.check_interval:
+            return
+        self._dir_checked = now
+        try:
+            mtime = os.stat(self.models_dir).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._dir_mtime:
+            return
+        self._dir_mtime = mtime
+        names = []
+        if mtime is not None:
+            names = sorted(f[:-3] for f in os.listdir(self.models_dir)
+                           if f.endswith('.py') and not f.startswith('__'))
+        self._entries = {name: self._entries.get(name) or _Entry(name, os.path.join(self.models_dir, f"{name}.py"))
+                         for name in names}
+        self._listing = [{'id': name, 'name': name.replace('_', ' ').title()} for name in names]
+
+    def listing(self):
+        """Available exercises as [{'id', 'name'}], from memory."""
+        with self._lock:
+            self._scan()
+            return list(self._listing)
+
+    def get(self, name):
+        """Return the ExerciseTracker class for `name`, importing or reloading it if needed.
+
+        Raises KeyError for an unknown exercise and ImportError when the module
+        fails to import or has no ExerciseTracker class.
+        """
+        with self._lock:
+            self._scan()
+            entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(name)
+
+        now = self.clock()
+        if entry.tracker_class is not None and now - entry.checked < self.check_interval:
+            return entry.tracker_class
+        with entry.lock:
+            # Another request may have loaded it while this one waited
+            try:
+                mtime = os.stat(entry.path).st_mtime
+            except FileNotFoundError:
+                raise KeyError(name) from None
+            if entry.tracker_class is None or mtime != entry.mtime:
+                self._import(entry, mtime)
+            entry.checked = now
+            return entry.tracker_class
+
+    def _import(self, entry, mtime):
+        """Execute the module file; keeps the previous class if a reload fails."""
+        module_name = f"exercise_models.{entry.name}"
+        spec = importlib.util.spec_from_file_location(module_name, entry.path)
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+            tracker_class = getattr(module, 'ExerciseTracker', None)
+            if tracker_class is None:
+                raise ImportError(f"ExerciseTracker class not found in {entry.name} module")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Error loading exercise module {entry.name}: {e}")
+            if entry.tracker_class is None:
+                raise ImportError(str(e)) from e
+            # Broken edit of a loaded module: keep serving the last good version
+            entry.mtime = mtime
+            return
+        reloaded = entry.module is not None
+        # Published only after a successful exec, so no one sees a half-initialized module
+        sys.modules[module_name] = module
+        entry.module, entry.tracker_class, entry.mtime = module, tracker_class, mtime
+        if reloaded:
+            self.reloads += 1
+            logger.info(f"Reloaded exercise module: {entry.name}")
+        else:
+            self.imports += 1
+            logger.info(f"Successfully loaded module: {entry.name}")
+
+    def preload(self, background=False):
+        """Import every exercise module now, or in a daemon thread when `background`."""
+        if background:
+            thread = threading.Thread(target=self.preload, name="exercise-preload", daemon=True)
+            thread.start()
+            return thread
+        for item in self.listing():
+            try:
+                self.get(item['id'])
+            except (KeyError, ImportError):
+                pass
+
+    def stats(self):
+        with self._lock:
+            loaded = sum(e.tracker_class is not None for e in self._entries.values())
+            return {"exercises": len(self._entries), "loaded": loaded, "imports": self.imports,
+                    "reloads": self.reloads, "failures": self.failures}
@@ -0,0 +1,101 @@
+# exercise_tracker.py
+# -----------------------------
+# Frame-level adapter around the exercise counters in exercises.py.
+# ExerciseTracker is what web-exercise-tracker.py loads from exercise_models/:
+# process_frame(img) runs pose estimation on a BGR frame, advances the
+# exercise's state machine and optionally draws the result. The counter
+# itself never touches OpenCV or MediaPipe; update(landmarks) drives it
+# directly from a landmark array (replays, servers, tests).
+
+import cv2
+
+from exercises import create_counter
+from frame_buffers import to_rgb
+from landmarks import EXERCISE_LANDMARKS, LandmarkBuffer
+from pose_backends import create_backend
+
+TEXT_COLOR = (255, 255, 255)
+ACCENT_COLOR = (0, 200, 255)
+PROGRESS_COLOR = (0, 255, 200)
+
+
+def draw_result(image, exercise, result, landmarks=None):
+    """Draw the exercise landmarks, rep counter, feedback and gauge on a BGR frame."""
+    h, w = image.shape[:2]
+    if landmarks is not None and landmarks.valid:
+        for cx, cy in landmarks.pixels(EXERCISE_LANDMARKS[exercise], w, h).tolist():
+            cv2.circle(image, (cx, cy), 6, ACCENT_COLOR, -1)
+
+    # Bottom bar: reps and stage, feedback, and the gauge as a progress line
+    cv2.rectangle(image, (0, h - 60), (w, h), (30, 30, 30), -1)
+    stage = result["stage"].upper() if result["stage"] else "READY"
+    cv2.putText(image, f"{result['counter']}  {stage}", (10, h - 35),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, TEXT_COLOR, 2, cv2.LINE_AA)
+    if result["feedback"]:
+        cv2.putText(image, result["feedback"], (10, h - 12),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, ACCENT_COLOR, 1, cv2.LINE_AA)
+    fill = int(w * min(abs(result["gauge"]), 100) / 100)
+    cv2.rectangle(image, (0, h - 4), (fill, h), PROGRESS_COLOR, -1)
+    return image
+
+
+class ExerciseTracker:
+    """One exercise session: BGR frames (or landmark arrays) in, result records out.
+
+    Subclasses in exercise_models/ only set `exercise`. `pose` is a
+    pose_backends backend (anything with process(rgb)); by default one is
+    created on first use from $POSE_BACKEND. Set `draw` to False to skip
+    rendering, or pass draw= per frame; `frames` counts processed frames.
+    """
+
+    exercise = None
+
+    def __init__(self, exercise=None, pose=None, draw=True):
+        self.exercise = exercise or self.exercise
+        self.counter = create_counter(self.exercise)
+        self.landmarks = LandmarkBuffer()
+        self.draw = draw
+        self.frames = 0
+        self._pose = pose
+
+    @property
+    def pose(self):
+        if self._pose is None:
+            self._pose = create_backend(exercise=self.exercise)
+        return self._pose
+
+    def update(self, landmarks):
+        """Advance the exercise by one (33, 4) landmark array (None when no pose)."""
+        return self.counter.update(landmarks)
+
+    def process_frame(self, img, pose=None, draw=None):
+        """Run one BGR frame through pose estimation and the exercise counter.
+
+        `pose` overrides the tracker's own backend for this frame (e.g. one
+        checked out of a pose_pool.PosePool). Returns the counter's result
+        record with a copy of the frame's `landmarks` (None without a pose),
+        plus `image` (the frame with the result drawn on it, in place) when
+        drawing is enabled; `draw` overrides self.draw for this frame.
+        """
+        pose = pose or self.pose
+        return self.process_result(img, pose.process(to_rgb(img)), draw)
+
+    def process_result(self, img, pose_result, draw=None):
+        """Like process_frame, with pose estimation for `img` already done elsewhere
+        (e.g. in a shm_workers process); `pose_result` is anything LandmarkBuffer.update() takes.
+        """
+        detected = self.landmarks.update(pose_result)
+        result = self.update(self.landmarks.data if detected else None)
+        result["landmarks"] = self.landmarks.data.copy() if detected else None
+        self.frames += 1
+        if self.draw if draw is None else draw:
+            result["image"] = draw_result(img, self.exercise, result, self.landmarks)
+        return result
+
+    def reset(self):
+        """Start the exercise over (reps, stage and calibration)."""
+        self.counter.reset()
+
+    def close(self):
+        if self._pose is not None:
+            self._pose.close()
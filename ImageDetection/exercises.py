@@ -0,0 +1,403 @@
+# exercises.py
+# -----------------------------
+# Rep-counting and feedback logic of the seven exercise trackers, without any
+# camera, drawing or MediaPipe dependency.
+# Each counter takes one (33, 4) landmark array per frame (see landmarks.py,
+# or None when no pose was found) and returns a result record, so the same
+# logic drives the live trackers, the batch video analysis and replays.
+
+import numpy as np
+
+from kinematics import joint_angles
+from landmarks import (ANGLE_TRIPLETS, EXERCISE_LANDMARKS, NOSE, LEFT_EAR, RIGHT_EAR,
+                       LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE)
+
+
+class ExerciseCounter:
+    """Base class: per-exercise state machine fed with one landmark array per frame.
+
+    update() returns a record with the rep `counter`, current `stage`,
+    `feedback` text, a `gauge` value for the progress bar and the frame's
+    raw `metrics` (angles, distances), named by the class's METRICS.
+    """
+
+    exercise = None
+    METRICS = ()
+    CALIBRATION_FRAMES = 30
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear reps, stage and calibration."""
+        self.counter = 0
+        self.stage = None
+        self.feedback = ""
+        self.gauge = 0
+        self.detected = False
+        self.metrics = dict.fromkeys(self.METRICS)
+
+    def update(self, landmarks):
+        """Advance the state machine by one frame and return the result record."""
+        self.detected = landmarks is not None
+        if self.detected:
+            self.step(np.asarray(landmarks))
+        return self.result()
+
+    def step(self, lm):
+        raise NotImplementedError
+
+    def result(self):
+        return {
+            "counter": self.counter,
+            "stage": self.stage,
+            "feedback": self.feedback,
+            "gauge": self.gauge,
+            "detected": self.detected,
+            "metrics": dict(self.metrics),
+        }
+
+
+class CalibratedCounter(ExerciseCounter):
+    """Counter that averages a baseline value over the first frames."""
+
+    READY_FEEDBACK = "Ready"
+
+    def reset(self):
+        super().reset()
+        self.baseline_set = False
+        self.baseline = 0
+        self.calibration_frames = 0
+        self.calibration_sum = 0
+
+    def recalibrate(self):
+        """Restart baseline calibration, keeping the rep count."""
+        self.baseline_set = False
+        self.calibration_frames = 0
+        self.calibration_sum = 0
+
+    def calibrate(self, value):
+        """Feed one calibration sample; returns True once the baseline is set."""
+        if self.calibration_frames < self.CALIBRATION_FRAMES:
+            self.calibration_sum += value
+            self.calibration_frames += 1
+            self.feedback = f"Calibrating... {self.calibration_frames}/{self.CALIBRATION_FRAMES}"
+            return False
+        self.baseline = self.calibration_sum / self.calibration_frames
+        self.baseline_set = True
+        self.feedback = self.READY_FEEDBACK
+        return True
+
+
+class SquatCounter(ExerciseCounter):
+    exercise = "squat"
+    METRICS = ("right_knee_angle", "left_knee_angle", "right_hip_angle", "left_hip_angle",
+               "knee_angle", "hip_angle")
+
+    def reset(self):
+        super().reset()
+        self.max_depth_reached = 0
+        self._angles = np.empty(len(ANGLE_TRIPLETS["squat"]))
+
+    def step(self, lm):
+        # Knees (R, L) then hips (R, L) in one vectorized call
+        angles = joint_angles(lm[ANGLE_TRIPLETS["squat"], :2], out=self._angles)
+        right_knee, left_knee, right_hip, left_hip = angles.tolist()
+        knee_angle = (right_knee + left_knee) / 2
+        hip_angle = (right_hip + left_hip) / 2
+        self.metrics.update(zip(self.METRICS, (right_knee, left_knee, right_hip, left_hip,
+                                               knee_angle, hip_angle)))
+
+        squat_depth = min(100, max(0, (170 - knee_angle) * 100 / 80))
+        self.gauge = squat_depth
+
+        if self.stage == "down":
+            self.max_depth_reached = max(self.max_depth_reached, squat_depth)
+
+        if knee_angle > 150 and hip_angle > 160:
+            if self.stage == "down" and self.max_depth_reached > 40:
+                self.stage = "up"
+                self.counter += 1
+                self.feedback = f"Rep counted! Depth: {int(self.max_depth_reached)}%"
+                self.max_depth_reached = 0
+            elif self.stage != "down":
+                self.stage = "up"
+                self.feedback = "Ready"
+        elif knee_angle < 140:
+            if self.stage == "up" or self.stage is None:
+                self.stage = "down"
+            self.feedback = f"Depth: {int(squat_depth)}%"
+
+
+class ChinTuckCounter(CalibratedCounter):
+    exercise = "chin_tucks"
+    METRICS = ("nose_neck_dist", "delta")
+    READY_FEEDBACK = "Ready. Tuck your chin!"
+    tuck_threshold = 0.04
+
+    def step(self, lm):
+        neck_y = (lm[LEFT_SHOULDER, 1] + lm[RIGHT_SHOULDER, 1]) / 2
+        nose_neck_dist = float(abs(lm[NOSE, 1] - neck_y))
+        self.metrics["nose_neck_dist"] = nose_neck_dist
+
+        if not self.baseline_set:
+            self.calibrate(nose_neck_dist)
+            return
+
+        delta = self.baseline - nose_neck_dist
+        self.metrics["delta"] = delta
+        if delta > self.tuck_threshold and self.stage in [None, "neutral"]:
+            self.stage = "tucked"
+            self.feedback = "Chin tucked - good!"
+        elif delta < self.tuck_threshold / 2 and self.stage == "tucked":
+            self.stage = "neutral"
+            self.counter += 1
+            self.feedback = "Rep counted!"
+        elif self.stage is None:
+            self.stage = "neutral"
+            self.feedback = "Ready to start"
+        if self.stage == "tucked":
+            self.feedback = f"Hold tuck: {int((delta / (self.tuck_threshold * 2)) * 100)}%"
+        self.gauge = 100 * max(0, min(1, delta / (self.tuck_threshold * 2)))
+
+
+class PelvicTiltCounter(CalibratedCounter):
+    exercise = "pelvic_tilts"
+    METRICS = ("pelvis_to_knee", "movement")
+    READY_FEEDBACK = "Ready. Begin Pelvic Tilts!"
+    tilt_threshold = 0.025
+
+    def reset(self):
+        super().reset()
+        self.phase_history = []
+
+    def step(self, lm):
+        mid_hip_y = (lm[LEFT_HIP, 1] + lm[RIGHT_HIP, 1]) / 2
+        mid_knee_y = (lm[LEFT_KNEE, 1] + lm[RIGHT_KNEE, 1]) / 2
+        pelvis_to_knee = float(mid_hip_y - mid_knee_y)
+        self.metrics["pelvis_to_knee"] = pelvis_to_knee
+
+        if not self.baseline_set:
+            self.calibrate(pelvis_to_knee)
+            return
+
+        movement = pelvis_to_knee - self.baseline
+        self.metrics["movement"] = movement
+        self.stage = "Tilted" if movement > self.tilt_threshold else "Neutral"
+        self.gauge = 100 * max(0, min(1, movement / (self.tilt_threshold * 2)))
+        self.phase_history.append(self.stage)
+        if len(self.phase_history) > 3:
+            self.phase_history.pop(0)
+        if len(self.phase_history) == 3 and self.phase_history == ["Neutral", "Tilted", "Neutral"]:
+            self.counter += 1
+            self.feedback = "Rep Completed!"
+            self.phase_history.clear()
+
+
+class ShoulderShrugCounter(ExerciseCounter):
+    exercise = "shoulder_shrugs"
+    METRICS = ("left_shoulder_y", "right_shoulder_y", "avg_delta")
+    shrug_threshold = 0.015
+
+    def reset(self):
+        super().reset()
+        self.feedback = "Initializing..."
+        self.baseline_left_y = 0
+        self.baseline_right_y = 0
+        self.baseline_set = False
+        self.calibration_frames = 0
+        self.calibration_sum_left = 0
+        self.calibration_sum_right = 0
+
+    def calibrate(self, l_shoulder_y, r_shoulder_y):
+        self.calibration_sum_left += l_shoulder_y
+        self.calibration_sum_right += r_shoulder_y
+        self.calibration_frames += 1
+        self.feedback = f"Calibrating... {self.calibration_frames}/{self.CALIBRATION_FRAMES}"
+        if self.calibration_frames >= self.CALIBRATION_FRAMES:
+            self.baseline_left_y = self.calibration_sum_left / self.calibration_frames
+            self.baseline_right_y = self.calibration_sum_right / self.calibration_frames
+            self.baseline_set = True
+            self.feedback = "Ready. Shrug your shoulders!"
+
+    def step(self, lm):
+        l_y, r_y = lm[EXERCISE_LANDMARKS["shoulder_shrugs"], 1].tolist()
+        self.metrics["left_shoulder_y"] = l_y
+        self.metrics["right_shoulder_y"] = r_y
+
+        if not self.baseline_set:
+            self.calibrate(l_y, r_y)
+            return
+
+        avg_delta = (l_y - self.baseline_left_y + r_y - self.baseline_right_y) / 2
+        self.metrics["avg_delta"] = avg_delta
+
+        if avg_delta < -self.shrug_threshold and (self.stage == "down" or self.stage is None):
+            self.stage = "up"
+            self.feedback = "Shoulders up - good!"
+        elif avg_delta > -0.005 and self.stage == "up":
+            self.stage = "down"
+            self.counter += 1
+            self.feedback = "Rep counted!"
+        elif self.stage is None:
+            self.stage = "down"
+            self.feedback = "Ready to start"
+
+        self.gauge = max(0, min(100, -avg_delta / (self.shrug_threshold * 3) * 100))
+        if self.stage == "up":
+            self.feedback = f"Hold shrug: {int(self.gauge)}%"
+        elif self.stage == "down" and self.counter > 0:
+            self.feedback = "Return to rest position"
+
+
+class HandCurlCounter(ExerciseCounter):
+    """Bicep curls, counted per arm; `counter` is the number of reps done on both arms."""
+
+    exercise = "hand_curls"
+    METRICS = ("left_angle", "right_angle", "left_counter", "right_counter")
+
+    def reset(self):
+        super().reset()
+        self.left_counter = 0
+        self.left_stage = None
+        self.right_counter = 0
+        self.right_stage = None
+        self._angles = np.empty(len(ANGLE_TRIPLETS["hand_curls"]))
+
+    def step(self, lm):
+        left_angle, right_angle = joint_angles(lm[ANGLE_TRIPLETS["hand_curls"], :2],
+                                               out=self._angles).tolist()
+
+        if left_angle > 160:
+            self.left_stage = "down"
+        if left_angle < 30 and self.left_stage == "down":
+            self.left_stage = "up"
+            self.left_counter += 1
+            self.feedback = f"Left arm rep: {self.left_counter}"
+
+        if right_angle > 160:
+            self.right_stage = "down"
+        if right_angle < 30 and self.right_stage == "down":
+            self.right_stage = "up"
+            self.right_counter += 1
+            self.feedback = f"Right arm rep: {self.right_counter}"
+
+        self.counter = min(self.left_counter, self.right_counter)
+        self.stage = self.left_stage if self.left_stage == self.right_stage else "mixed"
+        # Curl progress from fully extended (160) to fully curled (30), both arms
+        self.gauge = max(0, min(100, (160 - (left_angle + right_angle) / 2) * 100 / 130))
+        self.metrics.update(left_angle=left_angle, right_angle=right_angle,
+                            left_counter=self.left_counter, right_counter=self.right_counter)
+
+
+class NeckRotationCounter(ExerciseCounter):
+    """Neck rotations; `gauge` is the signed rotation, -100 (left) to +100 (right)."""
+
+    exercise = "neck_rotations"
+    METRICS = ("rotation_angle",)
+    rotation_threshold = 40  # Percentage of full rotation
+
+    def reset(self):
+        super().reset()
+        self.max_left_rotation = 0
+        self.max_right_rotation = 0
+        self.left_done = False
+        self.right_done = False
+
+    def step(self, lm):
+        xy = lm[:, :2]
+        mid_shoulders_x = (xy[LEFT_SHOULDER, 0] + xy[RIGHT_SHOULDER, 0]) / 2
+
+        # Nose offset from mid-shoulders, normalized by half the ear distance
+        relative_nose_pos = xy[NOSE, 0] - mid_shoulders_x
+        ear_distance = np.linalg.norm(xy[LEFT_EAR] - xy[RIGHT_EAR])
+        rotation_angle = float(max(-100, min(100, (relative_nose_pos / (ear_distance * 0.5)) * 100)))
+        self.gauge = rotation_angle
+        self.metrics["rotation_angle"] = rotation_angle
+
+        if abs(rotation_angle) < 20:
+            if self.stage == "rotating":
+                self.stage = "center"
+                # Both sides done in this rep
+                if self.left_done and self.right_done:
+                    self.counter += 1
+                    self.feedback = "Rep counted!"
+                    self.left_done = False
+                    self.right_done = False
+            elif self.stage is None:
+                self.stage = "center"
+                self.feedback = "Ready"
+        else:
+            if self.stage == "center" or self.stage is None:
+                self.stage = "rotating"
+            if rotation_angle <= -self.rotation_threshold:
+                self.left_done = True
+                self.feedback = f"Left rotation: {abs(int(rotation_angle))}%"
+            elif rotation_angle >= self.rotation_threshold:
+                self.right_done = True
+                self.feedback = f"Right rotation: {int(rotation_angle)}%"
+            self.max_left_rotation = min(self.max_left_rotation, rotation_angle)
+            self.max_right_rotation = max(self.max_right_rotation, rotation_angle)
+
+
+class CatCowCounter(CalibratedCounter):
+    exercise = "cat_cow"
+    METRICS = ("spine_position", "movement")
+    READY_FEEDBACK = "Ready. Begin Cat-Cow!"
+    cow_threshold = 0.03
+    cat_threshold = 0.02
+
+    def reset(self):
+        super().reset()
+        self.phase_history = []
+
+    def recalibrate(self):
+        super().recalibrate()
+        self.phase_history.clear()
+
+    def step(self, lm):
+        # Shoulders (L, R) then hips (L, R)
+        torso = lm[EXERCISE_LANDMARKS["cat_cow"], :2]
+        shoulder_avg_y = torso[:2, 1].mean()
+        hip_avg_y = torso[2:, 1].mean()
+        mid_spine_y = torso[:, 1].mean()
+        spine_position = float(mid_spine_y - ((shoulder_avg_y + hip_avg_y) / 2))
+        self.metrics["spine_position"] = spine_position
+
+        if not self.baseline_set:
+            self.calibrate(spine_position)
+            return
+
+        movement = spine_position - self.baseline
+        self.metrics["movement"] = movement
+        if movement < -self.cow_threshold:
+            self.stage = "Cow"
+            self.feedback = "Cow position (arch back)"
+        elif movement > self.cat_threshold:
+            self.stage = "Cat"
+            self.feedback = "Cat position (round spine)"
+        else:
+            self.stage = "Neutral"
+            self.feedback = "Neutral position"
+
+        self.phase_history.append(self.stage)
+        if len(self.phase_history) > 5:
+            self.phase_history.pop(0)
+        if self.phase_history[-4:] == ["Cow", "Neutral", "Cat", "Neutral"]:
+            self.counter += 1
+            self.feedback = "Rep Completed!"
+            self.phase_history.clear()
+
+
+COUNTERS = {cls.exercise: cls for cls in (
+    SquatCounter, ChinTuckCounter, PelvicTiltCounter, ShoulderShrugCounter,
+    HandCurlCounter, NeckRotationCounter, CatCowCounter,
+)}
+
+
+def create_counter(exercise):
+    """Return a fresh counter for an exercise id (see COUNTERS)."""
+    try:
+        return COUNTERS[exercise]()
+    except KeyError:
+        raise ValueError(f"Unknown exercise {exercise!r}; expected one of {sorted(COUNTERS)}") from None
@@ -0,0 +1,98 @@
+# frame_buffers.py
+# -----------------------------
+# Frame-buffer management for the per-frame hot path.
+# Captured BGR frames come from a fixed ring of reusable buffers and are kept
+# as-is for drawing, while MediaPipe gets an RGB copy converted into a reused
+# destination buffer. In steady state neither step allocates.
+
+import threading
+from collections import deque
+
+import cv2
+
+
+class FrameRing:
+    """Fixed ring of reusable BGR capture buffers with explicit ownership.
+
+    A buffer handed out by read() belongs to the caller until it is given
+    back with release(); the ring only ever allocates `slots` buffers (more
+    only if the capture resolution changes).
+    """
+
+    def __init__(self, slots=6):
+        self.slots = slots
+        self.allocations = 0
+        self._free = deque()
+        self._outstanding = 0
+        self._cond = threading.Condition()
+
+    def _acquire(self, timeout):
+        with self._cond:
+            while not self._free:
+                if self._outstanding < self.slots:
+                    self._outstanding += 1
+                    return None
+                if not self._cond.wait(timeout):
+                    raise TimeoutError("All frame buffers are in use")
+            self._outstanding += 1
+            return self._free.popleft()
+
+    def read(self, cap, timeout=None):
+        """Read the next frame from `cap` into a free buffer.
+
+        Returns cap.read()'s (ret, frame). Raises TimeoutError if every buffer
+        is still held downstream after `timeout` seconds.
+        """
+        buf = self._acquire(timeout)
+        ret, frame = cap.read(buf) if buf is not None else cap.read()
+        if not ret:
+            self._give_back(buf)
+            return ret, None
+        if frame is not buf:
+            self.allocations += 1
+        return ret, frame
+
+    def _give_back(self, buf):
+        with self._cond:
+            self._outstanding -= 1
+            if buf is not None:
+                self._free.append(buf)
+            self._cond.notify()
+
+    def release(self, frame):
+        """Return a buffer obtained from read() to the ring."""
+        self._give_back(frame)
+
+
+class RGBBuffer:
+    """Reused destination buffer for the BGR->RGB conversion MediaPipe needs."""
+
+    def __init__(self):
+        self._rgb = None
+
+    def convert(self, frame):
+        """Return an RGB, read-only view of `frame` without allocating."""
+        rgb = self._rgb
+        if rgb is None or rgb.shape != frame.shape:
+            rgb = self._rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        else:
+            rgb.flags.writeable = True
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+        # Read-only lets MediaPipe take the frame by reference
+        rgb.flags.writeable = False
+        return rgb
+
+
+_thread_buffers = threading.local()
+
+
+def to_rgb(frame):
+    """Convert a BGR frame to RGB in a buffer owned by the calling thread.
+
+    For request handlers served from a thread pool, where one shared
+    RGBBuffer would be overwritten by concurrent requests.
+    """
+    buf = getattr(_thread_buffers, "rgb", None)
+    if buf is None:
+        buf = _thread_buffers.rgb = RGBBuffer()
+    return buf.convert(frame)
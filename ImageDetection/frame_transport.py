@@ -0,0 +1,119 @@
+# frame_transport.py
+# -----------------------------
+# Binary frame transport for web-exercise-tracker.py.
+# Frames travel as raw JPEG/WebP bytes instead of base64 data URLs in JSON,
+# and results come back either as compact JSON or, when the annotated image
+# is wanted, as one binary envelope:
+#
+#   4 bytes   big-endian length N of the JSON header
+#   N bytes   UTF-8 JSON result record (counter, stage, feedback, gauge, ...)
+#   rest      encoded image bytes (format named in the header), may be empty
+#
+# That avoids the 33% base64 inflation in both directions and the extra
+# full-buffer copies of encoding and decoding it.
+#
+# Frames much larger than pose estimation needs are decoded straight at 1/2,
+# 1/4 or 1/8 scale (IMREAD_REDUCED_COLOR_*), which for JPEG skips most of the
+# inverse DCT work instead of decoding full size and shrinking afterwards.
+
+import json
+import struct
+
+import cv2
+import numpy as np
+
+ENVELOPE_MIMETYPE = "application/x-frame-envelope"
+IMAGE_FORMATS = {"jpeg": (".jpg", "image/jpeg"), "webp": (".webp", "image/webp")}
+
+_HEADER_LENGTH = struct.Struct(">I")
+_REDUCED = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+# JPEG start-of-frame markers (all SOFn except DHT, JPG and DAC)
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(data):
+    """(width, height) from a JPEG, PNG or WebP header without decoding, or None."""
+    data = memoryview(data)
+    if data[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker == 0xFF:
+                i += 1
+                continue
+            if marker in _SOF_MARKERS:
+                height, width = struct.unpack_from(">HH", data, i + 5)
+                return width, height
+            if marker == 0xD8 or 0xD0 <= marker <= 0xD7:
+                i += 2
+                continue
+            i += 2 + struct.unpack_from(">H", data, i + 2)[0]
+        return None
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack_from(">II", data, 16)
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = bytes(data[12:16])
+        if chunk == b"VP8 ":
+            width, height = struct.unpack_from("<HH", data, 26)
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    return None
+
+
+def reduction_for(size, min_side):
+    """Largest IMREAD_REDUCED factor (1, 2, 4, 8) keeping the short side >= min_side."""
+    if not size or not min_side:
+        return 1, cv2.IMREAD_COLOR
+    short = min(size)
+    for factor, flags in _REDUCED:
+        if short // factor >= min_side:
+            return factor, flags
+    return 1, cv2.IMREAD_COLOR
+
+
+def decode_frame(data, min_side=None):
+    """Decode JPEG/WebP/PNG bytes straight into a BGR frame (None if undecodable).
+
+    With `min_side`, frames whose short side is at least twice that are
+    decoded at a reduced scale that still keeps the short side >= min_side.
+    """
+    if not data:
+        return None
+    _, flags = reduction_for(image_size(data), min_side)
+    return cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+
+
+def encode_image(image, fmt="jpeg", quality=80):
+    """Encode a BGR frame as JPEG or WebP bytes."""
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format {fmt!r}; expected one of {sorted(IMAGE_FORMATS)}")
+    ext = IMAGE_FORMATS[fmt][0]
+    param = cv2.IMWRITE_JPEG_QUALITY if fmt == "jpeg" else cv2.IMWRITE_WEBP_QUALITY
+    ok, buffer = cv2.imencode(ext, image, [param, int(quality)])
+    if not ok:
+        raise ValueError(f"Could not encode frame as {fmt}")
+    return buffer.tobytes()
+
+
+def pack_envelope(record, payload=b""):
+    """Pack a JSON-serializable result record and optional image bytes into one message."""
+    header = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    return b"".join((_HEADER_LENGTH.pack(len(header)), header, payload))
+
+
+def unpack_envelope(data):
+    """Split an envelope back into (record, payload bytes)."""
+    if len(data) < _HEADER_LENGTH.size:
+        raise ValueError("Envelope is too short")
+    (length,) = _HEADER_LENGTH.unpack_from(data)
+    end = _HEADER_LENGTH.size + length
+    if len(data) < end:
+        raise ValueError("Envelope header is truncated")
+    record = json.loads(bytes(data[_HEADER_LENGTH.size:end]).decode("utf-8"))
+    return record, bytes(data[end:])
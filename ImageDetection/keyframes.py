@@ -0,0 +1,95 @@
+# keyframes.py
+# -----------------------------
+# Keyframe inference scheduling for slow exercises.
+# The pose model only runs on keyframes; frames in between get landmarks
+# extrapolated from the motion between the last two keyframes. The keyframe
+# interval grows while the body is nearly still and drops back to every
+# frame as soon as landmark velocity rises.
+
+import numpy as np
+
+from landmarks import LandmarkBuffer, PoseEstimate
+
+
+class KeyframeScheduler:
+    """Inference stage that runs `infer(frame)` only on keyframes.
+
+    A drop-in wrapper for pipeline.pose_inference(): it returns the real
+    Pose results on keyframes and a PoseEstimate with extrapolated landmarks
+    on the frames in between. Velocity is the fastest visible landmark's
+    displacement per frame, in normalized image coordinates.
+    """
+
+    def __init__(self, infer, max_interval=4, slow_velocity=0.002, fast_velocity=0.006,
+                 min_visibility=0.5):
+        self.infer = infer
+        self.max_interval = max_interval
+        self.slow_velocity = slow_velocity
+        self.fast_velocity = fast_velocity
+        self.min_visibility = min_visibility
+        self.interval = 1
+        self.frames = 0
+        self.keyframes = 0
+        self._buffer = LandmarkBuffer()
+        self._last = np.zeros_like(self._buffer.data)
+        self._velocity = np.zeros_like(self._buffer.data)
+        self._have_last = False
+        self._since_key = 0
+
+    def reset(self):
+        """Forget the motion history; the next frame is a keyframe."""
+        self.interval = 1
+        self._have_last = False
+
+    def __call__(self, frame):
+        self.frames += 1
+        self._since_key += 1
+        if not self._have_last or self._since_key >= self.interval:
+            return self._keyframe(frame)
+
+        # Linear extrapolation from the last keyframe; visibility is carried over.
+        # A fresh array, since the render stage may still hold the previous one.
+        return PoseEstimate(self._last + self._velocity * self._since_key)
+
+    def _keyframe(self, frame):
+        results = self.infer(frame)
+        self.keyframes += 1
+        gap = self._since_key
+        self._since_key = 0
+
+        if not self._buffer.update(results):
+            self.reset()
+            return results
+
+        current = self._buffer.data
+        if self._have_last:
+            np.subtract(current, self._last, out=self._velocity)
+            self._velocity /= gap
+            self._velocity[:, 3] = 0
+            self._adapt()
+        self._last[:] = current
+        self._have_last = True
+        return results
+
+    def _adapt(self):
+        visible = self._last[:, 3] >= self.min_visibility
+        if not visible.any():
+            self.interval = 1
+            return
+        speed = float(np.hypot(self._velocity[visible, 0], self._velocity[visible, 1]).max())
+        if speed > self.fast_velocity:
+            self.interval = 1
+        elif speed < self.slow_velocity:
+            self.interval = min(self.interval + 1, self.max_interval)
+        elif self.interval > 1:
+            self.interval -= 1
+
+    @property
+    def keyframe_ratio(self):
+        """Fraction of frames that ran the pose model."""
+        return self.keyframes / self.frames if self.frames else 1.0
+
+    def report(self):
+        """Print how many frames ran inference."""
+        print(f"Keyframes: {self.keyframes}/{self.frames} ({self.keyframe_ratio:.0%}), "
+              f"interval now {self.interval}")
@@ -0,0 +1,48 @@
+# kinematics.py
+# -----------------------------
+# Shared joint-angle math for the exercise trackers.
+# Every angle an exercise needs is computed in a single vectorized NumPy call
+# over an array of (a, b, c) point triplets, where b is the joint vertex.
+
+import numpy as np
+
+
+def joint_angles(triplets, out=None):
+    """Return the angle at the middle point of each (a, b, c) triplet, in degrees.
+
+    `triplets` is a (joints, 3, 2) array for one frame or a
+    (frames, joints, 3, 2) array for a whole recording; the result has the
+    leading shape, i.e. (joints,) or (frames, joints). Angles are folded into
+    0-180 like the per-script calculate_angle() this replaces.
+
+    The vertex-to-end vectors are the only temporary; everything else is done
+    in place, so pass `out` to reuse the result buffer across frames.
+    """
+    t = np.asarray(triplets, dtype=np.float64)
+    if t.ndim < 3 or t.shape[-2:] != (3, 2):
+        raise ValueError(f"Expected (..., 3, 2) triplets, got shape {t.shape}")
+
+    if out is None:
+        out = np.empty(t.shape[:-2], dtype=np.float64)
+
+    # (..., 2, 2): row 0 is b->a, row 1 is b->c
+    v = t[..., ::2, :] - t[..., 1:2, :]
+    ax, ay = v[..., 0, 0], v[..., 0, 1]
+    cx, cy = v[..., 1, 0], v[..., 1, 1]
+
+    # angle = atan2(|a x c|, a . c), which equals the folded arctan2 difference
+    np.multiply(ax, cy, out=out)
+    np.multiply(ax, cx, out=ax)
+    np.multiply(ay, cx, out=cx)
+    np.subtract(out, cx, out=out)
+    np.multiply(ay, cy, out=ay)
+    np.add(ax, ay, out=ax)
+    np.abs(out, out=out)
+    np.arctan2(out, ax, out=out)
+    np.degrees(out, out=out)
+    return out
+
+
+def calculate_angle(a, b, c):
+    """Calculate the angle between three points (single-joint convenience wrapper)."""
+    return float(joint_angles(((a, b, c),))[0])
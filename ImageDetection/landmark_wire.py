@@ -0,0 +1,104 @@
+# landmark_wire.py
+# -----------------------------
+# Compact binary wire format for windows of pose landmarks.
+# Clients that detect poses on-device batch 0.5-1 s of frames into one
+# message instead of one JSON request per frame. All fields little-endian:
+#
+#   header   magic b"LW", version u8, encoding u8 (1 float16, 2 int16),
+#            landmarks u8, channels u8, frames u16, t0 f64 (seconds)
+#   offsets  frames x u32: milliseconds since t0
+#   detected frames x u8: 0 when no pose was found in that frame
+#   block    frames x landmarks x channels float16, or int16 holding
+#            value * INT16_SCALE (normalized coordinates, ~1e-4 resolution)
+#
+# Decoding is a handful of np.frombuffer views, no per-value Python work.
+
+import struct
+
+import numpy as np
+
+from landmarks import NUM_LANDMARKS
+
+MAGIC = b"LW"
+VERSION = 1
+FLOAT16 = 1
+INT16 = 2
+ENCODINGS = {"float16": FLOAT16, "int16": INT16}
+INT16_SCALE = 8192  # covers -4..4, plenty for normalized x/y/z and visibility
+LANDMARK_MIMETYPE = "application/x-landmark-window"
+
+_HEADER = struct.Struct("<2sBBBBHd")
+
+
+def encode_window(landmarks, timestamps, detected=None, encoding="int16"):
+    """Pack a (frames, 33, 4) landmark window into bytes.
+
+    `timestamps` are non-decreasing seconds (any epoch) per frame; `detected`
+    is an optional per-frame bool mask (default: all frames have a pose).
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    if landmarks.ndim != 3:
+        raise ValueError(f"Expected a (frames, landmarks, channels) array, got shape {landmarks.shape}")
+    frames, count, channels = landmarks.shape
+    if frames > 0xFFFF:
+        raise ValueError("A window holds at most 65535 frames")
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if timestamps.shape != (frames,):
+        raise ValueError("Need one timestamp per frame")
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r}; expected one of {sorted(ENCODINGS)}")
+    if not np.all(np.isfinite(timestamps)):
+        raise ValueError("Timestamps must be finite")
+    # Offsets are unsigned: an earlier frame would wrap around to ~49 days
+    if np.any(np.diff(timestamps) < 0):
+        raise ValueError("Timestamps must not decrease")
+
+    t0 = float(timestamps[0]) if frames else 0.0
+    offsets = np.round((timestamps - t0) * 1000)
+    if frames and offsets[-1] > 0xFFFFFFFF:
+        raise ValueError("A window spans at most 2**32 - 1 ms")
+    offsets = offsets.astype("<u4")
+    mask = np.ones(frames, np.uint8) if detected is None else np.asarray(detected, dtype=np.uint8)
+    if encoding == "float16":
+        block = landmarks.astype("<f2")
+    else:
+        block = np.clip(np.round(landmarks * INT16_SCALE), -32768, 32767).astype("<i2")
+    header = _HEADER.pack(MAGIC, VERSION, ENCODINGS[encoding], count, channels, frames, t0)
+    return b"".join((header, offsets.tobytes(), mask.tobytes(), block.tobytes()))
+
+
+def decode_window(data):
+    """Unpack a window into (landmarks (frames, 33, 4) float32, timestamps float64, detected bool)."""
+    data = memoryview(data)
+    if len(data) < _HEADER.size:
+        raise ValueError("Landmark window is too short")
+    magic, version, encoding, count, channels, frames, t0 = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a landmark window")
+    if version != VERSION:
+        raise ValueError(f"Unsupported landmark window version {version}")
+    if encoding not in (FLOAT16, INT16):
+        raise ValueError(f"Unknown landmark encoding {encoding}")
+    if count != NUM_LANDMARKS or channels not in (3, 4):
+        raise ValueError(f"Expected {NUM_LANDMARKS} landmarks of 3 or 4 channels, got {count} x {channels}")
+
+    offset = _HEADER.size
+    values = frames * count * channels
+    expected = offset + frames * 4 + frames + values * 2
+    if len(data) != expected:
+        raise ValueError(f"Landmark window should be {expected} bytes, got {len(data)}")
+    offsets = np.frombuffer(data, "<u4", frames, offset)
+    offset += frames * 4
+    detected = np.frombuffer(data, np.uint8, frames, offset).astype(bool)
+    offset += frames
+    if encoding == FLOAT16:
+        block = np.frombuffer(data, "<f2", values, offset).astype(np.float32)
+    else:
+        block = np.frombuffer(data, "<i2", values, offset).astype(np.float32)
+        block *= 1.0 / INT16_SCALE
+    block = block.reshape(frames, count, channels)
+    if channels == 3:
+        # No visibility sent: treat every landmark as visible
+        block = np.concatenate([block, np.ones((frames, count, 1), np.float32)], axis=2)
+    timestamps = t0 + offsets / 1000.0
+    return block, timestamps, detected
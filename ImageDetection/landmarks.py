@@ -0,0 +1,109 @@
+# landmarks.py
+# -----------------------------
+# Landmark adapter between MediaPipe Pose results and the exercise trackers.
+# The 33 pose landmarks are copied once per frame into a reused (33, 4)
+# float32 array (x, y, z, visibility), and trackers read from that array
+# through precomputed integer index tables instead of the protobuf objects.
+
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+# MediaPipe PoseLandmark indices, mirrored here so the index tables can be
+# built without importing mediapipe.
+NOSE = 0
+LEFT_EYE = 2
+RIGHT_EYE = 5
+LEFT_EAR = 7
+RIGHT_EAR = 8
+MOUTH_LEFT = 9
+MOUTH_RIGHT = 10
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+
+# Landmarks each exercise reads (also the points its tracker draws)
+EXERCISE_LANDMARKS = {
+    "squat": np.array([LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP,
+                       LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE]),
+    "chin_tucks": np.array([NOSE, MOUTH_LEFT, MOUTH_RIGHT, LEFT_SHOULDER, RIGHT_SHOULDER]),
+    "pelvic_tilts": np.array([LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE]),
+    "shoulder_shrugs": np.array([LEFT_SHOULDER, RIGHT_SHOULDER]),
+    "hand_curls": np.array([LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST,
+                            RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST]),
+    "neck_rotations": np.array([NOSE, LEFT_EAR, RIGHT_EAR, LEFT_EYE, RIGHT_EYE,
+                                LEFT_SHOULDER, RIGHT_SHOULDER]),
+    "cat_cow": np.array([LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP]),
+}
+
+# (a, b, c) index triplets for kinematics.joint_angles(), vertex in the middle
+ANGLE_TRIPLETS = {
+    "squat": np.array([
+        [RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE],
+        [LEFT_HIP, LEFT_KNEE, LEFT_ANKLE],
+        [RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE],
+        [LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE],
+    ]),
+    "hand_curls": np.array([
+        [LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST],
+        [RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST],
+    ]),
+}
+
+
+class PoseEstimate:
+    """Results-like wrapper for landmarks that did not come from MediaPipe.
+
+    Holds a (33, 4) array (e.g. landmarks extrapolated between keyframes);
+    LandmarkBuffer.update() accepts it in place of a Pose result.
+    """
+
+    pose_landmarks = None
+
+    def __init__(self, landmark_array):
+        self.landmark_array = landmark_array
+
+
+class LandmarkBuffer:
+    """Reused (33, 4) float32 landmark array filled from MediaPipe results."""
+
+    def __init__(self):
+        self.data = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.xy = self.data[:, :2]
+        self.visibility = self.data[:, 3]
+        self.valid = False
+
+    def update(self, results):
+        """Copy the pose landmarks of `results` (or a PoseEstimate) into the buffer.
+
+        Returns False (and marks the buffer invalid) when no pose was detected.
+        """
+        landmark_array = getattr(results, "landmark_array", None)
+        if landmark_array is not None:
+            self.data[:] = landmark_array
+            self.valid = True
+            return True
+        pose_landmarks = getattr(results, "pose_landmarks", None)
+        if pose_landmarks is None:
+            self.valid = False
+            return False
+        self.data[:] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark]
+        self.valid = True
+        return True
+
+    def triplets(self, exercise):
+        """Return the (joints, 3, 2) triplet array for the exercise's angles."""
+        return self.xy[ANGLE_TRIPLETS[exercise]]
+
+    def pixels(self, indices, w, h):
+        """Return integer pixel coordinates for the given landmark indices."""
+        return (self.xy[indices] * (w, h)).astype(np.int32)
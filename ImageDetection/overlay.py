@@ -0,0 +1,55 @@
+# overlay.py
+# -----------------------------
+# Cached static overlay layers for the tracker UIs.
+# Panels whose content never changes (instruction boxes, titles, labels) are
+# rendered once per frame resolution into a color + alpha sprite and then blended
+# into each frame only inside the sprite's region of interest, instead of
+# copying and cross-fading the whole frame on every draw.
+
+import cv2
+import numpy as np
+
+
+class StaticLayer:
+    """A static overlay rendered once per frame size and blended into its ROI.
+
+    `draw(image)` is ordinary tracker drawing code working on a BGR frame in
+    frame coordinates (translucent panels via addWeighted, opaque text, ...).
+    It is run once over a black and once over a white frame; the difference
+    between the two gives the layer's per-pixel opacity, so the cached sprite
+    reproduces exactly what drawing onto the live frame would have produced.
+    """
+
+    def __init__(self, draw):
+        self.draw = draw
+        self._frame_size = None
+        self.roi = None
+
+    def _build(self, w, h):
+        on_black = np.zeros((h, w, 3), dtype=np.uint8)
+        on_white = np.full((h, w, 3), 255, dtype=np.uint8)
+        self.draw(on_black)
+        self.draw(on_white)
+
+        # Transparency per channel: 1.0 where the layer left the frame untouched
+        inv_alpha = (on_white.astype(np.float32) - on_black) / 255.0
+        x, y, rw, rh = cv2.boundingRect((inv_alpha.min(axis=2) < 1.0).astype(np.uint8))
+        self.roi = (slice(y, y + rh), slice(x, x + rw))
+
+        # 8-bit transparency and the color already multiplied by opacity (what
+        # landed on black), so blending is two saturating OpenCV ops on the ROI
+        self._inv_alpha = np.rint(inv_alpha[self.roi] * 255).astype(np.uint8)
+        self._premultiplied = np.ascontiguousarray(on_black[self.roi])
+        self._frame_size = (w, h)
+
+    def blend(self, image):
+        """Alpha-blend the layer into a BGR frame in place."""
+        h, w = image.shape[:2]
+        if self._frame_size != (w, h):
+            self._build(w, h)
+        roi = image[self.roi]
+        if roi.size == 0:
+            return image
+        cv2.multiply(roi, self._inv_alpha, dst=roi, scale=1 / 255.0)
+        cv2.add(roi, self._premultiplied, dst=roi)
+        return image
@@ -0,0 +1,183 @@
+# pipeline.py
+# -----------------------------
+# Pipelined capture / inference / render loop for the desktop trackers.
+# Each stage runs on its own thread and the stages are connected by bounded
+# latest-frame-wins queues, so inference always picks up the freshest camera
+# frame instead of working through a backlog. Frames travel through the stages
+# in buffers borrowed from a fixed FrameRing and are handed back once rendered
+# or dropped.
+
+import threading
+import time
+from collections import deque
+
+from frame_buffers import FrameRing, RGBBuffer
+
+
+class LatestFrameQueue:
+    """Bounded queue where a new item pushes out the oldest unread one."""
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item):
+        stale = None
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                stale = self._items.popleft()
+            self._items.append(item)
+            self._cond.notify()
+        if stale is not None and self.on_drop is not None:
+            self.on_drop(stale)
+
+    def get(self, timeout=None):
+        """Return the oldest unread item, or None on timeout or once closed and drained."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed and not self._items
+
+
+def pose_inference(pose):
+    """Wrap a MediaPipe Pose instance as an inference stage taking BGR frames.
+
+    The RGB copy MediaPipe needs is converted into one reused buffer; the BGR
+    frame itself is left untouched for the render stage.
+    """
+    rgb = RGBBuffer()
+
+    def infer(frame):
+        return pose.process(rgb.convert(frame))
+    return infer
+
+
+class PipelineRunner:
+    """Run capture, inference and render as three concurrent stages.
+
+    `cap` is anything with a cv2.VideoCapture-style read([image]), `infer(frame)`
+    returns the pose results for a BGR frame, and `render(frame, results)`
+    draws on the BGR frame and returns False to stop the loop. The render
+    stage runs on the calling thread because OpenCV's HighGUI windows must be
+    driven from the main thread on most platforms.
+    """
+
+    STAGES = ("capture", "inference", "render")
+
+    def __init__(self, cap, infer, render, queue_size=1):
+        self.cap = cap
+        self.infer = infer
+        self.render = render
+        # One buffer per queue slot, plus one held by each stage
+        self.buffers = FrameRing(slots=2 * queue_size + 3)
+        self.frames = LatestFrameQueue(queue_size, on_drop=self.buffers.release)
+        self.results = LatestFrameQueue(queue_size, on_drop=lambda item: self.buffers.release(item[0]))
+        self.counts = dict.fromkeys(self.STAGES, 0)
+        self._stop = threading.Event()
+        self._threads = []
+        self._started = None
+        self._finished = None
+
+    def _capture_loop(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    ret, frame = self.buffers.read(self.cap, timeout=0.1)
+                except TimeoutError:
+                    continue
+                if not ret:
+                    print("Failed to grab frame")
+                    break
+                self.counts["capture"] += 1
+                self.frames.put(frame)
+        finally:
+            self.frames.close()
+
+    def _inference_loop(self):
+        try:
+            while not self._stop.is_set():
+                frame = self.frames.get(timeout=0.1)
+                if frame is None:
+                    if self.frames.closed:
+                        break
+                    continue
+                try:
+                    results = self.infer(frame)
+                except Exception as e:
+                    print(f"Error processing frame: {e}")
+                    self.buffers.release(frame)
+                    continue
+                self.counts["inference"] += 1
+                self.results.put((frame, results))
+        finally:
+            self.results.close()
+
+    def run(self):
+        """Start the capture and inference threads and render until stopped."""
+        self._started = time.perf_counter()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self.results.get(timeout=0.1)
+                if item is None:
+                    if self.results.closed:
+                        break
+                    continue
+                try:
+                    keep_going = self.render(*item)
+                finally:
+                    self.buffers.release(item[0])
+                self.counts["render"] += 1
+                if keep_going is False:
+                    break
+        finally:
+            self.stop()
+        return self.stats()
+
+    def stop(self):
+        """Signal the worker stages to finish and wait for them."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        if self._finished is None:
+            self._finished = time.perf_counter()
+
+    def stats(self):
+        """Return FPS and queue-drop count for each stage.
+
+        Drops are counted at a stage's input queue: frames captured but
+        replaced before inference took them, and inference results replaced
+        before they were rendered.
+        """
+        end = self._finished or time.perf_counter()
+        elapsed = max(end - (self._started or end), 1e-9)
+        dropped = {"capture": 0, "inference": self.frames.dropped, "render": self.results.dropped}
+        return {
+            stage: {"fps": self.counts[stage] / elapsed, "dropped": dropped[stage]}
+            for stage in self.STAGES
+        }
+
+    def report(self):
+        """Print the per-stage pipeline stats."""
+        print("\nPipeline stats:")
+        for stage, s in self.stats().items():
+            print(f"  {stage:<10} {s['fps']:6.1f} fps, {s['dropped']} dropped")
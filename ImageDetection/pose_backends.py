@@ -0,0 +1,213 @@
+# pose_backends.py
+# -----------------------------
+# Pose-estimation backends behind one small interface.
+# Trackers, the web app and the benchmarks only call process(rgb) / reset() /
+# close() on a backend, so MediaPipe can be swapped for a deterministic
+# synthetic backend that plays parameterized exercise trajectories. That
+# gives camera-less load tests and lets pipeline overhead be measured apart
+# from model cost.
+
+import math
+import os
+
+import numpy as np
+
+from landmarks import (NUM_LANDMARKS, PoseEstimate, NOSE, LEFT_EYE, RIGHT_EYE, LEFT_EAR, RIGHT_EAR,
+                       MOUTH_LEFT, MOUTH_RIGHT, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW,
+                       LEFT_WRIST, RIGHT_WRIST, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE,
+                       LEFT_ANKLE, RIGHT_ANKLE)
+
+# Default backend for create_backend(); "synthetic" runs without a camera or model
+BACKEND_ENV = "POSE_BACKEND"
+
+
+class PoseBackend:
+    """Interface: process(rgb) returns a Pose-like result for LandmarkBuffer.update().
+
+    `uses_image` is False for backends that ignore the pixels, so stages
+    that transform the frame first (ROI cropping) can skip that work.
+    """
+
+    uses_image = True
+    # Rough resident memory of one instance, for pose pool accounting
+    memory_bytes = 0
+
+    def process(self, image):
+        raise NotImplementedError
+
+    def reset(self):
+        """Drop temporal tracking state, e.g. before an unrelated video."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MediaPipeBackend(PoseBackend):
+    """MediaPipe Pose; keyword arguments go to mp.solutions.pose.Pose."""
+
+    # Approximate graph + model + tensor arena size by model_complexity (lite, full, heavy)
+    MEMORY_ESTIMATE = {0: 25 << 20, 1: 35 << 20, 2: 80 << 20}
+
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5, **kwargs):
+        import mediapipe as mp
+        self.memory_bytes = self.MEMORY_ESTIMATE.get(kwargs.get("model_complexity", 1), 35 << 20)
+        self._pose = mp.solutions.pose.Pose(min_detection_confidence=min_detection_confidence,
+                                            min_tracking_confidence=min_tracking_confidence, **kwargs)
+
+    def process(self, image):
+        return self._pose.process(image)
+
+    def reset(self):
+        self._pose.reset()
+
+    def close(self):
+        self._pose.close()
+
+
+# Standing, facing-the-camera rest pose in normalized image coordinates
+_REST_POSE = {
+    NOSE: (0.50, 0.22), LEFT_EYE: (0.52, 0.20), RIGHT_EYE: (0.48, 0.20),
+    LEFT_EAR: (0.55, 0.21), RIGHT_EAR: (0.45, 0.21),
+    MOUTH_LEFT: (0.51, 0.25), MOUTH_RIGHT: (0.49, 0.25),
+    LEFT_SHOULDER: (0.60, 0.32), RIGHT_SHOULDER: (0.40, 0.32),
+    LEFT_ELBOW: (0.63, 0.45), RIGHT_ELBOW: (0.37, 0.45),
+    LEFT_WRIST: (0.64, 0.58), RIGHT_WRIST: (0.36, 0.58),
+    LEFT_HIP: (0.56, 0.58), RIGHT_HIP: (0.44, 0.58),
+    LEFT_KNEE: (0.56, 0.74), RIGHT_KNEE: (0.44, 0.74),
+    LEFT_ANKLE: (0.56, 0.90), RIGHT_ANKLE: (0.44, 0.90),
+}
+
+
+def _rotate(v, degrees):
+    r = math.radians(degrees)
+    return np.array([v[0] * math.cos(r) - v[1] * math.sin(r), v[0] * math.sin(r) + v[1] * math.cos(r)])
+
+
+class SyntheticBackend(PoseBackend):
+    """Deterministic landmark trajectories for one exercise, one frame per process() call.
+
+    Each rep is a smooth rest -> peak -> rest cycle of `period` seconds at
+    `fps`, after `rest` seconds of standing still (so calibrating counters
+    get a baseline). `amplitude` scales the movement (1.0 = full rep),
+    `noise` is the standard deviation of Gaussian jitter added to x/y, and
+    `seed` makes the jitter reproducible. The image argument is ignored.
+    """
+
+    uses_image = False
+    EXERCISES = ("squat", "chin_tucks", "pelvic_tilts", "shoulder_shrugs",
+                 "hand_curls", "neck_rotations", "cat_cow")
+
+    def __init__(self, exercise="squat", fps=30.0, period=3.0, rest=1.5, amplitude=1.0,
+                 noise=0.0, seed=0, visibility=0.99):
+        if exercise not in self.EXERCISES:
+            raise ValueError(f"Unknown exercise {exercise!r}; expected one of {self.EXERCISES}")
+        self.exercise = exercise
+        self.fps = fps
+        self.period = period
+        self.rest = rest
+        self.amplitude = amplitude
+        self.noise = noise
+        self.seed = seed
+        self.visibility = visibility
+        self._base = np.full((NUM_LANDMARKS, 4), 0.5)
+        for index, xy in _REST_POSE.items():
+            self._base[index, :2] = xy
+        self._base[:, 2] = 0
+        self._base[:, 3] = visibility
+        self.reset()
+
+    def reset(self):
+        self.frame = 0
+        self._rng = np.random.default_rng(self.seed)
+
+    def phase(self, t):
+        """Movement progress at time t: 0 at rest, 1 at the peak of a rep."""
+        if t < self.rest:
+            return 0.0
+        return (1 - math.cos(2 * math.pi * (t - self.rest) / self.period)) / 2
+
+    def landmarks(self, t):
+        """Return the (33, 4) landmark array at time t (without noise)."""
+        lm = self._base.copy()
+        p = self.phase(t) * self.amplitude
+        getattr(self, f"_{self.exercise}")(lm, p, t)
+        return lm
+
+    def process(self, image=None):
+        t = self.frame / self.fps
+        self.frame += 1
+        lm = self.landmarks(t)
+        if self.noise:
+            lm[:, :2] += self._rng.normal(0, self.noise, (NUM_LANDMARKS, 2))
+        return PoseEstimate(lm.astype(np.float32))
+
+    # Per-exercise movements; `p` is the scaled phase, 0 (rest) to 1 (peak)
+
+    def _squat(self, lm, p, t):
+        # Side-on leg chain: knee angle 175 -> 85, hip angle 175 -> 95
+        knee_angle, hip_angle = 175 - 90 * p, 175 - 80 * p
+        for ankle, knee, hip, shoulder, dx in ((RIGHT_ANKLE, RIGHT_KNEE, RIGHT_HIP, RIGHT_SHOULDER, -0.01),
+                                               (LEFT_ANKLE, LEFT_KNEE, LEFT_HIP, LEFT_SHOULDER, 0.01)):
+            a = np.array([0.5 + dx, 0.90])
+            shin = _rotate(np.array([0.0, -0.16]), 30 * p)
+            k = a + shin
+            h = k + _rotate(-shin / np.linalg.norm(shin) * 0.16, -knee_angle)
+            thigh = (k - h) / np.linalg.norm(k - h)
+            s = h + _rotate(thigh * 0.26, hip_angle)
+            lm[ankle, :2], lm[knee, :2], lm[hip, :2], lm[shoulder, :2] = a, k, h, s
+
+    def _chin_tucks(self, lm, p, t):
+        lm[[NOSE, MOUTH_LEFT, MOUTH_RIGHT, LEFT_EYE, RIGHT_EYE], 1] += 0.09 * p
+
+    def _pelvic_tilts(self, lm, p, t):
+        lm[[LEFT_HIP, RIGHT_HIP], 1] += 0.05 * p
+
+    def _shoulder_shrugs(self, lm, p, t):
+        lm[[LEFT_SHOULDER, RIGHT_SHOULDER], 1] -= 0.05 * p
+
+    def _hand_curls(self, lm, p, t):
+        # Forearm swings up around the elbow: elbow angle 175 -> 20
+        elbow_angle = 175 - 155 * p
+        for shoulder, elbow, wrist, side in ((LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, 1),
+                                             (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, -1)):
+            upper = lm[shoulder, :2] - lm[elbow, :2]
+            forearm = _rotate(upper / np.linalg.norm(upper) * 0.13, side * elbow_angle)
+            lm[wrist, :2] = lm[elbow, :2] + forearm
+
+    def _neck_rotations(self, lm, p, t):
+        # One rep turns left then right: the nose swings by up to 70% of half the ear distance
+        if t < self.rest:
+            return
+        swing = math.sin(2 * math.pi * (t - self.rest) / self.period)
+        lm[[NOSE, MOUTH_LEFT, MOUTH_RIGHT, LEFT_EYE, RIGHT_EYE], 0] += 0.7 * 0.05 * swing * self.amplitude
+
+    def _cat_cow(self, lm, p, t):
+        # Arch then round: shoulders and hips move in opposite directions
+        if t < self.rest:
+            return
+        swing = math.sin(2 * math.pi * (t - self.rest) / self.period) * self.amplitude
+        lm[[LEFT_SHOULDER, RIGHT_SHOULDER], 1] -= 0.04 * swing
+        lm[[LEFT_HIP, RIGHT_HIP], 1] += 0.04 * swing
+
+
+BACKENDS = {"mediapipe": MediaPipeBackend, "synthetic": SyntheticBackend}
+
+
+def create_backend(kind=None, exercise=None, **kwargs):
+    """Create a pose backend by name (default: $POSE_BACKEND, else "mediapipe").
+
+    `exercise` selects the trajectory for the synthetic backend and is
+    ignored by MediaPipe; other keyword arguments go to the backend.
+    """
+    kind = kind or os.environ.get(BACKEND_ENV, "mediapipe")
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown pose backend {kind!r}; expected one of {sorted(BACKENDS)}")
+    if kind == "synthetic" and exercise is not None:
+        kwargs["exercise"] = exercise
+    return BACKENDS[kind](**kwargs)
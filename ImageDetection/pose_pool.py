@@ -0,0 +1,142 @@
+# pose_pool.py
+# -----------------------------
+# Pool of pre-warmed pose estimators for web-exercise-tracker.py.
+# A MediaPipe Pose graph must not be used by two threads at once and costs a
+# graph build plus model load to create, so each server worker builds a fixed
+# number of estimators at boot, runs one synthetic frame through each, and
+# requests check one out for the duration of a frame. Checkout waits at most
+# `timeout` seconds, then raises PoolExhausted (the app answers 503).
+#
+# Checkout prefers the estimator the same session used last, which keeps
+# MediaPipe's landmark tracking across that session's frames. An estimator
+# handed to a different session is reset first so it re-detects instead of
+# tracking the previous person.
+
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class PoolExhausted(TimeoutError):
+    """No pose estimator became free within the checkout timeout."""
+
+
+class _Estimator:
+    __slots__ = ("pose", "owner")
+
+    def __init__(self, pose):
+        self.pose = pose
+        self.owner = None
+
+
+class PosePool:
+    """Fixed-size pool of pose backends created by `factory()`.
+
+    Estimators are built and warmed by start(), which checkout() calls on
+    first use if it was not called at boot.
+    """
+
+    def __init__(self, factory, size=4, timeout=2.0, warmup_shape=(480, 640, 3)):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.warmup_shape = warmup_shape
+        self._idle = []
+        self._cond = threading.Condition()
+        self._started = False
+        self.checkouts = 0
+        self.affinity_hits = 0
+        self.resets = 0
+        self.waits = 0
+        self.exhausted = 0
+        self.wait_s = 0.0
+        self.warmup_s = None
+        self._pose_memory = 0
+
+    def start(self):
+        """Build all estimators and run one synthetic frame through each."""
+        with self._cond:
+            if self._started:
+                return
+            start = time.perf_counter()
+            frame = np.zeros(self.warmup_shape, dtype=np.uint8)
+            for _ in range(self.size):
+                pose = self.factory()
+                pose.process(frame)
+                # The warm-up frame is not a person; start tracking from scratch
+                pose.reset()
+                self._idle.append(_Estimator(pose))
+                self._pose_memory = getattr(pose, "memory_bytes", 0)
+            self.warmup_s = time.perf_counter() - start
+            self._started = True
+            self._cond.notify_all()
+
+    @contextmanager
+    def checkout(self, owner=None, timeout=None):
+        """Yield a pose backend for exclusive use; raises PoolExhausted after `timeout` s."""
+        estimator = self._acquire(owner, self.timeout if timeout is None else timeout)
+        try:
+            yield estimator.pose
+        finally:
+            with self._cond:
+                self._idle.append(estimator)
+                self._cond.notify()
+
+    def _acquire(self, owner, timeout):
+        if not self._started:
+            self.start()
+        with self._cond:
+            if not self._idle:
+                self.waits += 1
+                start = time.perf_counter()
+                available = self._cond.wait_for(lambda: self._idle, timeout)
+                self.wait_s += time.perf_counter() - start
+                if not available:
+                    self.exhausted += 1
+                    raise PoolExhausted(f"All {self.size} pose estimators busy for {timeout:.1f} s")
+            self.checkouts += 1
+            # Same session as last time: keep its tracking context
+            for i, estimator in enumerate(self._idle):
+                if owner is not None and estimator.owner == owner:
+                    self.affinity_hits += 1
+                    return self._idle.pop(i)
+            # Otherwise the longest-idle one, reset if it was tracking someone else
+            estimator = self._idle.pop(0)
+        if estimator.owner is not None and estimator.owner != owner:
+            estimator.pose.reset()
+            self.resets += 1
+        estimator.owner = owner
+        return estimator
+
+    def memory_bytes(self):
+        """Estimated memory held by the pool's estimators."""
+        return self._pose_memory * self.size if self._started else 0
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "started": self._started,
+                "warmup_s": self.warmup_s,
+                "timeout_s": self.timeout,
+                "checkouts": self.checkouts,
+                "affinity_hits": self.affinity_hits,
+                "resets": self.resets,
+                "waits": self.waits,
+                "wait_s": round(self.wait_s, 3),
+                "exhausted": self.exhausted,
+                "memory_bytes": self.memory_bytes(),
+            }
+
+    def close(self):
+        """Close the idle estimators (call once requests have drained)."""
+        with self._cond:
+            estimators, self._idle = self._idle, []
+            self._started = False
+        for estimator in estimators:
+            estimator.pose.close()
@@ -0,0 +1,116 @@
+# roi.py
+# -----------------------------
+# Region-of-interest pose inference.
+# Instead of the whole camera frame, MediaPipe gets a fixed-size square crop
+# around where the body was on the previous frame, so inference cost no
+# longer depends on the camera resolution. Landmarks are mapped back to
+# full-frame coordinates; when tracking is lost the whole frame is used.
+
+import cv2
+import numpy as np
+
+from frame_buffers import RGBBuffer
+from landmarks import LandmarkBuffer, PoseEstimate
+
+
+class RoiInference:
+    """Inference stage that runs `pose` on a padded crop around the last pose.
+
+    A drop-in replacement for pipeline.pose_inference(pose). Returns a
+    PoseEstimate with landmarks in full-frame normalized coordinates, or the
+    Pose result itself when no pose was found. The square region is kept
+    still while the body stays inside it, which keeps MediaPipe's own
+    frame-to-frame tracking stable.
+    """
+
+    def __init__(self, pose, size=256, padding=0.25, min_visibility=0.5, shrink=0.7):
+        self.pose = pose
+        self.size = size
+        self.padding = padding
+        self.min_visibility = min_visibility
+        self.shrink = shrink
+        self.region = None
+        self.crops = 0
+        self.full_frames = 0
+        self._results = None
+        self._input = np.zeros((size, size, 3), dtype=np.uint8)
+        self._rgb = RGBBuffer()
+        self._buffer = LandmarkBuffer()
+
+    def __call__(self, frame):
+        if not getattr(self.pose, "uses_image", True):
+            # Backend ignores the pixels (synthetic): nothing to crop
+            return self.pose.process(frame)
+        h, w = frame.shape[:2]
+        if self.region is not None:
+            self.crops += 1
+            estimate = self._infer(frame, self.region)
+            if estimate is not None:
+                return estimate
+        # No previous pose or tracking lost in the crop: look at the whole frame
+        self.full_frames += 1
+        side = max(w, h)
+        estimate = self._infer(frame, ((w - side) // 2, (h - side) // 2, side))
+        return estimate if estimate is not None else self._results
+
+    def _infer(self, frame, region):
+        """Run the model on `region` (x0, y0, side in pixels); None if no pose was found."""
+        h, w = frame.shape[:2]
+        x0, y0, side = region
+        scale = self.size / side
+
+        # Part of the square inside the frame, and where it lands in the input
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x0 + side, w), min(y0 + side, h)
+        ix0, iy0 = int((fx0 - x0) * scale), int((fy0 - y0) * scale)
+        ix1 = max(ix0 + 1, min(self.size, int(round((fx1 - x0) * scale))))
+        iy1 = max(iy0 + 1, min(self.size, int(round((fy1 - y0) * scale))))
+
+        if (ix0, iy0, ix1, iy1) != (0, 0, self.size, self.size):
+            self._input[:] = 0
+        target = self._input[iy0:iy1, ix0:ix1]
+        cv2.resize(frame[fy0:fy1, fx0:fx1], (ix1 - ix0, iy1 - iy0), dst=target,
+                   interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+        self._results = self.pose.process(self._rgb.convert(self._input))
+        if not self._buffer.update(self._results):
+            self.region = None
+            return None
+
+        # Crop-normalized -> full-frame normalized coordinates
+        landmarks = self._buffer.data.copy()
+        landmarks[:, 0] = (x0 + landmarks[:, 0] * side) / w
+        landmarks[:, 1] = (y0 + landmarks[:, 1] * side) / h
+        landmarks[:, 2] *= side / w
+        self._update_region(landmarks, w, h)
+        return PoseEstimate(landmarks)
+
+    def _update_region(self, landmarks, w, h):
+        visible = landmarks[:, 3] >= self.min_visibility
+        if not visible.any():
+            self.region = None
+            return
+        xs = landmarks[visible, 0] * w
+        ys = landmarks[visible, 1] * h
+        x_min, x_max, y_min, y_max = xs.min(), xs.max(), ys.min(), ys.max()
+
+        extent = max(x_max - x_min, y_max - y_min)
+        if self.region is not None:
+            # Keep the region while the body, with half the padding, still fits
+            x0, y0, side = self.region
+            margin = extent * self.padding / 2
+            inside = (x_min - margin >= x0 and y_min - margin >= y0 and
+                      x_max + margin <= x0 + side and y_max + margin <= y0 + side)
+            if inside and extent * (1 + 2 * self.padding) >= self.shrink * side:
+                return
+
+        side = int(extent * (1 + 2 * self.padding))
+        side = max(side, self.size // 2, 1)
+        cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+        self.region = (int(cx - side / 2), int(cy - side / 2), side)
+
+    def report(self):
+        """Print how often the crop was used versus the full frame."""
+        total = self.crops + self.full_frames
+        print(f"ROI inference: {self.crops} crops, {self.full_frames} full-frame passes"
+              f" ({self.crops / total:.0%} cropped)" if total else "ROI inference: no frames")
@@ -0,0 +1,253 @@
+# sessions.py
+# -----------------------------
+# Per-session tracker registry for web-exercise-tracker.py.
+# Every client session gets its own ExerciseTracker, and with it its own
+# counter state, so counts never mix between users. (The web app lends pose
+# estimators from pose_pool.py with per-session affinity, which keeps
+# MediaPipe tracking one person across frames.) The registry is bounded:
+# least recently used sessions are evicted past `max_sessions` or past
+# `max_memory` bytes of session state, and sessions idle for longer than
+# `idle_ttl` seconds expire. Evicted trackers are closed, which releases any
+# pose backend they own.
+#
+# Session memory is measured, not estimated: a walk over the tracker's own
+# objects, containers and NumPy buffers on its first checkout and every
+# `measure_every` checkouts after. Shared pose models are not part of it;
+# the pose pool bounds those (POSE_POOL_SIZE estimators, see /api/pose_pool).
+
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Shared code and types, not per-session state
+_NOT_STATE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def state_bytes(obj):
+    """Measured size of `obj` and everything it holds (instance attributes, containers, arrays)."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _NOT_STATE):
+            continue
+        seen.add(id(item))
+        # NumPy arrays that own their data include it in their size
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)) or type(item).__name__ == "deque":
+            stack.extend(item)
+        else:
+            attrs = getattr(item, "__dict__", None)
+            if attrs is not None:
+                stack.append(attrs)
+            for slot in getattr(type(item), "__slots__", ()):
+                value = getattr(item, slot, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+
+class _Session:
+    __slots__ = ("exercise", "tracker", "lock", "last_used", "uses", "memory", "closed")
+
+    def __init__(self, exercise, tracker, now):
+        self.exercise = exercise
+        self.tracker = tracker
+        self.lock = threading.Lock()
+        self.last_used = now
+        self.uses = 0
+        self.memory = 0
+        self.closed = False
+
+
+class SessionRegistry:
+    """LRU + idle-TTL map from session id to that session's tracker.
+
+    `factory(exercise)` creates a tracker. A session that switches exercise
+    gets a fresh tracker. checkout() holds the session's lock while the
+    tracker is in use, so two requests of the same session never run the
+    (not thread-safe) pose graph concurrently; different sessions run in
+    parallel.
+    """
+
+    def __init__(self, factory, max_sessions=32, idle_ttl=300.0, max_memory=None, measure_every=64,
+                 clock=time.monotonic):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_memory = max_memory
+        self.measure_every = measure_every
+        self.clock = clock
+        self._sessions = OrderedDict()
+        # Sum of the sessions' last measured memory
+        self._memory = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @contextmanager
+    def checkout(self, session_id, exercise):
+        """Yield the tracker of `session_id` for `exercise`, creating it if needed."""
+        session = self._acquire(session_id, exercise)
+        try:
+            yield session.tracker
+        finally:
+            session.last_used = self.clock()
+            if session.uses % self.measure_every == 0:
+                self._measure(session_id, session)
+            session.uses += 1
+            session.lock.release()
+            # Catch up on evictions skipped while sessions were in use
+            self._close(self._evict())
+
+    def _acquire(self, session_id, exercise):
+        while True:
+            session = self._lookup(session_id, exercise)
+            session.lock.acquire()
+            if not session.closed:
+                return session
+            # Evicted between lookup and lock: look it up again
+            session.lock.release()
+
+    def _lookup(self, session_id, exercise):
+        stale = []
+        with self._lock:
+            now = self.clock()
+            stale += self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None and session.exercise == exercise:
+                self._sessions.move_to_end(session_id)
+                self.hits += 1
+            else:
+                if session is not None:
+                    stale.append(self._pop(session_id))
+                self.misses += 1
+                session = None
+        self._close(stale)
+
+        if session is None:
+            # Built outside the registry lock: creating a pose graph is slow
+            session = _Session(exercise, self.factory(exercise), self.clock())
+            with self._lock:
+                replaced = self._pop(session_id)
+                self._sessions[session_id] = session
+                stale = [replaced] if replaced is not None else []
+                stale += self._evict(locked=True)
+            self._close(stale)
+        return session
+
+    def _expire(self, now):
+        """Pop sessions idle for longer than idle_ttl (oldest first). Call with the lock held."""
+        expired = []
+        if self.idle_ttl is None:
+            return expired
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_ttl or session.lock.locked():
+                break
+            expired.append(self._pop(session_id))
+            self.expirations += 1
+        return expired
+
+    def _pop(self, session_id):
+        """Remove a session (None if absent), keeping the memory total. Call with the lock held."""
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._memory -= session.memory
+        return session
+
+    def _measure(self, session_id, session):
+        """Re-measure a checked-out session's memory (its lock is held)."""
+        memory = state_bytes(session.tracker)
+        with self._lock:
+            # Removed meanwhile: its old figure has already left the total
+            if self._sessions.get(session_id) is session:
+                self._memory += memory - session.memory
+                session.memory = memory
+
+    def _over(self, count, memory):
+        return count > self.max_sessions or (self.max_memory is not None and memory > self.max_memory)
+
+    def _evict(self, locked=False):
+        """Pop least recently used idle sessions until within max_sessions and max_memory."""
+        if not locked:
+            with self._lock:
+                return self._evict(locked=True)
+        count, memory = len(self._sessions), self._memory
+        if not self._over(count, memory):
+            return []
+        # Walk from the LRU head only as far as needed, skipping sessions in use,
+        # and never the most recent session: it is the one about to be used
+        newest = next(reversed(self._sessions))
+        victims = []
+        for session_id, session in self._sessions.items():
+            if not self._over(count, memory) or session_id == newest:
+                break
+            if not session.lock.locked():
+                victims.append(session_id)
+                count -= 1
+                memory -= session.memory
+        self.evictions += len(victims)
+        return [self._pop(session_id) for session_id in victims]
+
+    def _close(self, sessions):
+        for session in sessions:
+            # Wait for an in-flight request on the session before closing its graph
+            with session.lock:
+                session.closed = True
+                close = getattr(session.tracker, "close", None)
+                if close is not None:
+                    close()
+
+    def remove(self, session_id):
+        """End a session explicitly; returns False if it did not exist."""
+        with self._lock:
+            session = self._pop(session_id)
+        if session is None:
+            return False
+        self._close([session])
+        return True
+
+    def expire(self):
+        """Drop idle sessions now instead of on the next checkout."""
+        with self._lock:
+            expired = self._expire(self.clock())
+        self._close(expired)
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            now = self.clock()
+            sessions = [{"exercise": s.exercise, "idle_s": round(now - s.last_used, 1), "memory_bytes": s.memory}
+                        for s in self._sessions.values()]
+            return {
+                "sessions": len(sessions),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_s": self.idle_ttl,
+                "memory_bytes": self._memory,
+                "max_memory_bytes": self.max_memory,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "by_session": sessions,
+            }
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._memory = 0
+        self._close(sessions)
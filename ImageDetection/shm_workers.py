@@ -0,0 +1,342 @@
+# shm_workers.py
+# -----------------------------
+# Multi-process pose inference fed through shared-memory frame slots.
+# The web front end copies each decoded BGR frame into a free slot of one
+# multiprocessing.shared_memory block and queues only the slot number and
+# frame shape. Worker processes (one pose estimator each) read the slot in
+# place, run pose estimation and send back the (33, 4) landmark array, so no
+# pixel data is ever pickled and the Python work around MediaPipe runs
+# outside the front end's GIL. Counters and drawing stay in the front end.
+#
+# Frames of one session always go to the same worker, which keeps
+# MediaPipe's landmark tracking on that person; a worker that switches
+# sessions resets its tracking first.
+#
+# Each worker has its own task and result queues, so a worker that hangs or
+# dies can be killed and replaced without touching the others: its frame
+# slots are freed, its waiting requests fail with PoolExhausted (503) right
+# away and the next frame for it goes to a fresh process. A worker that dies
+# on its own is noticed by its result collector and replaced the same way.
+
+import itertools
+import multiprocessing as mp
+import queue
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from landmarks import LandmarkBuffer, PoseEstimate
+from pose_pool import PoolExhausted
+
+
+def _attach(name):
+    """Attach to the front end's block; only the front end tracks and unlinks it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Spawned children share the parent's resource tracker, so registering again is harmless
+    return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(shm_name, slot_bytes, tasks, results, backend, backend_kwargs):
+    """Worker process: slot in, landmarks out, until a None task arrives."""
+    import cv2
+    from frame_buffers import RGBBuffer
+    from pose_backends import create_backend
+
+    # One process per core; keep OpenCV from spawning its own thread pool on top
+    cv2.setNumThreads(1)
+    shm = _attach(shm_name)
+    pose = create_backend(backend, **backend_kwargs)
+    rgb = RGBBuffer()
+    landmarks = LandmarkBuffer()
+    owner = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            job_id, slot, shape, session = task
+            try:
+                if session != owner:
+                    pose.reset()
+                    owner = session
+                start = time.perf_counter()
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                detected = landmarks.update(pose.process(rgb.convert(frame)))
+                del frame
+                results.put((job_id, landmarks.data.copy() if detected else None, None,
+                             time.perf_counter() - start))
+            except Exception as e:
+                results.put((job_id, None, f"{type(e).__name__}: {e}", 0.0))
+    finally:
+        pose.close()
+        shm.close()
+
+
+class _Worker:
+    __slots__ = ("index", "proc", "tasks", "results", "collector")
+
+    def __init__(self, index, proc, tasks, results, collector):
+        self.index = index
+        self.proc = proc
+        self.tasks = tasks
+        self.results = results
+        self.collector = collector
+
+
+class InferenceWorkerPool:
+    """Pose estimation on `workers` processes through `slots` shared frame slots.
+
+    infer(frame, owner) blocks until the landmarks for that frame are back
+    and returns a PoseEstimate-like result for LandmarkBuffer.update().
+    Frames may be at most `max_shape` (height, width, 3). Waiting longer
+    than `timeout` seconds for a free slot raises PoolExhausted, and so does
+    a worker that does not answer within `result_timeout`: that worker is
+    killed and restarted, and its slots are freed. A worker that dies is
+    restarted as soon as its collector notices, failing its pending frames.
+
+    `on_busy(seconds)` is called with each frame's inference time inside
+    its worker (no queueing), e.g. capture_profile.LoadMonitor.record.
+    """
+
+    def __init__(self, workers=2, slots=None, max_shape=(720, 1280, 3), timeout=2.0,
+                 result_timeout=30.0, backend=None, on_busy=None, **backend_kwargs):
+        self.workers = workers
+        self.slots = slots or 2 * workers
+        self.max_shape = tuple(max_shape)
+        self.slot_bytes = int(np.prod(self.max_shape))
+        self.timeout = timeout
+        self.result_timeout = result_timeout
+        self.backend = backend
+        self.on_busy = on_busy
+        self.backend_kwargs = backend_kwargs
+        self._ctx = None
+        self._shm = None
+        self._workers = []
+        self._free = []
+        self._cond = threading.Condition()
+        # Guards start/close/restart of the worker processes
+        self._state = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.waits = 0
+        self.exhausted = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def start(self):
+        """Allocate the shared slots and start the worker processes."""
+        with self._state:
+            if self._shm is None:
+                self._start()
+
+    def _start(self):
+        # Spawned, not forked: the parent may already run MediaPipe or server threads
+        self._ctx = mp.get_context("spawn")
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        with self._cond:
+            self._free = list(range(self.slots))
+        try:
+            for i in range(self.workers):
+                self._workers.append(self._spawn(i))
+        except BaseException:
+            self._stop_workers()
+            raise
+
+    def _spawn(self, index):
+        tasks, results = self._ctx.Queue(), self._ctx.Queue()
+        proc = self._ctx.Process(target=_worker_main, name=f"pose-worker-{index}", daemon=True,
+                                 args=(self._shm.name, self.slot_bytes, tasks, results,
+                                       self.backend, self.backend_kwargs))
+        proc.start()
+        worker = _Worker(index, proc, tasks, results, None)
+        worker.collector = threading.Thread(target=self._collect, args=(worker,), name=f"pose-results-{index}",
+                                            daemon=True)
+        worker.collector.start()
+        return worker
+
+    def _collect(self, worker):
+        """Hand the worker's results to their futures until it has exited and nothing is left."""
+        while True:
+            try:
+                item = worker.results.get(timeout=0.5)
+            except queue.Empty:
+                if worker.proc.is_alive():
+                    continue
+                break
+            except (EOFError, OSError, ValueError):
+                # Queue broken by a killed worker
+                break
+            job_id, landmark_array, error, busy_s = item
+            if self.on_busy is not None:
+                self.on_busy(busy_s)
+            with self._lock:
+                job = self._pending.pop(job_id, None)
+            if job is None:
+                # Given up on (timeout or worker restart); its slot is already free
+                continue
+            future, slot, _ = job
+            self._release(slot)
+            if error:
+                future.set_exception(RuntimeError(f"Pose worker failed: {error}"))
+            else:
+                future.set_result(landmark_array)
+        # Died on its own (not stopped by close(), which empties _workers first):
+        # fail its pending frames now instead of after result_timeout
+        if worker in self._workers:
+            self._restart(worker, f"exited with code {worker.proc.exitcode}")
+
+    def _restart(self, worker, reason):
+        """Kill `worker` (if it is still the current one), fail its jobs and start a replacement."""
+        with self._state:
+            self._replace(worker, reason)
+
+    def _replace(self, worker, reason):
+        """_restart() with the state lock held; returns the current worker for that index."""
+        if self._shm is None:
+            return None
+        if self._workers[worker.index] is not worker:
+            return self._workers[worker.index]
+        worker.proc.kill()
+        worker.proc.join(timeout=5)
+        # A killed worker may have died holding a queue lock: never wait on its queues again
+        worker.tasks.cancel_join_thread()
+        worker.results.cancel_join_thread()
+        with self._lock:
+            jobs = [job_id for job_id, (_, _, owner) in self._pending.items() if owner is worker]
+            failed = [self._pending.pop(job_id) for job_id in jobs]
+            self.restarts += 1
+        # The killed process can no longer touch these slots
+        for future, slot, _ in failed:
+            self._release(slot)
+            future.set_exception(PoolExhausted(f"Pose worker {worker.index} {reason}; retry the frame"))
+        self._workers[worker.index] = self._spawn(worker.index)
+        return self._workers[worker.index]
+
+    def _acquire(self, timeout):
+        with self._cond:
+            if not self._free:
+                self.waits += 1
+                if not self._cond.wait_for(lambda: self._free, timeout):
+                    self.exhausted += 1
+                    raise PoolExhausted(f"All {self.slots} frame slots busy for {timeout:.1f} s")
+            return self._free.pop()
+
+    def _release(self, slot):
+        with self._cond:
+            self._free.append(slot)
+            self._cond.notify()
+
+    def submit(self, frame, owner=None):
+        """Queue a BGR frame for inference; returns a Future of the landmark array (or None)."""
+        return self._submit(frame, owner)[1]
+
+    def _submit(self, frame, owner):
+        if frame.dtype != np.uint8 or frame.ndim != 3 or frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {frame.shape} {frame.dtype} does not fit a {self.max_shape} uint8 slot")
+        self.start()
+        with self._lock:
+            job_id = next(self._ids)
+        # Stable session -> worker mapping keeps that session's tracking context
+        index = zlib.crc32(str(owner).encode()) % self.workers if owner is not None else job_id % self.workers
+        slot = self._acquire(self.timeout)
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        view[...] = frame
+        del view
+        future = Future()
+        # Pick the worker and queue to it under the state lock, so a restart cannot
+        # replace it in between and leave this job on the dead worker's queue
+        with self._state:
+            if self._shm is None:
+                self._release(slot)
+                raise PoolExhausted("Inference worker pool closed")
+            worker = self._workers[index]
+            if not worker.proc.is_alive():
+                worker = self._replace(worker, f"exited with code {worker.proc.exitcode}")
+            with self._lock:
+                self._pending[job_id] = (future, slot, worker)
+                self.frames += 1
+            worker.tasks.put((job_id, slot, frame.shape, owner))
+        return job_id, future, worker
+
+    def _abandon(self, job_id):
+        """Give up on a job: drop it and free its slot (unless a result or restart got there first)."""
+        with self._lock:
+            job = self._pending.pop(job_id, None)
+        if job is not None:
+            self._release(job[1])
+
+    def infer(self, frame, owner=None):
+        """Run pose estimation for one BGR frame on a worker and wait for the result."""
+        job_id, future, worker = self._submit(frame, owner)
+        try:
+            return PoseEstimate(future.result(timeout=self.result_timeout))
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            self._restart(worker, f"did not answer within {self.result_timeout:.1f} s")
+            # In case a result or a restart got to the job first
+            self._abandon(job_id)
+            if future.done() and future.exception() is None:
+                # The result made it in just before the restart
+                return PoseEstimate(future.result())
+            raise PoolExhausted(f"Pose worker {worker.index} did not answer within {self.result_timeout:.1f} s")
+
+    def stats(self):
+        with self._cond:
+            free = len(self._free)
+        workers = list(self._workers)
+        return {
+            "workers": self.workers,
+            "alive": sum(w.proc.is_alive() for w in workers),
+            "slots": self.slots,
+            "free_slots": free,
+            "slot_bytes": self.slot_bytes,
+            "frames": self.frames,
+            "waits": self.waits,
+            "exhausted": self.exhausted,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+    def close(self):
+        """Stop the workers and free the shared block."""
+        with self._state:
+            if self._shm is None:
+                return
+            self._stop_workers()
+
+    def _stop_workers(self):
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.tasks.put(None)
+        for worker in workers:
+            worker.proc.join(timeout=5)
+            if worker.proc.is_alive():
+                worker.proc.kill()
+                worker.proc.join(timeout=5)
+        # Collectors drain what is left and stop once their worker is gone;
+        # they take the slot condition to release slots, so join them without holding it
+        for worker in workers:
+            worker.collector.join(timeout=5)
+        with self._lock:
+            failed, self._pending = list(self._pending.values()), {}
+        for future, _, _ in failed:
+            future.set_exception(PoolExhausted("Inference worker pool closed"))
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,154 @@
+# stream_session.py
+# -----------------------------
+# One persistent streaming connection (WebSocket) of an exercise session.
+# Frames or landmarks arrive on the connection's receive loop and go into a
+# one-slot latest-frame-wins queue; a worker thread always processes the
+# newest input and sends back only the result fields that changed. When
+# inference is slower than the client's send rate, stale inputs are dropped
+# instead of queueing, so feedback latency stays flat under load.
+#
+# Client -> server messages:
+#   binary  8-byte little-endian float64 capture time t (client clock, ms),
+#           then the JPEG/WebP frame
+#   text    {"type": "landmarks", "t": ..., "landmarks": 33 x [x, y, z, v] | null}
+#           {"type": "displayed", "t": ..., "now": ...}  result for t shown at now
+#           {"type": "stats"}
+# Server -> client messages (JSON text):
+#   {"seq", "t", "server_ms", changed result fields...}, {"type": "stats", ...},
+#   {"error": ...}
+#
+# Glass-to-glass latency is capture-to-display on the client's own clock, so
+# the "displayed" acknowledgements need no clock synchronization.
+
+import json
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from pipeline import LatestFrameQueue
+
+_CAPTURE_TIME = struct.Struct("<d")
+RESULT_FIELDS = ("counter", "stage", "feedback", "gauge", "detected")
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    p50, p95 = np.percentile(values, [50, 95])
+    return {"p50": round(float(p50), 1), "p95": round(float(p95), 1), "max": round(float(max(values)), 1)}
+
+
+class StreamSession:
+    """Latest-frame-wins processing for one streaming connection.
+
+    `process(kind, t, payload)` handles one input ("frame" with encoded
+    bytes, or "landmarks" with a list/None) and returns a result record;
+    `send(text)` writes one text message to the client. Call receive() for
+    every incoming message and run() on a worker thread.
+    """
+
+    def __init__(self, process, send, history=300):
+        self.process = process
+        self._send = send
+        self._send_lock = threading.Lock()
+        self.queue = LatestFrameQueue(maxsize=1)
+        self._last = {}
+        self.seq = 0
+        self.received = 0
+        self.processed = 0
+        self.errors = 0
+        self.server_ms = deque(maxlen=history)
+        self.glass_to_glass_ms = deque(maxlen=history)
+
+    def send(self, message):
+        with self._send_lock:
+            self._send(json.dumps(message, separators=(",", ":")))
+
+    def receive(self, message):
+        """Handle one message from the client (bytes or str)."""
+        if isinstance(message, (bytes, bytearray)):
+            if len(message) <= _CAPTURE_TIME.size:
+                self.send({"error": "Binary frames start with an 8-byte capture time"})
+                return
+            (t,) = _CAPTURE_TIME.unpack_from(message)
+            self._enqueue("frame", t, memoryview(message)[_CAPTURE_TIME.size:])
+            return
+        try:
+            data = json.loads(message)
+        except ValueError:
+            self.send({"error": "Messages must be JSON text or binary frames"})
+            return
+        if not isinstance(data, dict):
+            self.send({"error": "Text messages must be JSON objects"})
+            return
+        kind = data.get("type")
+        if kind == "landmarks":
+            self._enqueue("landmarks", data.get("t"), data.get("landmarks"))
+        elif kind == "displayed":
+            t, now = data.get("t"), data.get("now")
+            if t is None or now is None:
+                return
+            if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (t, now)):
+                self.send({"error": "displayed t and now must be numbers (ms)"})
+                return
+            self.glass_to_glass_ms.append(float(now) - float(t))
+        elif kind == "stats":
+            self.send(dict(self.stats(), type="stats"))
+        else:
+            self.send({"error": f"Unknown message type {kind!r}"})
+
+    def _enqueue(self, kind, t, payload):
+        self.received += 1
+        # An unprocessed older input is dropped here (latest frame wins)
+        self.queue.put((kind, t, payload, time.perf_counter()))
+
+    def run(self):
+        """Worker loop: process the newest input until close()."""
+        while not self.queue.closed:
+            item = self.queue.get(timeout=0.5)
+            if item is None:
+                continue
+            kind, t, payload, arrived = item
+            try:
+                result = self.process(kind, t, payload)
+            except Exception as e:
+                self.errors += 1
+                message = {"t": t, "error": str(e)}
+            else:
+                self.processed += 1
+                message = self._delta(t, result, arrived)
+            try:
+                self.send(message)
+            except Exception:
+                # Connection gone; the receive loop will notice and clean up
+                self.close()
+
+    def _delta(self, t, result, arrived):
+        """Result message with only the fields that changed since the last one."""
+        self.seq += 1
+        server_ms = (time.perf_counter() - arrived) * 1000
+        self.server_ms.append(server_ms)
+        message = {"seq": self.seq, "t": t, "server_ms": round(server_ms, 1)}
+        for field in RESULT_FIELDS:
+            value = result.get(field)
+            if isinstance(value, float):
+                value = round(value, 1)
+            if field not in self._last or self._last[field] != value:
+                message[field] = self._last[field] = value
+        return message
+
+    def close(self):
+        self.queue.close()
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.queue.dropped,
+            "errors": self.errors,
+            "server_ms": _percentiles(list(self.server_ms)),
+            "glass_to_glass_ms": _percentiles(list(self.glass_to_glass_ms)),
+        }
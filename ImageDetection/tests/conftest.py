@@ -0,0 +1,9 @@
+# conftest.py
+# -----------------------------
+# The ImageDetection modules import each other as top-level modules
+# (scripts run from this directory), so put it on sys.path for the tests.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,20 @@
+# test_batch_analysis.py
+# -----------------------------
+# Output naming of the batch analysis tables.
+
+from batch_analysis import output_stems
+
+
+def test_unique_basenames_are_kept():
+    assert output_stems(["a/squat.mp4", "b/lunge.mov"]) == ["squat", "lunge"]
+
+
+def test_same_name_in_different_directories_gets_a_suffix():
+    stems = output_stems(["day1/patient.mp4", "day2/patient.mp4", "day3/patient.avi"])
+    assert stems == ["patient", "patient-2", "patient-3"]
+
+
+def test_suffixes_do_not_collide_with_real_names():
+    stems = output_stems(["a/clip.mp4", "b/clip.mp4", "clip-2.mp4", "c/Clip.mp4"])
+    assert len({stem.lower() for stem in stems}) == 4
+    assert stems[:2] == ["clip", "clip-2"]
@@ -0,0 +1,53 @@
+# test_capture_profile.py
+# -----------------------------
+# LoadMonitor utilization and the recommended capture profile.
+
+from capture_profile import PROFILES, LoadMonitor, recommend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_record_is_busy_time_over_window_and_capacity():
+    clock = Clock()
+    monitor = LoadMonitor(capacity=2, window=5.0, clock=clock)
+    monitor.record(2.5)
+    assert monitor.utilization() == 0.25
+    clock.now = 5.1
+    assert monitor.utilization() == 0.0
+
+
+def test_reject_counts_saturation_until_retry_only():
+    clock = Clock()
+    monitor = LoadMonitor(capacity=2, window=5.0, clock=clock)
+    monitor.reject(retry_after=1.0)
+    # One reject is one second of both processors busy, not a saturated window
+    assert monitor.utilization() == 0.2
+    assert recommend(monitor.utilization())["fps"] == PROFILES[0]["fps"]
+
+
+def test_overlapping_rejects_do_not_stack():
+    clock = Clock()
+    monitor = LoadMonitor(capacity=4, window=5.0, clock=clock)
+    for _ in range(50):
+        monitor.reject(retry_after=1.0)
+    assert monitor.rejected == 50
+    assert monitor.utilization() == 0.2
+    clock.now = 0.5
+    monitor.reject(retry_after=1.0)
+    assert monitor.utilization() == 0.3
+
+
+def test_sustained_rejects_saturate():
+    clock = Clock()
+    monitor = LoadMonitor(capacity=2, window=5.0, clock=clock)
+    for step in range(10):
+        clock.now = step * 0.5
+        monitor.reject(retry_after=1.0)
+    assert monitor.utilization() == 1.0
+    assert recommend(monitor.utilization())["fps"] == PROFILES[-1]["fps"]
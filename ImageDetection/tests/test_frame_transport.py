@@ -0,0 +1,56 @@
+# test_frame_transport.py
+# -----------------------------
+# Header sniffing, reduced decoding and the result envelope of the binary frame route.
+
+import numpy as np
+import pytest
+
+from frame_transport import decode_frame, encode_image, image_size, pack_envelope, reduction_for, unpack_envelope
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("fmt", ["jpeg", "webp"])
+def test_image_size_from_header(frame, fmt):
+    assert image_size(encode_image(frame, fmt)) == (640, 480)
+
+
+def test_image_size_of_garbage_is_none():
+    assert image_size(b"") is None
+    assert image_size(b"\xff\xd8\x00\x00not a jpeg at all") is None
+    assert image_size(b"RIFF\x00\x00\x00\x00WEBP") is None
+
+
+def test_reduced_decode_keeps_min_side(frame):
+    data = encode_image(frame, "jpeg", 90)
+    assert decode_frame(data).shape == (480, 640, 3)
+    assert reduction_for((640, 480), 240)[0] == 2
+    assert decode_frame(data, min_side=240).shape == (240, 320, 3)
+    # Never reduced below min_side
+    assert decode_frame(data, min_side=300).shape == (480, 640, 3)
+
+
+def test_undecodable_frames_are_none():
+    assert decode_frame(b"") is None
+    assert decode_frame(b"\xff\xd8 truncated") is None
+
+
+def test_unknown_format_is_rejected(frame):
+    with pytest.raises(ValueError):
+        encode_image(frame, "gif")
+
+
+def test_envelope_round_trip():
+    record = {"counter": 3, "stage": "up", "feedback": "Good"}
+    assert unpack_envelope(pack_envelope(record, b"\x01\x02")) == (record, b"\x01\x02")
+    assert unpack_envelope(memoryview(pack_envelope(record))) == (record, b"")
+
+
+@pytest.mark.parametrize("data", [b"", b"\x00\x00", b"\x00\x00\x00\x10{}"])
+def test_malformed_envelopes(data):
+    with pytest.raises(ValueError):
+        unpack_envelope(data)
@@ -0,0 +1,49 @@
+# test_kinematics.py
+# -----------------------------
+# joint_angles() against the per-script arctan2 formula it replaced.
+
+import numpy as np
+import pytest
+
+from kinematics import calculate_angle, joint_angles
+
+
+def reference_angle(a, b, c):
+    """The calculate_angle() the tracker scripts used to carry."""
+    a, b, c = np.array(a), np.array(b), np.array(c)
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+    return 360 - angle if angle > 180.0 else angle
+
+
+def test_right_and_straight_angles():
+    assert calculate_angle((1, 0), (0, 0), (0, 1)) == pytest.approx(90.0)
+    assert calculate_angle((-1, 0), (0, 0), (1, 0)) == pytest.approx(180.0)
+    assert calculate_angle((1, 0), (0, 0), (1, 0)) == pytest.approx(0.0)
+
+
+def test_matches_reference_formula():
+    rng = np.random.default_rng(0)
+    triplets = rng.random((500, 3, 2))
+    expected = [reference_angle(*t) for t in triplets]
+    np.testing.assert_allclose(joint_angles(triplets), expected, atol=1e-9)
+
+
+def test_leading_shape_and_out_buffer():
+    triplets = np.random.default_rng(1).random((4, 5, 3, 2))
+    out = np.empty((4, 5))
+    result = joint_angles(triplets, out=out)
+    assert result is out
+    np.testing.assert_allclose(result[2], joint_angles(triplets[2]))
+    # The input is not modified by the in-place math
+    assert np.array_equal(triplets, np.random.default_rng(1).random((4, 5, 3, 2)))
+
+
+def test_degenerate_triplet_is_zero_not_nan():
+    assert joint_angles([((0, 0), (0, 0), (1, 1))])[0] == 0.0
+
+
+@pytest.mark.parametrize("shape", [(3, 2), (4, 2, 2), (4, 3, 3)])
+def test_rejects_bad_shapes(shape):
+    with pytest.raises(ValueError):
+        joint_angles(np.zeros(shape))
@@ -0,0 +1,86 @@
+# test_landmark_wire.py
+# -----------------------------
+# Round-trips and malformed input for the binary landmark window format.
+
+import numpy as np
+import pytest
+
+from landmark_wire import INT16_SCALE, decode_window, encode_window
+
+
+@pytest.fixture
+def window():
+    rng = np.random.default_rng(0)
+    landmarks = rng.random((30, 33, 4), dtype=np.float32)
+    timestamps = 1700000000.0 + np.arange(30) / 30.0
+    detected = np.ones(30, bool)
+    detected[[3, 17]] = False
+    return landmarks, timestamps, detected
+
+
+@pytest.mark.parametrize("encoding, atol", [("int16", 0.5 / INT16_SCALE), ("float16", 1e-3)])
+def test_round_trip(window, encoding, atol):
+    landmarks, timestamps, detected = window
+    decoded, times, mask = decode_window(encode_window(landmarks, timestamps, detected, encoding))
+    assert decoded.shape == (30, 33, 4) and decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, landmarks, atol=atol)
+    # Millisecond offsets from t0
+    np.testing.assert_allclose(times, timestamps, atol=5e-4)
+    assert np.array_equal(mask, detected)
+
+
+def test_three_channels_decode_as_visible(window):
+    landmarks, timestamps, _ = window
+    decoded, _, mask = decode_window(encode_window(landmarks[..., :3], timestamps))
+    assert decoded.shape == (30, 33, 4)
+    assert np.all(decoded[..., 3] == 1.0) and mask.all()
+
+
+def test_empty_window():
+    decoded, times, mask = decode_window(encode_window(np.zeros((0, 33, 4)), []))
+    assert decoded.shape == (0, 33, 4) and len(times) == 0 and len(mask) == 0
+
+
+def test_out_of_range_values_saturate():
+    landmarks = np.full((1, 33, 4), 10.0, np.float32)
+    decoded, _, _ = decode_window(encode_window(landmarks, [0.0]))
+    assert np.all(decoded == pytest.approx(32767 / INT16_SCALE))
+
+
+@pytest.mark.parametrize("args", [
+    (np.zeros((33, 4)), [0.0]),            # not a window
+    (np.zeros((2, 33, 4)), [0.0]),         # one timestamp short
+    (np.zeros((3, 33, 4)), [0.0, 0.2, 0.1]), # timestamps go backwards
+    (np.zeros((2, 33, 4)), [0.0, np.nan]), # not a time
+    (np.zeros((2, 33, 4)), [0.0, 5e6]),    # offset does not fit u4 milliseconds
+])
+def test_encode_rejects_bad_input(args):
+    with pytest.raises(ValueError):
+        encode_window(*args)
+
+
+def test_encode_rejects_unknown_encoding():
+    with pytest.raises(ValueError):
+        encode_window(np.zeros((1, 33, 4)), [0.0], encoding="float64")
+
+
+def corrupt(data, index, value):
+    data = bytearray(data)
+    data[index] = value
+    return bytes(data)
+
+
+@pytest.mark.parametrize("make", [
+    lambda d: d[:10],                       # shorter than the header
+    lambda d: b"XX" + d[2:],                # wrong magic
+    lambda d: corrupt(d, 2, 9),             # unknown version
+    lambda d: corrupt(d, 3, 7),             # unknown encoding
+    lambda d: corrupt(d, 4, 17),            # wrong landmark count
+    lambda d: corrupt(d, 5, 2),             # wrong channel count
+    lambda d: d[:-1],                       # truncated block
+    lambda d: d + b"\x00",                  # trailing bytes
+])
+def test_decode_rejects_malformed_windows(window, make):
+    landmarks, timestamps, detected = window
+    with pytest.raises(ValueError):
+        decode_window(make(encode_window(landmarks, timestamps, detected)))
@@ -0,0 +1,170 @@
+# test_sessions.py
+# -----------------------------
+# SessionRegistry: per-session trackers, LRU eviction and idle expiry.
+
+import threading
+
+import numpy as np
+
+from sessions import SessionRegistry, state_bytes
+
+
+class Tracker:
+    def __init__(self, exercise):
+        self.exercise = exercise
+        self.closed = False
+        self.buffer = None
+
+    def close(self):
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_registry(**kwargs):
+    created = []
+
+    def factory(exercise):
+        created.append(Tracker(exercise))
+        return created[-1]
+
+    return SessionRegistry(factory, **kwargs), created
+
+
+def use(registry, session_id, exercise="squat"):
+    with registry.checkout(session_id, exercise) as tracker:
+        return tracker
+
+
+def test_sessions_keep_their_own_tracker():
+    registry, created = make_registry()
+    a, b = use(registry, "a"), use(registry, "b")
+    assert a is not b
+    assert use(registry, "a") is a
+    assert registry.stats()["hits"] == 1 and registry.stats()["misses"] == 2
+
+
+def test_switching_exercise_replaces_the_tracker():
+    registry, _ = make_registry()
+    squat = use(registry, "a", "squat")
+    curls = use(registry, "a", "hand_curls")
+    assert curls is not squat and squat.closed
+    assert len(registry) == 1
+
+
+def test_lru_eviction_closes_the_oldest():
+    registry, created = make_registry(max_sessions=2)
+    use(registry, "a")
+    use(registry, "b")
+    use(registry, "a")  # b is now least recently used
+    use(registry, "c")
+    assert len(registry) == 2
+    assert [t.closed for t in created] == [False, True, False]
+    assert registry.stats()["evictions"] == 1
+
+
+def test_in_use_session_is_not_evicted():
+    registry, created = make_registry(max_sessions=1)
+    with registry.checkout("busy", "squat") as busy:
+        use(registry, "other")
+        # Over the bound while "busy" is checked out: nothing could be evicted
+        assert not busy.closed and len(registry) == 2
+    # Caught up once it is released
+    assert len(registry) == 1 and busy.closed
+
+
+def test_idle_sessions_expire():
+    clock = Clock()
+    registry, created = make_registry(idle_ttl=10.0, clock=clock)
+    use(registry, "a")
+    clock.now = 5.0
+    use(registry, "b")
+    clock.now = 12.0
+    assert registry.expire() == 1
+    assert created[0].closed and not created[1].closed
+    clock.now = 100.0
+    use(registry, "c")  # expiry also runs on lookup
+    assert len(registry) == 1 and registry.stats()["expirations"] == 2
+
+
+def test_same_session_requests_are_serialized():
+    registry, _ = make_registry()
+    inside, overlaps = [], []
+
+    def request():
+        with registry.checkout("a", "squat"):
+            if inside:
+                overlaps.append(True)
+            inside.append(True)
+            threading.Event().wait(0.01)
+            inside.pop()
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not overlaps
+
+
+def test_remove_and_close():
+    registry, created = make_registry()
+    use(registry, "a")
+    use(registry, "b")
+    assert registry.remove("a") and not registry.remove("a")
+    registry.close()
+    assert len(registry) == 0 and all(t.closed for t in created)
+
+
+def test_state_bytes_counts_owned_arrays_and_containers():
+    tracker = Tracker("squat")
+    empty = state_bytes(tracker)
+    tracker.buffer = np.zeros(1000, np.float64)
+    assert state_bytes(tracker) >= empty + 8000
+    tracker.buffer = [np.zeros(10), {"history": list(range(100))}]
+    assert state_bytes(tracker) > empty + 100 * 28
+
+
+def test_memory_bound_evicts_least_recently_used():
+    registry, created = make_registry(max_memory=10**9, measure_every=1)
+    for session_id in "abc":
+        use(registry, session_id)
+    per_session = registry.stats()["memory_bytes"] // 3
+    assert per_session > 0 and not any(t.closed for t in created)
+
+    registry.max_memory = per_session * 2 + per_session // 2
+    use(registry, "c")
+    assert len(registry) == 2 and created[0].closed
+    assert registry.stats()["memory_bytes"] <= registry.max_memory
+
+
+def test_growing_session_is_remeasured():
+    registry, created = make_registry(measure_every=2)
+    with registry.checkout("a", "squat") as tracker:
+        tracker.buffer = np.zeros(10000)
+    first = registry.stats()["memory_bytes"]
+    assert first > 80000
+    with registry.checkout("a", "squat") as tracker:
+        tracker.buffer = None
+    # Second checkout is not a measuring one
+    assert registry.stats()["memory_bytes"] == first
+    use(registry, "a")
+    assert registry.stats()["memory_bytes"] < first
+
+
+def test_memory_total_follows_removals():
+    registry, _ = make_registry(measure_every=1)
+    use(registry, "a")
+    use(registry, "b")
+    registry.remove("a")
+    assert registry.stats()["memory_bytes"] == registry.stats()["by_session"][0]["memory_bytes"]
+    use(registry, "b", "hand_curls")  # replaced tracker, not measured yet
+    assert registry.stats()["memory_bytes"] > 0
+    registry.close()
+    assert registry.stats()["memory_bytes"] == 0
@@ -0,0 +1,48 @@
+# test_shm_workers.py
+# -----------------------------
+# InferenceWorkerPool: results through shared memory and worker restarts
+# (real spawned processes running the synthetic pose backend).
+
+import os
+import signal
+import sys
+
+import numpy as np
+import pytest
+
+from pose_pool import PoolExhausted
+from shm_workers import InferenceWorkerPool
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs SIGSTOP")
+
+
+@pytest.fixture
+def pool():
+    with InferenceWorkerPool(workers=1, max_shape=(48, 64, 3), result_timeout=30.0,
+                             backend="synthetic") as pool:
+        yield pool
+
+
+def frame():
+    return np.zeros((48, 64, 3), np.uint8)
+
+
+def test_infer_returns_landmarks(pool):
+    assert pool.infer(frame(), owner="a").landmark_array.shape == (33, 4)
+    assert pool.stats()["free_slots"] == pool.slots
+
+
+def test_dead_worker_fails_pending_frames_without_waiting(pool):
+    pool.infer(frame(), owner="a")
+    proc = pool._workers[0].proc
+    # Frozen, so the frame stays pending; then killed with it still queued
+    os.kill(proc.pid, signal.SIGSTOP)
+    future = pool.submit(frame(), owner="a")
+    os.kill(proc.pid, signal.SIGKILL)
+    # Well before result_timeout
+    with pytest.raises(PoolExhausted):
+        future.result(timeout=10)
+    assert pool.stats()["restarts"] == 1
+    assert pool.stats()["free_slots"] == pool.slots
+    # The replacement worker serves the next frame
+    assert pool.infer(frame(), owner="a").landmark_array.shape == (33, 4)
@@ -0,0 +1,95 @@
+# test_stream_session.py
+# -----------------------------
+# StreamSession message handling: bad input is answered, not fatal;
+# results go out as deltas.
+
+import json
+import struct
+import threading
+
+import pytest
+
+from stream_session import StreamSession
+
+
+def make_session(process=None):
+    sent = []
+    session = StreamSession(process or (lambda kind, t, payload: {}), lambda text: sent.append(json.loads(text)))
+    return session, sent
+
+
+@pytest.mark.parametrize("message", [
+    b"\x00\x01",                                            # binary without a capture time
+    "not json",
+    "[]",
+    '"x"',
+    '{"type": "nope"}',
+    '{"type": "displayed", "t": "a", "now": 5}',
+    '{"type": "displayed", "t": 1, "now": true}',
+])
+def test_bad_messages_get_an_error_reply(message):
+    session, sent = make_session()
+    session.receive(message)
+    assert len(sent) == 1 and "error" in sent[0]
+    assert session.received == 0 and not session.glass_to_glass_ms
+
+
+def test_displayed_records_glass_to_glass():
+    session, sent = make_session()
+    session.receive('{"type": "displayed", "t": 1000, "now": 1085.5}')
+    session.receive('{"type": "displayed", "t": 1000}')
+    assert list(session.glass_to_glass_ms) == [85.5] and not sent
+
+
+def test_latest_input_wins_and_results_are_deltas():
+    results = iter([{"counter": 1, "stage": "up"}, {"counter": 1, "stage": "down"}])
+    session, sent = make_session(lambda kind, t, payload: next(results))
+    # Three inputs before the worker runs: only the newest is processed
+    for t in (1.0, 2.0, 3.0):
+        session.receive(struct.pack("<d", t) + b"jpeg")
+    session.receive('{"type": "landmarks", "t": 4.0, "landmarks": null}')
+    worker = threading.Thread(target=session.run)
+    worker.start()
+    while session.processed < 1:
+        threading.Event().wait(0.01)
+    session.receive('{"type": "landmarks", "t": 5.0, "landmarks": null}')
+    while session.processed < 2:
+        threading.Event().wait(0.01)
+    session.close()
+    worker.join()
+
+    assert [m["t"] for m in sent] == [4.0, 5.0]
+    assert sent[0]["counter"] == 1 and sent[0]["stage"] == "up"
+    assert "counter" not in sent[1] and sent[1]["stage"] == "down"
+    assert session.stats()["dropped"] == 3
+
+
+def test_processing_errors_are_reported():
+    def fail(kind, t, payload):
+        raise RuntimeError("boom")
+
+    session, sent = make_session(fail)
+    session.receive('{"type": "landmarks", "t": 1.0, "landmarks": null}')
+    worker = threading.Thread(target=session.run)
+    worker.start()
+    while not sent:
+        threading.Event().wait(0.01)
+    session.close()
+    worker.join()
+    assert sent == [{"t": 1.0, "error": "boom"}] and session.errors == 1
+
+
+def test_error_reply_to_a_closed_socket_ends_the_session():
+    def fail(kind, t, payload):
+        raise RuntimeError("boom")
+
+    def gone(text):
+        raise ConnectionError("socket closed")
+
+    session = StreamSession(fail, gone)
+    session.receive('{"type": "landmarks", "t": 1.0, "landmarks": null}')
+    worker = threading.Thread(target=session.run)
+    worker.start()
+    worker.join(timeout=5)
+    # The worker closed the session instead of dying on the send
+    assert not worker.is_alive() and session.queue.closed and session.errors == 1
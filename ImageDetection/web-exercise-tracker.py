@@ -1,54 +1,166 @@
 # ============== Backend Implementation (app.py) ==============
-from flask import Flask, render_template, Response, request, jsonify
+from flask import Flask, render_template, Response, request, jsonify, g
 import cv2
 import numpy as np
-import mediapipe as mp
-import importlib.util
 import os
-import sys
 import json
 import base64
 from flask_cors import CORS
 import logging
+import threading
+import uuid
+
+from capture_profile import LoadMonitor, recommend
+from exercise_registry import ExerciseRegistry
+from frame_transport import ENVELOPE_MIMETYPE, IMAGE_FORMATS, decode_frame, encode_image, pack_envelope
+from pose_backends import create_backend
+from pose_pool import PosePool, PoolExhausted
+from sessions import SessionRegistry
+from shm_workers import InferenceWorkerPool
+from stream_session import StreamSession
+
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)  # Enable cross-origin requests
+CORS(app, expose_headers=['X-Session-ID'])  # Enable cross-origin requests; clients may read issued session ids
+
+# Path to the directory containing exercise model modules (next to this file)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exercise_models')
+
+# Exercise tracker classes, imported once and reloaded when their file changes
+exercise_models = ExerciseRegistry(MODELS_DIR)
+
+# Pre-warmed pose estimators shared by all sessions of this worker;
+# size it to the number of request threads (gunicorn --threads)
+pose_pool = PosePool(
+    create_backend,
+    size=int(os.environ.get('POSE_POOL_SIZE', 4)),
+    timeout=float(os.environ.get('POSE_POOL_TIMEOUT', 2.0))
+)
+
+# With INFERENCE_WORKERS > 0 pose estimation runs in that many worker processes
+# fed through shared-memory frame slots instead of the in-process pool
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 0))
+
+# Busy time of the frame processors, behind the recommended capture profile
+load_monitor = LoadMonitor(capacity=INFERENCE_WORKERS or pose_pool.size)
+# Seconds a client turned away with a 503 should wait (sent as Retry-After)
+RETRY_AFTER = 1
 
-# Dictionary to store loaded exercise models
-exercise_models = {}
+inference_workers = InferenceWorkerPool(
+    workers=INFERENCE_WORKERS,
+    timeout=float(os.environ.get('POSE_POOL_TIMEOUT', 2.0)),
+    on_busy=load_monitor.record
+) if INFERENCE_WORKERS > 0 else None
 
-# Path to the directory containing exercise model modules
-MODELS_DIR = 'exercise_models'
+# Uploaded frames are decoded at reduced scale down to this short side (the pose model's input size)
+DECODE_MIN_SIDE = int(os.environ.get('DECODE_MIN_SIDE', 256))
 
-def load_exercise_module(exercise_name):
-    """Dynamically load an exercise module from the models directory"""
+# JPEG/WebP quality of low-quality preview images
+PREVIEW_QUALITY = int(os.environ.get('PREVIEW_QUALITY', 40))
+
+# One tracker (counter state) per client session; frames borrow a pose estimator from the pool
+sessions = SessionRegistry(
+    lambda exercise_name: exercise_models.get(exercise_name)(),
+    max_sessions=int(os.environ.get('MAX_SESSIONS', 32)),
+    idle_ttl=float(os.environ.get('SESSION_IDLE_TTL', 300)),
+    max_memory=int(float(os.environ.get('SESSION_MAX_MEMORY_MB', 64)) * (1 << 20))
+)
+
+def get_tracker_class(exercise_name):
+    """Return (tracker class, None) for an exercise, loading it on first use, or (None, error response)"""
     try:
-        # Construct path to the module file
-        module_path = os.path.join(MODELS_DIR, f"{exercise_name}.py")
-        
-        if not os.path.exists(module_path):
-            logger.error(f"Exercise module {exercise_name}.py not found")
-            return None
-            
-        # Create a module specification
-        module_name = f"exercise_models.{exercise_name}"
-        spec = importlib.util.spec_from_file_location(module_name, module_path)
-        
-        # Create the module
-        module = importlib.util.module_from_spec(spec)
-        sys.modules[module_name] = module
-        
-        # Execute the module
-        spec.loader.exec_module(module)
-        
-        logger.info(f"Successfully loaded module: {exercise_name}")
-        return module
-    except Exception as e:
-        logger.error(f"Error loading exercise module {exercise_name}: {str(e)}")
-        return None
+        return exercise_models.get(exercise_name), None
+    except KeyError:
+        logger.error(f"Exercise module {exercise_name}.py not found")
+        return None, (jsonify({'error': f'Exercise module {exercise_name} not found'}), 404)
+    except ImportError as e:
+        return None, (jsonify({'error': str(e)}), 500)
+
+# Cookie carrying the session id issued to clients that do not send one
+SESSION_COOKIE = 'exercise_session'
+
+def session_id(data=None):
+    """Identify the client session: X-Session-ID header, ?session=, JSON session_id or the issued cookie
+
+    There is deliberately no fallback to the client address: patients behind
+    one NAT or proxy would share a tracker and mix their rep counts.
+    """
+    return (request.headers.get('X-Session-ID')
+            or request.args.get('session')
+            or (data or {}).get('session_id')
+            or request.cookies.get(SESSION_COOKIE)
+            or None)
+
+@app.after_request
+def issue_session(response):
+    """Hand a newly issued session id back as a cookie and an X-Session-ID header"""
+    sid = g.pop('issued_session', None)
+    if sid:
+        response.headers['X-Session-ID'] = sid
+        response.set_cookie(SESSION_COOKIE, sid, httponly=True, samesite='Lax')
+    return response
+
+def track_frame(exercise_name, img, data=None, sid=None, image_every=1):
+    """Run a frame through the calling session's tracker; returns (result, None) or (None, error response)
+
+    The annotated image is drawn only on every `image_every`-th frame of the
+    session (never when 0); other frames skip rendering entirely.
+    """
+    sid = sid or session_id(data)
+    if not sid:
+        # Clients that predate session ids get one issued (see issue_session) instead of a 400
+        sid = g.issued_session = uuid.uuid4().hex
+    _, error = get_tracker_class(exercise_name)
+    if error:
+        return None, error
+    try:
+        with sessions.checkout(sid, exercise_name) as tracker:
+            draw = image_every > 0 and tracker.frames % image_every == 0
+            if inference_workers is not None:
+                # The workers report their own inference time to load_monitor
+                return tracker.process_result(img, inference_workers.infer(img, owner=sid), draw), None
+            # Timed only once an estimator is held: waiting for one is not busy time
+            with pose_pool.checkout(sid) as pose, load_monitor.measure():
+                return tracker.process_frame(img, pose, draw), None
+    except PoolExhausted as e:
+        load_monitor.reject(RETRY_AFTER)
+        logger.warning(str(e))
+        response = jsonify({'error': 'Server busy, retry shortly'})
+        response.headers['Retry-After'] = str(RETRY_AFTER)
+        return None, (response, 503)
+
+def result_record(result, landmarks=False):
+    """The JSON-serializable part of a tracker result (with the landmarks if asked for)"""
+    record = {
+        'counter': result['counter'],
+        'feedback': result['feedback'],
+        'stage': result['stage'],
+        'gauge': result['gauge'],
+        'detected': result['detected'],
+        'metrics': result['metrics']
+    }
+    if landmarks:
+        lm = result['landmarks']
+        record['landmarks'] = None if lm is None else lm.round(4).tolist()
+    return record
+
+def flag(value):
+    """Truthy request parameter: true/1/yes (JSON booleans pass through)"""
+    return value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes')
+
+def response_image(image, fmt, quality, preview):
+    """Encode the annotated frame; a preview is half size at low quality"""
+    if preview:
+        image = cv2.resize(image, (image.shape[1] // 2, image.shape[0] // 2), interpolation=cv2.INTER_AREA)
+        quality = min(quality, PREVIEW_QUALITY)
+    return encode_image(image, fmt, quality)
 
 # Routes for web application
 @app.route('/')
@@ -64,62 +176,195 @@ def exercise_page(exercise_name):
 @app.route('/api/exercises')
 def list_exercises():
     """Return a list of available exercises"""
-    exercises = []
-    for filename in os.listdir(MODELS_DIR):
-        if filename.endswith('.py') and not filename.startswith('__'):
-            exercise_name = filename[:-3]  # Remove .py extension
-            exercises.append({
-                'id': exercise_name,
-                'name': exercise_name.replace('_', ' ').title()
-            })
-    return jsonify(exercises)
+    return jsonify(exercise_models.listing())
 
 @app.route('/api/process_frame', methods=['POST'])
 def process_frame():
-    """Process a single frame using the specified exercise model"""
+    """Process a single frame using the specified exercise model
+
+    Optional JSON fields shaping the response:
+      return_image  full (default), preview (half size, low quality) or none
+      image_every   send the image only on every Nth frame of the session (default 1)
+      landmarks     true to include the 33 x [x, y, z, visibility] landmarks
+    """
     try:
         # Get the exercise name and base64 encoded frame from the request
         data = request.json
         exercise_name = data.get('exercise')
         base64_image = data.get('image')
+        return_image = data.get('return_image', 'full')
+        if return_image not in ('full', 'preview', 'none'):
+            return jsonify({'error': f'Unknown return_image {return_image}'}), 400
+        try:
+            image_every = 0 if return_image == 'none' else max(1, int(data.get('image_every', 1)))
+        except (TypeError, ValueError):
+            return jsonify({'error': f"image_every must be an integer, got {data.get('image_every')!r}"}), 400
         
         # Decode the base64 image
         encoded_data = base64_image.split(',')[1] if ',' in base64_image else base64_image
-        nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        # Load the exercise model if not already loaded
-        if exercise_name not in exercise_models:
-            module = load_exercise_module(exercise_name)
-            if module is None:
-                return jsonify({'error': f'Exercise module {exercise_name} not found'}), 404
-            
-            # Create an instance of the exercise tracker class
-            if hasattr(module, 'ExerciseTracker'):
-                exercise_models[exercise_name] = module.ExerciseTracker()
-            else:
-                return jsonify({'error': f'ExerciseTracker class not found in {exercise_name} module'}), 500
-        
-        # Process the frame using the exercise tracker
-        tracker = exercise_models[exercise_name]
-        result = tracker.process_frame(img)
-        
-        # Encode the processed image
-        _, buffer = cv2.imencode('.jpg', result['image'])
-        processed_image = base64.b64encode(buffer).decode('utf-8')
+        img = decode_frame(base64.b64decode(encoded_data), DECODE_MIN_SIDE)
+        if img is None:
+            return jsonify({'error': 'Request does not contain a decodable image'}), 400
+
+        # Process the frame using this session's exercise tracker (drawing only if an image goes back)
+        result, error = track_frame(exercise_name, img, data, image_every=image_every)
+        if error:
+            return error
         
-        # Return the results
-        return jsonify({
-            'image': f'data:image/jpeg;base64,{processed_image}',
-            'counter': result['counter'],
-            'feedback': result['feedback'],
-            'stage': result['stage']
-        })
+        # Return the results, with the processed image when one was drawn
+        record = result_record(result, flag(data.get('landmarks', False)))
+        if 'image' in result:
+            buffer = response_image(result['image'], 'jpeg', 95, return_image == 'preview')
+            record['image'] = 'data:image/jpeg;base64,' + base64.b64encode(buffer).decode('utf-8')
+        return jsonify(record)
         
     except Exception as e:
         logger.error(f"Error processing frame: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/frames/<exercise_name>', methods=['POST'])
+def process_frame_binary(exercise_name):
+    """Process one raw JPEG/WebP frame (request body, or multipart field 'frame')
+
+    Query parameters:
+      image      none (default), jpeg or webp: whether to send back the annotated frame
+      quality    encoder quality for the returned image (default 80)
+      preview    1 for a half-size, low-quality image
+      every      send the image only on every Nth frame of the session (default 1)
+      landmarks  1 to include the landmarks in the JSON result
+
+    Without an image the response is the compact JSON result. With one it is
+    a frame_transport envelope: JSON header length, JSON header, image bytes.
+    """
+    try:
+        image_format = request.args.get('image', 'none')
+        if image_format != 'none' and image_format not in IMAGE_FORMATS:
+            return jsonify({'error': f'Unknown image format {image_format}'}), 400
+        quality = request.args.get('quality', 80, type=int)
+        image_every = 0 if image_format == 'none' else max(1, request.args.get('every', 1, type=int))
+
+        # Raw bytes straight from the body, no base64 or JSON parsing
+        upload = request.files.get('frame')
+        data = upload.read() if upload is not None else request.get_data(cache=False)
+        img = decode_frame(data, DECODE_MIN_SIDE)
+        if img is None:
+            return jsonify({'error': 'Request does not contain a decodable image'}), 400
+
+        result, error = track_frame(exercise_name, img, image_every=image_every)
+        if error:
+            return error
+
+        record = result_record(result, flag(request.args.get('landmarks', '0')))
+        if 'image' not in result:
+            return jsonify(record)
+        record['image'] = image_format
+        payload = response_image(result['image'], image_format, quality, flag(request.args.get('preview', '0')))
+        return Response(pack_envelope(record, payload), mimetype=ENVELOPE_MIMETYPE)
+
+    except Exception as e:
+        logger.error(f"Error processing frame: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/capture_profile')
+def capture_profile():
+    """Recommended client capture resolution, JPEG quality and fps for the current server load"""
+    return jsonify(recommend(load_monitor.utilization()))
+
+@app.route('/api/sessions')
+def session_stats():
+    """Session registry size, measured session memory and hit/eviction counters (model memory is in /api/pose_pool)"""
+    return jsonify(sessions.stats())
+
+@app.route('/api/pose_pool')
+def pose_pool_stats():
+    """Pose estimator pool size, warm-up time, waits and 503 count"""
+    if inference_workers is not None:
+        return jsonify(inference_workers.stats())
+    return jsonify(pose_pool.stats())
+
+@app.route('/api/sessions/<sid>', methods=['DELETE'])
+def end_session(sid):
+    """End a session and release its tracker"""
+    if not sessions.remove(sid):
+        return jsonify({'error': f'Session {sid} not found'}), 404
+    return jsonify({'status': 'ended'})
+
+# Streaming sessions currently connected, by session id
+streams = {}
+
+def stream_key(sid):
+    """Registry key of a stream's tracker; never equal to a (string) HTTP session id"""
+    return ('stream', sid)
+
+def stream_input(exercise_name, sid):
+    """Input handler for a StreamSession: frames go through track_frame, landmarks straight to the counter"""
+    sid = stream_key(sid)
+    def process(kind, t, payload):
+        if kind == 'landmarks':
+            lm = None if payload is None else np.asarray(payload, dtype=np.float32).reshape(33, 4)
+            with sessions.checkout(sid, exercise_name) as tracker:
+                return tracker.update(lm)
+        img = decode_frame(payload, DECODE_MIN_SIDE)
+        if img is None:
+            raise ValueError('Frame is not a decodable image')
+        result, error = track_frame(exercise_name, img, sid=sid, image_every=0)
+        if error:
+            response = error[0] if isinstance(error, tuple) else error
+            raise RuntimeError(response.get_json().get('error'))
+        return result
+    return process
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route('/api/stream/<exercise_name>')
+    def stream(ws, exercise_name):
+        """Persistent exercise session: frames or landmarks up, result deltas down (see stream_session.py)"""
+        _, error = get_tracker_class(exercise_name)
+        if error:
+            ws.close(reason=1008, message=error[0].get_json().get('error'))
+            return
+        # Always issued here: a client-chosen id could attach to another patient's tracker
+        sid = uuid.uuid4().hex
+        session = StreamSession(stream_input(exercise_name, sid), ws.send)
+        streams[sid] = session
+        # The worker needs the app context for track_frame's error responses
+        def work():
+            with app.app_context():
+                session.run()
+        worker = threading.Thread(target=work, name=f"stream-{sid[:8]}", daemon=True)
+        worker.start()
+        session.send({'type': 'session', 'session_id': sid})
+        try:
+            while True:
+                session.receive(ws.receive())
+        except Exception as e:
+            logger.info(f"Stream {sid} ended: {e or type(e).__name__}")
+        finally:
+            session.close()
+            worker.join(timeout=5)
+            streams.pop(sid, None)
+            sessions.remove(stream_key(sid))
+            logger.info(f"Stream {sid} stats: {session.stats()}")
+else:
+    logger.warning("flask-sock is not installed; the /api/stream WebSocket endpoint is disabled")
+
+@app.route('/api/streams')
+def stream_stats():
+    """Per-session latency (server and glass-to-glass) and drop counts of the connected streams"""
+    return jsonify({sid: session.stats() for sid, session in list(streams.items())})
+
+# Build and warm the pose estimators at boot (per worker process) rather than on the first frame;
+# skipped when this module is re-imported inside a spawned inference worker
+if __name__ != '__mp_main__':
+    exercise_models.preload(background=True)
+    if inference_workers is not None:
+        inference_workers.start()
+        logger.info(f"Started {inference_workers.workers} inference worker processes")
+    elif os.environ.get('POSE_POOL_WARMUP', '1') != '0':
+        pose_pool.start()
+        logger.info(f"Warmed {pose_pool.size} pose estimators in {pose_pool.warmup_s:.2f} s")
+
 if __name__ == '__main__':
     # Make sure the models directory exists
     os.makedirs(MODELS_DIR, exist_ok=True)